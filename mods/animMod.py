@@ -4,11 +4,31 @@ Import this mod to access functions that are repeatedly needed in tools
 # -----------------------------------------------------------------------------
 # Import Modules
 # -----------------------------------------------------------------------------
+# python
+import difflib
+import heapq
+import inspect
+import os
+import re
+import shutil
+import tempfile
+import time
+
 # maya
 import maya.cmds as cmds
 import maya.mel as mel
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+
+# numpy
+import numpy as np
 
 # ncTools
+from ncTools.mods import bakeMod
+from ncTools.mods import curveMod
+from ncTools.mods import frameMod
+from ncTools.mods import snapshotMod
+from ncTools.mods import transformMod
 from ncTools.tools.ncToolboxGlobals import ncToolboxGlobals as G
 
 # -----------------------------------------------------------------------------
@@ -18,31 +38,97 @@ CTRL_sfx = "_CTRL"
 LEFT_pfx = ":l_"
 RIGHT_pfx = ":r_"
 
+# Side prefixes that mirror onto each other
+MIRROR_SIDES = [(LEFT_pfx, RIGHT_pfx)]
+
+# Names of the caches on G that are dropped when a reference or scene changes
+SCENE_CACHES = ["hierarchy_index", "attribute_catalogue", "anim_curve_index", "mirror_table",
+                "anim_layer_membership", "node_handle_cache", "sample_method_cache",
+                "control_mapping"]
+
+# Largest error key reduction may leave on each type of anim curve, in ui units
+REDUCTION_ERRORS = {"animCurveTL": 0.01, "animCurveTA": 0.1, "animCurveTU": 0.01, "animCurveTT": 0.01}
+
+# Lowest difflib ratio a renamed control is matched to another rig's control at
+MAPPING_CUTOFF = 0.8
+
+# Time based anim curves, the curves an anim layer can hold
+ANIM_CURVE_TYPES = ["animCurveTL", "animCurveTA", "animCurveTU", "animCurveTT"]
+
+# Inputs of a pairBlend, channel and axis, e.g inTranslateX1 or inRotate2
+PAIR_BLEND_INPUT = re.compile(r"^in(Translate|Rotate)([XYZ]?)([12])$")
+
+# Weight attributes constraints add to keyed attributes, e.g blendParent1,
+# 1 follows the constraint
+BLEND_ATTRIBUTE_PATTERN = "blend*"
+
+# API tangent and infinity types by the names curveMod uses
+TANGENT_TYPE_NAMES = {oma.MFnAnimCurve.kTangentGlobal: "spline",
+                      oma.MFnAnimCurve.kTangentSmooth: "spline",
+                      oma.MFnAnimCurve.kTangentSlow: "spline",
+                      oma.MFnAnimCurve.kTangentFast: "spline",
+                      oma.MFnAnimCurve.kTangentLinear: "linear",
+                      oma.MFnAnimCurve.kTangentFlat: "flat",
+                      oma.MFnAnimCurve.kTangentStep: "step",
+                      oma.MFnAnimCurve.kTangentStepNext: "stepnext",
+                      oma.MFnAnimCurve.kTangentClamped: "clamped",
+                      oma.MFnAnimCurve.kTangentPlateau: "plateau",
+                      oma.MFnAnimCurve.kTangentFixed: "fixed",
+                      oma.MFnAnimCurve.kTangentAuto: "auto"}
+INFINITY_TYPE_NAMES = {oma.MFnAnimCurve.kConstant: "constant",
+                       oma.MFnAnimCurve.kLinear: "linear",
+                       oma.MFnAnimCurve.kCycle: "cycle",
+                       oma.MFnAnimCurve.kCycleRelative: "cycleRelative",
+                       oma.MFnAnimCurve.kOscillate: "oscillate"}
+
+# Ways sample_plugs can evaluate plugs over time, and the frames each is timed
+# on before the faster one is picked for a rig
+SAMPLE_METHODS = ["context", "scrub"]
+SAMPLE_TIMING_FRAMES = 10
+
+# Attribute options accepted by get_attributes, as in cmds.listAttr
+ATTRIBUTE_OPTIONS = {"keyable": 1, "k": 1,
+                     "unlocked": 2, "u": 2,
+                     "channelBox": 4, "cb": 4,
+                     "connectable": 8, "c": 8}
+
 
 # -----------------------------------------------------------------------------
 # Get things
 # -----------------------------------------------------------------------------
-def get_anim_curves(node=None, attribute=None, anim_curve=None):
+def get_anim_curve(node=None, attribute=None, anim_layer=None):
+    """
+    Function gets the anim_curve of the node's attribute on the given anim
+    layer, or the base layer if no anim layer is given
     """
-    Function gets anim_curves based on given node and get_attributes
-    either all or selected
+    anim_curve = get_anim_curve_index().get_curve(node, attribute, anim_layer)
+    return anim_curve
+
+
+def get_anim_curves(node=None, attribute=None, anim_layer=None):
     """
-    anim_curves = []
+    Function gets anim_curves based on given node, attribute and anim layer,
+    any of them left as None matches all
+    """
+    anim_curves = get_anim_curve_index().get_curves(nodes=[node] if node else None,
+                                                    attributes=[attribute] if attribute else None,
+                                                    anim_layers=[anim_layer] if anim_layer else None)
     return anim_curves
 
 
 def get_anim_layers(node=None, selected=True):
     """
-    Function gets anim layers either all or selected
+    Function gets anim layers either all or selected, or the ones the node is
+    in. Reads the anim layer membership fresh, so the layer checks of the
+    operation that follows use it warm
     """
-    all_anim_layers = cmds.ls(type="animLayer")
-    anim_layers = []
-    if selected==True:
-        for anim_layer in all_anim_layers:
-            if cmds.animLayer(anim_layer, query = True, sel=True):
-                anim_layers.append(anim_layer)
+    anim_layer_membership = get_anim_layer_membership(rebuild=True)
+    if node:
+        anim_layers = anim_layer_membership.get_node_layers(node)
+    elif selected==True:
+        anim_layers = anim_layer_membership.get_selected_layers()
     else:
-        anim_layers = all_anim_layers
+        anim_layers = list(anim_layer_membership.anim_layers)
     return anim_layers
 
 
@@ -51,18 +137,14 @@ def get_attributes(node=None, attribute_options=None):
     Function returns a list of attributes based on the given node, and the
     attribute options such as keyable, c, unlocked etc
     """
-    options_true = []
-    for option in attribute_options:
-        option_true = "{0} = True".format(option)
-        options_true.append(option_true)
-    options_string = ", ".join(options_true)
-    attributes = eval("cmds.listAttr('{0}', {1})".format(node, options_string))
-    return attributes
+    attributes = get_node_attributes(nodes=[node], attribute_options=attribute_options)[node]
+    return list(attributes)
 
 
-def get_controls(selected=True):
+def get_controls(node=None, selected=True):
     """
-    Function gets controls either all or selected
+    Function gets controls either all or selected. If a node is given only the
+    controls in that node's rig are returned
     """
     controls = []
     if selected==True:
@@ -70,9 +152,43 @@ def get_controls(selected=True):
         for control in selection:
             if control.endswith(CTRL_sfx):
                 controls.append(control)
+        if node:
+            rig = get_hierarchy_index().get_rig(node)
+            controls = [control for control in controls if get_hierarchy_index().get_rig(control) == rig]
+    elif node:
+        rig = get_hierarchy_index().get_rig(node)
+        controls = get_hierarchy_index().get_controls(rig)
+    else:
+        for rig in get_rigs(selected=False):
+            controls = controls + get_hierarchy_index().get_controls(rig)
     return controls
 
 
+def get_control_name(node=None, control_name=None):
+    """
+    Function gets the full name of a control in the rig of the given node
+    e.g get_control_name("BoyRig:head_CTRL", "global") returns "BoyRig:global_CTRL"
+    """
+    namespace = get_namespace(node)
+    control = "{0}:{1}{2}".format(namespace, control_name, CTRL_sfx)
+    return control
+
+
+def get_control_attributes(node=None, attribute_options=("keyable", "unlocked"), rebuild=False):
+    """
+    Function returns "control.attribute" names, without namespace, for every
+    control in the rig of the given node
+    """
+    controls = get_controls(node=node, selected=False)
+    node_attributes = get_node_attributes(nodes=controls, attribute_options=attribute_options, rebuild=rebuild)
+    control_attributes = []
+    for control in controls:
+        control_name = control.rpartition(":")[2]
+        for attribute in node_attributes[control]:
+            control_attributes.append("{0}.{1}".format(control_name, attribute))
+    return control_attributes
+
+
 def get_current_frame():
     """
     Function gets current frame on the timeline
@@ -82,12 +198,12 @@ def get_current_frame():
 
 def get_frames():
     """
-    Function gets selected frames():
+    Function gets selected frames as a FrameSet, the highlighted timeline range
+    or if only one frame is highlighted, the keys selected in the graph editor
     """
     G.playback_slider = G.playback_slider or mel.eval("$tmpVar = $gPlayBackSlider")
-    timeline_frames = []
     timeline_frame_range = cmds.timeControl(G.playback_slider, query = True, rangeArray = True)
-    timeline_frames = range(int(timeline_frame_range[0]), int(timeline_frame_range[1]))
+    timeline_frames = frameMod.FrameSet.from_range(int(timeline_frame_range[0]), int(timeline_frame_range[1]) - 1)
     graphEditor_frames = cmds.keyframe(query=True, selected=True, timeChange=True)
 
     if len(timeline_frames) > 1:
@@ -95,10 +211,22 @@ def get_frames():
     elif graphEditor_frames is None:
         frames = timeline_frames
     elif len(timeline_frames) == 1 and len(graphEditor_frames) > 0:
-        frames = graphEditor_frames
+        frames = frameMod.FrameSet.from_frames(graphEditor_frames)
 
     return frames
 
+
+def get_keyed_frames(nodes=None):
+    """
+    Function gets a FrameSet of every keyed frame of the given nodes, queried
+    for all of them at once
+    """
+    key_times = []
+    if nodes:
+        key_times = cmds.keyframe(nodes, query=True, timeChange=True) or []
+    keyed_frames = frameMod.FrameSet.from_frames(key_times)
+    return keyed_frames
+
 def get_namespace(node=None):
     """
     Function gets namespace of given node
@@ -107,24 +235,53 @@ def get_namespace(node=None):
     return namespace
 
 
+def get_node_attributes(nodes=None, attribute_options=None, rebuild=False):
+    """
+    Function returns a dictionary of node: tuple of attributes for all the given
+    nodes in one batched query, see get_attributes. Tools pass rebuild at the
+    start of an operation, see get_attribute_catalogue
+    """
+    node_attributes = get_attribute_catalogue(rebuild).get(nodes, attribute_options)
+    return node_attributes
+
+
 def get_opposite_control(node=None):
     """
-    Function gets the opposite control based on node, if no opposite returns node
+    Function gets the opposite control based on node, if the node has no side
+    returns node and if its opposite is missing from the rig returns None
     """
-    if LEFT_pfx in node:
-        opposite_control = node.replace(LEFT_pfx, RIGHT_pfx)
-    elif RIGHT_pfx in node:
-        opposite_control = node.replace(RIGHT_pfx, LEFT_pfx)
-    else:
-        opposite_control = node
+    opposite_control = get_mirror_table().get_opposite(node)
     return opposite_control
 
 
+def get_playback_frames():
+    """
+    Function gets a FrameSet of the playback range
+    """
+    min_time = cmds.playbackOptions(query=True, minTime=True)
+    max_time = cmds.playbackOptions(query=True, maxTime=True)
+    playback_frames = frameMod.FrameSet.from_range(min_time, max_time)
+    return playback_frames
+
+
 def get_rigs(node=None, selected=True):
     """
-    Function gets rigs, either all or selected
+    Function gets rigs, either all or selected. If a node is given only the rig
+    of that node is returned
     """
+    hierarchy_index = get_hierarchy_index()
+    if node:
+        nodes = [node]
+    elif selected==True:
+        nodes = cmds.ls(sl=1)
+    else:
+        return hierarchy_index.get_rigs()
+
     rigs = []
+    for node in nodes:
+        rig = hierarchy_index.get_rig(node)
+        if rig and rig not in rigs and hierarchy_index.get_controls(rig):
+            rigs.append(rig)
     return rigs
 
 
@@ -145,10 +302,1882 @@ def get_timeline_range():
     return timeline_range
 
 
+def get_target(target=None, **kwargs):
+    """
+    Function calls the get_<target> function with the keyword arguments it
+    accepts e.g get_target("rigs", selected=True) calls get_rigs(selected=True)
+    """
+    get_function = globals().get("get_{0}".format(target))
+    if get_function is None:
+        cmds.error("animMod can't get target '{0}'".format(target))
+    get_argspec = getattr(inspect, "getfullargspec", None) or inspect.getargspec
+    arguments = get_argspec(get_function).args
+    kwargs = dict((key, value) for key, value in kwargs.items() if key in arguments)
+    return get_function(**kwargs)
+
+
 def get_top_node(node=None):
     """
     Function gets top node of given node
     """
-    top_nodes = []
-    return top_nodes
+    top_node = get_hierarchy_index().get_top_node(node)
+    return top_node
+
+
+# -----------------------------------------------------------------------------
+# Check things
+# -----------------------------------------------------------------------------
+def is_control_in_anim_layer(control=None, anim_layer=None, attribute=None):
+    """
+    Function checks if the control, or one attribute of it, is in the anim layer
+    """
+    anim_layer_membership = get_anim_layer_membership()
+    if attribute:
+        return anim_layer_membership.is_plug_in_layer("{0}.{1}".format(control, attribute), anim_layer)
+    return anim_layer_membership.is_node_in_layer(control, anim_layer)
+
+
+# -----------------------------------------------------------------------------
+# Animation Data
+# -----------------------------------------------------------------------------
+def store_animation_data(time_range=None, rig=None, method="auto"):
+    """
+    Function stores the value of every control attribute of the rig on every
+    frame of the time range, both included, as an AnimationSnapshot. Channels
+    are "control.attribute" without namespace so they paste onto any rig. The
+    values are read with sample_plugs and the given method
+    """
+    namespace = get_namespace(rig)
+    frames = frameMod.FrameSet.from_range(time_range[0], time_range[1]).to_list()
+    channels = []
+    plugs = []
+    for control_attribute in get_control_attributes(node=rig, rebuild=True):
+        plug = get_plug("{0}:{1}".format(namespace, control_attribute) if namespace else control_attribute)
+        if plug is not None:
+            channels.append(control_attribute)
+            plugs.append(plug)
+
+    snapshot = snapshotMod.AnimationSnapshot(frames, channels, sample_plugs(plugs, frames, method=method))
+    return snapshot
+
+
+def get_plug(plug_name=None):
+    """
+    Function returns the MPlug of a "node.attribute" name, or None if it
+    doesn't exist. Plugs come from the node handle cache so each is only
+    looked up once
+    """
+    node, _, attribute = plug_name.partition(".")
+    plug = get_node_handle_cache().get_plug(node, attribute)
+    return plug
+
+
+def get_unit_factors(plugs=None):
+    """
+    Function returns the factor per plug that turns its internal value, radians
+    or centimetres, into the ui unit shown in the channel box
+    """
+    angle_factor = om.MAngle(1.0).asUnits(om.MAngle.uiUnit())
+    distance_factor = om.MDistance(1.0).asUnits(om.MDistance.uiUnit())
+    unit_factors = np.ones(len(plugs), dtype=np.float64)
+    for i, plug in enumerate(plugs):
+        attribute = plug.attribute()
+        if not attribute.hasFn(om.MFn.kUnitAttribute):
+            continue
+        unit_type = om.MFnUnitAttribute(attribute).unitType()
+        if unit_type == om.MFnUnitAttribute.kAngle:
+            unit_factors[i] = angle_factor
+        elif unit_type == om.MFnUnitAttribute.kDistance:
+            unit_factors[i] = distance_factor
+    return unit_factors
+
+
+def iterate_frame_contexts(frames=None, method="context"):
+    """
+    Function yields the row of every frame and the MDGContext to read plugs
+    in at that frame. "context" evaluates each frame in its own time context
+    and never touches the current time, "scrub" moves the current time once
+    per frame without a redraw and puts it back when done
+    """
+    time_unit = om.MTime.uiUnit()
+    if method == "context":
+        for row, frame in enumerate(frames):
+            yield row, om.MDGContext(om.MTime(frame, time_unit))
+        return
+
+    current_time = cmds.currentTime(query=True)
+    try:
+        for row, frame in enumerate(frames):
+            cmds.currentTime(frame, update=False)
+            yield row, om.MDGContext.kNormal
+    finally:
+        cmds.currentTime(current_time)
+
+
+def sample_plugs(plugs=None, frames=None, method="auto", data="double"):
+    """
+    Function evaluates the plugs at every frame and returns a frames x plugs
+    array of ui unit values, or frames x plugs x 4 x 4 when data is "matrix".
+    The method is "context" or "scrub", see iterate_frame_contexts, or "auto"
+    for whichever measured faster on the rig, see get_sample_method
+    """
+    frames = list(frames)
+    if method == "auto":
+        method = get_sample_method(plugs, frames)
+        if method is None:
+            return measure_sample_methods(plugs, frames, data)
+
+    if data == "matrix":
+        values = np.empty((len(frames), len(plugs), 4, 4), dtype=np.float64)
+        for row, context in iterate_frame_contexts(frames, method):
+            for column, plug in enumerate(plugs):
+                matrix = om.MFnMatrixData(plug.asMObject(context)).matrix()
+                values[row, column] = np.reshape([matrix[i] for i in range(16)], (4, 4))
+        return values
+
+    values = np.empty((len(frames), len(plugs)), dtype=np.float64)
+    for row, context in iterate_frame_contexts(frames, method):
+        for column, plug in enumerate(plugs):
+            values[row, column] = plug.asDouble(context)
+    values *= get_unit_factors(plugs)
+    return values
+
+
+def get_sample_method(plugs=None, frames=None):
+    """
+    Function returns the sample method measured faster for the rig of the
+    plugs, or None if the rig hasn't been measured and the sample is long
+    enough to measure it, see measure_sample_methods. Shorter samples use
+    "context" until then
+    """
+    if not plugs:
+        return "context"
+    namespace = om.MFnDependencyNode(plugs[0].node()).namespace
+    method = get_sample_method_cache().get(namespace)
+    if method:
+        return method
+    if len(frames) < SAMPLE_TIMING_FRAMES * len(SAMPLE_METHODS):
+        return "context"
+    return None
+
+
+def measure_sample_methods(plugs=None, frames=None, data="double"):
+    """
+    Function samples the plugs like sample_plugs while measuring the sample
+    methods on their rig. Each method samples and times its own few frames at
+    the start, so neither reads what the other already evaluated and no frame
+    is sampled twice, the rest are sampled with the faster one, which is kept
+    in the sample method cache
+    """
+    frames = list(frames)
+    timings = []
+    chunks = []
+    for i, method in enumerate(SAMPLE_METHODS):
+        timing_frames = frames[i * SAMPLE_TIMING_FRAMES:(i + 1) * SAMPLE_TIMING_FRAMES]
+        start = time.time()
+        chunks.append(sample_plugs(plugs, timing_frames, method=method, data=data))
+        timings.append((time.time() - start, method))
+    method = min(timings)[1]
+    get_sample_method_cache().set(om.MFnDependencyNode(plugs[0].node()).namespace, method)
+
+    remaining_frames = frames[len(SAMPLE_METHODS) * SAMPLE_TIMING_FRAMES:]
+    chunks.append(sample_plugs(plugs, remaining_frames, method=method, data=data))
+    return np.concatenate(chunks, axis=0)
+
+
+def get_bake_scheduler(worker_count=1, mayapy="mayapy"):
+    """
+    Function returns a BakeScheduler from bakeMod. One worker samples in this
+    session, more export the scene once to a temp folder and sample in that
+    many mayapy processes. Close the scheduler once sampled to delete the
+    folder
+    """
+    if worker_count <= 1:
+        sampler = lambda plug_names, frames, data: sample_plugs([get_plug(plug_name) for plug_name in plug_names],
+                                                                frames, data=data)
+        return bakeMod.BakeScheduler([bakeMod.LocalWorker(sampler)])
+
+    scene_folder = tempfile.mkdtemp(prefix="ncToolsBake")
+    scene_path = os.path.join(scene_folder, "bakeScene.ma")
+    try:
+        cmds.file(scene_path, exportAll=True, preserveReferences=True, type="mayaAscii", force=True)
+    except RuntimeError:
+        shutil.rmtree(scene_folder, ignore_errors=True)
+        raise
+    workers = [bakeMod.MayapyWorker(scene_path, mayapy=mayapy) for i in range(worker_count)]
+    return bakeMod.BakeScheduler(workers, folders=[scene_folder])
+
+
+# -----------------------------------------------------------------------------
+# Anim Curve Data
+# -----------------------------------------------------------------------------
+def read_anim_curves(anim_curves=None):
+    """
+    Function reads the keys, tangents, weights and infinity of each anim curve
+    once through the API and returns a dictionary of anim_curve: AnimCurve from
+    curveMod, in frames and ui units, to evaluate without changing the time
+    """
+    time_unit = om.MTime.uiUnit()
+    frames_per_second = om.MTime(1.0, om.MTime.kSeconds).asUnits(time_unit)
+
+    curves = {}
+    for anim_curve in anim_curves or []:
+        selection_list = om.MSelectionList()
+        selection_list.add(anim_curve)
+        anim_curve_fn = oma.MFnAnimCurve(selection_list.getDependNode(0))
+
+        unit_factor = get_unit_factor(anim_curve_fn)
+        count = anim_curve_fn.numKeys
+        times = np.empty(count)
+        values = np.empty(count)
+        in_tangents = np.empty((count, 2))
+        out_tangents = np.empty((count, 2))
+        in_types = []
+        out_types = []
+        for i in range(count):
+            times[i] = anim_curve_fn.input(i).asUnits(time_unit)
+            values[i] = anim_curve_fn.value(i)
+            in_tangents[i] = anim_curve_fn.getTangentXY(i, True)
+            out_tangents[i] = anim_curve_fn.getTangentXY(i, False)
+            in_types.append(TANGENT_TYPE_NAMES.get(anim_curve_fn.inTangentType(i), "spline"))
+            out_types.append(TANGENT_TYPE_NAMES.get(anim_curve_fn.outTangentType(i), "spline"))
+
+        # Tangents are in seconds and internal units
+        in_tangents *= (frames_per_second, unit_factor)
+        out_tangents *= (frames_per_second, unit_factor)
+        curves[anim_curve] = curveMod.AnimCurve(times, values * unit_factor, in_tangents, out_tangents,
+                                                in_types, out_types, weighted=anim_curve_fn.isWeighted,
+                                                pre_infinity=INFINITY_TYPE_NAMES[anim_curve_fn.preInfinityType],
+                                                post_infinity=INFINITY_TYPE_NAMES[anim_curve_fn.postInfinityType])
+    return curves
+
+
+def get_unit_factor(anim_curve_fn):
+    """
+    Function returns the factor turning the internal values of the anim curve
+    into ui units, for angles and distances, 1.0 for any other curve
+    """
+    curve_type = anim_curve_fn.animCurveType
+    if curve_type == oma.MFnAnimCurve.kAnimCurveTA:
+        return om.MAngle(1.0).asUnits(om.MAngle.uiUnit())
+    if curve_type == oma.MFnAnimCurve.kAnimCurveTL:
+        return om.MDistance(1.0).asUnits(om.MDistance.uiUnit())
+    return 1.0
+
+
+def evaluate_anim_curves(anim_curves=None, times=None):
+    """
+    Function evaluates each anim curve at the times without changing the
+    current time, returns a dictionary of anim_curve: array of values
+    """
+    curve_values = curveMod.evaluate_curves(read_anim_curves(anim_curves), times)
+    return curve_values
+
+
+def get_selected_key_indices(anim_curves=None):
+    """
+    Function returns a dictionary of anim_curve: array of the indices of its
+    keys selected in the graph editor
+    """
+    key_indices = {}
+    for anim_curve in anim_curves or []:
+        indices = cmds.keyframe(anim_curve, query=True, selected=True, indexValue=True) or []
+        key_indices[anim_curve] = np.asarray(sorted(indices), dtype=np.int64)
+    return key_indices
+
+
+def write_keys(anim_curve=None, times=None, values=None, in_types=None, out_types=None, replace=True):
+    """
+    Function writes arrays of key times and values, in frames and ui units, to
+    the anim curve. Keys missing from the curve are inserted and, if replace is
+    on, keys at other times are cut, with one call for all keys each. All times
+    and values are then set with a single setAttr on the keyTimeValue array, so
+    the write is undoable. Tangent types, given as one name per key, are set
+    with one keyTangent call per type
+    """
+    times = [frameMod.round_frame(time) for time in times]
+    values = [float(value) for value in values]
+    existing_times = [frameMod.round_frame(time) for time in
+                      cmds.keyframe(anim_curve, query=True, timeChange=True) or []]
+
+    # Keep the keys that aren't written over
+    if not replace and existing_times:
+        existing_values = cmds.keyframe(anim_curve, query=True, valueChange=True)
+        key_values = dict(zip(existing_times, existing_values))
+        key_values.update(zip(times, values))
+        times = sorted(key_values)
+        values = [key_values[time] for time in times]
+    if not times:
+        return
+
+    # Add before cutting so the curve is never left without keys
+    added_times = sorted(set(times) - set(existing_times))
+    if added_times and existing_times:
+        cmds.setKeyframe(anim_curve, time=added_times, insert=True)
+    elif added_times:
+        cmds.setKeyframe(anim_curve, time=added_times, value=0.0)
+    cut_keys(anim_curve, sorted(set(existing_times) - set(times)))
+
+    time_values = []
+    for time, value in zip(times, values):
+        time_values.extend([time, value])
+    cmds.setAttr("{0}.ktv[0:{1}]".format(anim_curve, len(times) - 1), *time_values)
+
+    # Group the keys by tangent type
+    for flag, tangent_types in [("inTangentType", in_types), ("outTangentType", out_types)]:
+        if tangent_types is None:
+            continue
+        type_times = {}
+        for time, tangent_type in zip(times, tangent_types):
+            type_times.setdefault(tangent_type, []).append((time, time))
+        for tangent_type, tangent_times in type_times.items():
+            cmds.keyTangent(anim_curve, edit=True, time=tangent_times, **{flag: tangent_type})
+
+
+def reduce_anim_curves(anim_curves=None, max_errors=None, tangent_type="spline"):
+    """
+    Function rewrites every anim curve with as few keys of the tangent type as
+    keep it within the max error of its type, see curveMod.reduce_key_mask.
+    Max errors are a dictionary of anim curve type: error over REDUCTION_ERRORS.
+    The fit models Maya's tangents, so every written curve is read back and
+    the keys it misses by more than the error are added back until it is in,
+    at worst every key. Returns a dictionary of anim_curve: (keys before,
+    keys after)
+    """
+    if not anim_curves:
+        return {}
+    max_errors = dict(REDUCTION_ERRORS, **(max_errors or {}))
+    curve_errors = {}
+    for curve_type, max_error in max_errors.items():
+        for anim_curve in cmds.ls(anim_curves, type=curve_type) or []:
+            curve_errors[anim_curve] = max_error
+
+    curves = read_anim_curves(list(curve_errors))
+    keep_masks = {}
+    for anim_curve, max_error in curve_errors.items():
+        curve = curves[anim_curve]
+        keep_masks[anim_curve] = curveMod.reduce_key_mask(curve.times, curve.values, max_error, tangent_type)
+
+    # Write the kept keys and check them against the curve Maya made of them
+    pending = [anim_curve for anim_curve, keep in keep_masks.items() if not keep.all()]
+    while pending:
+        for anim_curve in pending:
+            curve, keep = curves[anim_curve], keep_masks[anim_curve]
+            tangent_types = [tangent_type] * int(keep.sum())
+            write_keys(anim_curve, curve.times[keep], curve.values[keep], in_types=tangent_types,
+                       out_types=tangent_types, replace=True)
+        written_curves = read_anim_curves(pending)
+        missed = []
+        for anim_curve in pending:
+            curve = curves[anim_curve]
+            errors = np.abs(written_curves[anim_curve].evaluate_array(curve.times) - curve.values)
+            out = errors > curve_errors[anim_curve]
+            if out.any():
+                keep_masks[anim_curve] |= out
+                missed.append(anim_curve)
+        pending = missed
+
+    key_counts = dict((anim_curve, (len(keep), int(keep.sum()))) for anim_curve, keep in keep_masks.items())
+    return key_counts
+
+
+def delete_redundant_keys(anim_curves=None, value_tolerance=1e-4, tangent_tolerance=1e-3):
+    """
+    Function cuts the redundant keys of the anim curves, see
+    curveMod.redundant_key_mask, and all but the first key of static curves.
+    The mask models Maya's tangents, so every cut curve is read back and the
+    cut keys nearest to where it now misses the original by more than the
+    value tolerance, at a key or halfway between keys, are put back until it
+    is in, at worst every key. Returns a dictionary of anim_curve: (keys cut,
+    static)
+    """
+    curves = read_anim_curves(anim_curves)
+    cut_masks = {}
+    static_curves = set()
+    for anim_curve in anim_curves or []:
+        curve = curves[anim_curve]
+        if curveMod.is_static(curve, value_tolerance, tangent_tolerance):
+            cut_masks[anim_curve] = np.arange(len(curve)) > 0
+            static_curves.add(anim_curve)
+        else:
+            cut_masks[anim_curve] = curveMod.redundant_key_mask(curve, value_tolerance, tangent_tolerance)
+        cut_keys(anim_curve, curve.times[cut_masks[anim_curve]])
+
+    # Check the cut curves Maya made and put back the keys they miss
+    pending = [anim_curve for anim_curve, cut in cut_masks.items() if cut.any()]
+    while pending:
+        cut_curves = read_anim_curves(pending)
+        missed = []
+        for anim_curve in pending:
+            curve, cut = curves[anim_curve], cut_masks[anim_curve]
+            check_times = np.concatenate([curve.times, (curve.times[:-1] + curve.times[1:]) * 0.5])
+            errors = np.abs(cut_curves[anim_curve].evaluate_array(check_times) - curve.evaluate_array(check_times))
+            miss_times = check_times[errors > value_tolerance]
+            if not len(miss_times):
+                continue
+            cut_indices = np.flatnonzero(cut)
+            nearest = np.abs(curve.times[cut_indices][:, np.newaxis] - miss_times).argmin(axis=0)
+            restored = np.unique(cut_indices[nearest])
+            restore_keys(anim_curve, curve, restored)
+            cut[restored] = False
+            static_curves.discard(anim_curve)
+            if cut.any():
+                missed.append(anim_curve)
+        pending = missed
+
+    return dict((anim_curve, (int(cut.sum()), anim_curve in static_curves)) for anim_curve, cut in cut_masks.items())
+
+
+def restore_keys(anim_curve=None, curve=None, indices=None):
+    """
+    Function puts the keys at the indices of the AnimCurve, as read before
+    they were cut, back on the anim curve with their tangent types. Fixed
+    tangents are set back to their read vectors, the other types are worked
+    out again by Maya from the keys around them
+    """
+    selection_list = om.MSelectionList()
+    selection_list.add(anim_curve)
+    anim_curve_fn = oma.MFnAnimCurve(selection_list.getDependNode(0))
+    frames_per_second = om.MTime(1.0, om.MTime.kSeconds).asUnits(om.MTime.uiUnit())
+    unit_factor = get_unit_factor(anim_curve_fn)
+
+    for index in indices:
+        time = float(curve.times[index])
+        in_type = curveMod.TANGENT_TYPES[curve.in_types[index]]
+        out_type = curveMod.TANGENT_TYPES[curve.out_types[index]]
+        cmds.setKeyframe(anim_curve, time=time, value=float(curve.values[index]),
+                         inTangentType=in_type, outTangentType=out_type)
+        if curveMod.FIXED in (curve.in_types[index], curve.out_types[index]):
+            # Tangents are read in frames and ui units, keyTangent takes seconds
+            # and internal units
+            in_x, in_y = curve.in_tangents[index] / (frames_per_second, unit_factor)
+            out_x, out_y = curve.out_tangents[index] / (frames_per_second, unit_factor)
+            cmds.keyTangent(anim_curve, edit=True, time=(time, time), lock=False,
+                            ix=float(in_x), iy=float(in_y), ox=float(out_x), oy=float(out_y))
+
+
+def cut_keys(anim_curve=None, times=None):
+    """
+    Function deletes the keys of the anim curve at the times in one cut
+    """
+    if len(times):
+        cmds.cutKey(anim_curve, time=[(time, time) for time in times], option="keys", clear=True)
+
+
+def write_plug_keys(plug_keys=None, replace=False):
+    """
+    Function writes a dictionary of "node.attribute": (times, values) as keys,
+    making the anim curve of any plug that isn't keyed yet. Keys the plug
+    already has at other times are kept unless replace is on. Driven key
+    curves, the ones with a connected input, are never written and plugs
+    only driven by them are skipped with a warning
+    """
+    skipped = []
+    for plug, (times, values) in plug_keys.items():
+        anim_curves = cmds.keyframe(plug, query=True, name=True) or []
+        time_curves = [anim_curve for anim_curve in anim_curves if not is_driven_curve(anim_curve)]
+        if anim_curves and not time_curves:
+            skipped.append(plug)
+            continue
+        if not time_curves:
+            node, _, attribute = plug.partition(".")
+            cmds.setKeyframe(node, attribute=attribute, time=[times[0]])
+            time_curves = cmds.keyframe(plug, query=True, name=True)
+        if not time_curves:
+            continue
+        write_keys(time_curves[0], times, values, replace=replace)
+    if skipped:
+        cmds.warning("Skipped plugs driven by driven keys: {0}".format(", ".join(sorted(skipped))))
+
+
+def is_driven_curve(anim_curve):
+    """
+    Function returns True if the anim curve's input is connected, e.g a
+    driven key curve, rather than following time
+    """
+    return bool(cmds.listConnections("{0}.input".format(anim_curve), source=True, destination=False))
+
+
+def euler_filter(nodes=None):
+    """
+    Function euler filters the rotate curves of the nodes on every anim layer
+    they are keyed on. The axes of a layer are evaluated together at all of
+    their key times, an axis without a curve held at its value, or 0 on
+    additive layers, and filtered once in the node's rotate order with
+    transformMod.euler_filter_keyed. Every curve that changed is written back
+    at those times from the same solution so the axes keep one orientation.
+    Additive layers only get whole turns taken out, a flipped rotation added
+    on top of other layers would change the pose
+    """
+    angle_factor = om.MAngle(1.0).asUnits(om.MAngle.uiUnit())
+    anim_curve_index = get_anim_curve_index(rebuild=True)
+    curve_sets = []
+    for node in nodes or []:
+        anim_layers = []
+        for axis in "XYZ":
+            anim_layers.extend(anim_layer for anim_layer in anim_curve_index.get_layers(node, "rotate" + axis)
+                               if anim_layer not in anim_layers)
+        for anim_layer in anim_layers:
+            anim_curves = [anim_curve_index.get_curve(node, "rotate" + axis, anim_layer) for axis in "XYZ"]
+            additive = (anim_layer and anim_layer != anim_curve_index.base_layer and
+                        not cmds.animLayer(anim_layer, query=True, override=True))
+            curve_sets.append((node, anim_curves, additive))
+    curves = read_anim_curves([anim_curve for node, anim_curves, additive in curve_sets
+                               for anim_curve in anim_curves if anim_curve])
+
+    for node, anim_curves, additive in curve_sets:
+        times = np.unique(np.concatenate([curves[anim_curve].times for anim_curve in anim_curves if anim_curve]))
+        columns = []
+        for axis, anim_curve in zip("XYZ", anim_curves):
+            if anim_curve:
+                columns.append(curves[anim_curve].evaluate_array(times))
+            elif additive:
+                columns.append(np.zeros(len(times)))
+            else:
+                columns.append(np.full(len(times), cmds.getAttr("{0}.rotate{1}".format(node, axis))))
+        values = np.column_stack(columns)
+        rotations = values / angle_factor
+        if additive:
+            rotations = transformMod.unwrap_rotations(rotations)
+        else:
+            rotations = transformMod.euler_filter_keyed(rotations, cmds.getAttr("{0}.rotateOrder".format(node)),
+                                                        keyed=[bool(anim_curve) for anim_curve in anim_curves])
+        filtered = rotations * angle_factor
+        for i, anim_curve in enumerate(anim_curves):
+            if anim_curve and not np.allclose(filtered[:, i], values[:, i]):
+                write_keys(anim_curve, times, filtered[:, i])
+
+
+# -----------------------------------------------------------------------------
+# World Space
+# -----------------------------------------------------------------------------
+def get_dependencies(nodes=None):
+    """
+    Function returns a dictionary of node: set of the given nodes that drive it,
+    the given nodes above it and the given nodes its constraints, or
+    constraints on its parents, follow. Built from the hierarchy index and two
+    bulk listConnections calls
+    """
+    hierarchy_index = get_hierarchy_index()
+    dependencies = dict((node, set()) for node in nodes)
+
+    # Parenting, and which given nodes are at or below each transform, by the
+    # full paths so duplicate names in a namespace don't collide
+    node_paths = dict((hierarchy_index.get_path(node) or node, node) for node in nodes)
+    below = {}
+    for path, node in node_paths.items():
+        for ancestor in get_ancestor_paths(path):
+            below.setdefault(ancestor, []).append(node)
+            if ancestor in node_paths and ancestor != path:
+                dependencies[node].add(node_paths[ancestor])
+
+    # Constraints on the nodes or anything above them
+    constraint_nodes = {}
+    connections = cmds.listConnections(list(below), type="constraint", source=True, destination=False,
+                                       connections=True, fullNodeName=True) or []
+    for plug, constraint in zip(connections[::2], connections[1::2]):
+        constrained = plug.partition(".")[0]
+        constraint = hierarchy_index.get_path(constraint) or constraint
+        constraint_nodes.setdefault(constraint, set()).add(hierarchy_index.get_path(constrained) or constrained)
+
+    if constraint_nodes:
+        connections = cmds.listConnections(list(constraint_nodes), type="transform", source=True,
+                                           destination=False, connections=True, fullNodeName=True) or []
+        for plug, target in zip(connections[::2], connections[1::2]):
+            constraint, _, attribute = plug.partition(".")
+            if not attribute.startswith("target"):
+                continue
+            drivers = [node_paths[ancestor] for ancestor in
+                       get_ancestor_paths(hierarchy_index.get_path(target) or target) if ancestor in node_paths]
+            for constrained in constraint_nodes.get(hierarchy_index.get_path(constraint) or constraint, []):
+                for node in below.get(constrained, []):
+                    dependencies[node].update(driver for driver in drivers if driver != node)
+
+    return dependencies
+
+
+def get_ancestor_paths(path):
+    """
+    Function returns the full paths of the node and its parents, top most
+    first, e.g |a, |a|b, |a|b|c for |a|b|c
+    """
+    parts = path.split("|")
+    if parts[0]:
+        return [path]
+    return ["|".join(parts[:index + 1]) for index in range(1, len(parts))]
+
+
+def get_dependency_order(nodes=None, dependencies=None):
+    """
+    Function orders the nodes so each comes after the nodes that drive it, see
+    get_dependencies. Nodes in a dependency cycle keep their given order
+    """
+    if dependencies is None:
+        dependencies = get_dependencies(nodes)
+    order = dict((node, i) for i, node in enumerate(nodes))
+
+    # Kahn's algorithm, ties keep the given order
+    dependents = dict((node, []) for node in nodes)
+    waiting = {}
+    for node, node_dependencies in dependencies.items():
+        waiting[node] = len(node_dependencies)
+        for dependency in node_dependencies:
+            dependents[dependency].append(node)
+    ready = [(order[node], node) for node in nodes if waiting[node] == 0]
+    heapq.heapify(ready)
+    ordered = []
+    while ready:
+        node = heapq.heappop(ready)[1]
+        ordered.append(node)
+        for dependent in dependents[node]:
+            waiting[dependent] = waiting[dependent] - 1
+            if waiting[dependent] == 0:
+                heapq.heappush(ready, (order[dependent], dependent))
+
+    if len(ordered) < len(nodes):
+        ordered_set = set(ordered)
+        ordered = ordered + [node for node in nodes if node not in ordered_set]
+    return ordered
+
+
+def get_dependency_levels(nodes=None):
+    """
+    Function groups the nodes in levels, every node comes in a later level than
+    the nodes that drive it so each level can be solved at once
+    """
+    dependencies = get_dependencies(nodes)
+    node_levels = {}
+    levels = []
+    for node in get_dependency_order(nodes, dependencies):
+        level = 1 + max([node_levels[dependency] for dependency in dependencies[node]
+                         if dependency in node_levels] or [-1])
+        node_levels[node] = level
+        if level == len(levels):
+            levels.append([])
+        levels[level].append(node)
+    return levels
+
+
+def get_world_matrices(nodes=None):
+    """
+    Function returns the world matrix of every node at the current time as a
+    list of 16 floats, read through the node handle cache in one pass
+    """
+    handles = get_node_handle_cache()
+    world_matrices = []
+    for node in nodes:
+        world_matrix = handles.get_world_matrix(node)
+        world_matrices.append([world_matrix[i] for i in range(16)] if world_matrix is not None else None)
+    return world_matrices
+
+
+def set_world_matrices(nodes=None, world_matrices=None):
+    """
+    Function sets the world matrix of the nodes in dependency order, so every
+    node is placed after the nodes driving it, in one undo chunk
+    """
+    node_matrices = dict(zip(nodes, world_matrices))
+    cmds.undoInfo(openChunk=True)
+    try:
+        for node in get_dependency_order(nodes):
+            if node_matrices[node] is not None:
+                cmds.xform(node, worldSpace=True, matrix=node_matrices[node])
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+
+def sample_world_matrices(nodes=None, frames=None, attribute="worldMatrix", method="auto", scheduler=None):
+    """
+    Function samples a matrix attribute of every node on every frame in one
+    sweep, see sample_plugs, or split across the workers of a BakeScheduler
+    from bakeMod. Returns a frames x nodes x 4 x 4 array
+    """
+    if scheduler is not None:
+        plug_names = ["{0}.{1}[0]".format(node, attribute) for node in nodes]
+        matrices = scheduler.sample(plug_names, list(frames), data="matrix")[1]
+        return matrices
+
+    handles = get_node_handle_cache()
+    plugs = []
+    for node in nodes:
+        plug = handles.get_plug(node, attribute)
+        if plug is None:
+            cmds.error("Can't sample {0}.{1}, it doesn't exist".format(node, attribute))
+        plugs.append(plug.elementByLogicalIndex(0))
+    matrices = sample_plugs(plugs, frames, method=method, data="matrix")
+    return matrices
+
+
+def get_transform_attributes(node=None):
+    """
+    Function reads the rotate order, rotate axis, joint orient, pivots, shear
+    and segment scale compensate of the node into a TransformAttributes from
+    transformMod. Angles are turned into radians, pivots stay in ui units
+    """
+    angle_factor = om.MAngle(1.0).asUnits(om.MAngle.uiUnit())
+    joint_orient = None
+    segment_scale_compensate = False
+    if cmds.objectType(node, isAType="joint"):
+        joint_orient = np.asarray(cmds.getAttr("{0}.jointOrient".format(node))[0]) / angle_factor
+        segment_scale_compensate = cmds.getAttr("{0}.segmentScaleCompensate".format(node))
+    attributes = transformMod.TransformAttributes(
+        rotate_order=cmds.getAttr("{0}.rotateOrder".format(node)),
+        rotate_axis=np.asarray(cmds.getAttr("{0}.rotateAxis".format(node))[0]) / angle_factor,
+        joint_orient=joint_orient,
+        rotate_pivot=cmds.getAttr("{0}.rotatePivot".format(node))[0],
+        rotate_pivot_translate=cmds.getAttr("{0}.rotatePivotTranslate".format(node))[0],
+        scale_pivot=cmds.getAttr("{0}.scalePivot".format(node))[0],
+        scale_pivot_translate=cmds.getAttr("{0}.scalePivotTranslate".format(node))[0],
+        shear=cmds.getAttr("{0}.shear".format(node))[0],
+        segment_scale_compensate=segment_scale_compensate)
+    return attributes
+
+
+def bake_world_matrices(nodes=None, world_matrices=None, frames=None, channels=("translate", "rotate", "scale")):
+    """
+    Function keys the nodes to follow a frames x nodes x 4 x 4 array of world
+    matrices over the frames. Nodes are solved a dependency level at a time:
+    their parent inverse matrices are sampled for all frames, the local values
+    solved with NumPy and written as one key array per channel. Later levels
+    sample after the keys of the levels driving them are written. Only the
+    keyable attributes of the given channels are keyed. Joints with segment
+    scale compensate have their inverseScale sampled too, shear is held at
+    the node's shear attribute
+    """
+    frames = list(frames)
+    node_columns = dict((node, i) for i, node in enumerate(nodes))
+    node_attributes = get_node_attributes(nodes=nodes, attribute_options=["keyable", "unlocked"], rebuild=True)
+    angle_factor = om.MAngle(1.0).asUnits(om.MAngle.uiUnit())
+    distance_factor = om.MDistance(1.0).asUnits(om.MDistance.uiUnit())
+
+    for level in get_dependency_levels(nodes):
+        parent_inverse_matrices = sample_world_matrices(level, frames, attribute="parentInverseMatrix")
+        for column, node in enumerate(level):
+            local_matrices = transformMod.get_local_matrices(world_matrices[:, node_columns[node]],
+                                                             parent_inverse_matrices[:, column])
+            local_matrices[:, 3, :3] *= distance_factor
+            transform_attributes = get_transform_attributes(node)
+            inverse_scales = None
+            if transform_attributes.segment_scale_compensate:
+                inverse_scale_plugs = [get_plug("{0}.inverseScale{1}".format(node, axis)) for axis in "XYZ"]
+                inverse_scales = sample_plugs(inverse_scale_plugs, frames)
+            translations, rotations, scales = transformMod.decompose_transform(local_matrices,
+                                                                               transform_attributes,
+                                                                               inverse_scales)
+            rotations = transformMod.euler_filter(rotations, transform_attributes.rotate_order)
+            channel_values = {"translate": translations,
+                              "rotate": rotations * angle_factor,
+                              "scale": scales}
+
+            plug_keys = {}
+            for channel in channels:
+                values = channel_values[channel]
+                for i, axis in enumerate("XYZ"):
+                    attribute = "{0}{1}".format(channel, axis)
+                    if attribute in node_attributes[node]:
+                        plug_keys["{0}.{1}".format(node, attribute)] = (frames, values[:, i])
+            write_plug_keys(plug_keys)
+
+
+# -----------------------------------------------------------------------------
+# Bake
+# -----------------------------------------------------------------------------
+def get_bake_frames(nodes=None, frames="keyed"):
+    """
+    Function returns the frames to bake for a frame policy, "keyed" for the
+    frames the nodes have keys on, "all" for the playback range, or the given
+    frame list or FrameSet
+    """
+    if frames == "keyed":
+        return get_keyed_frames(nodes)
+    if frames == "all":
+        return get_playback_frames()
+    return frames
+
+
+def bake(nodes=None, attributes=None, frames="keyed", delete_constraints=True, method="auto"):
+    """
+    Function bakes the attributes of the nodes, all keyable ones if none are
+    given, onto keys over the frames of the frame policy, see get_bake_frames.
+    Every plug is evaluated for every frame in one sweep before anything is
+    changed and each curve is written with one bulk call. Constraints are
+    deleted afterwards and the blend attributes they added are set to 0 so the
+    baked curves drive the attributes
+    """
+    frames = list(get_bake_frames(nodes, frames)) if nodes else []
+    if not frames:
+        cmds.warning("Nothing to bake, select the nodes to bake and the frames to bake them on")
+        return
+
+    # Plugs to bake and the blend attributes on the nodes, queried fresh as
+    # constraints add them while the tools run
+    node_attributes = get_node_attributes(nodes=nodes, attribute_options=["keyable"], rebuild=True)
+    plug_names = []
+    blend_plugs = []
+    for node in nodes:
+        blend_attributes = cmds.listAttr(node, string=BLEND_ATTRIBUTE_PATTERN) or []
+        for attribute in attributes or node_attributes[node]:
+            if attribute in blend_attributes:
+                continue
+            plug_names.append("{0}.{1}".format(node, attribute))
+        blend_plugs.extend("{0}.{1}".format(node, attribute) for attribute in blend_attributes)
+    plugs = [get_plug(plug_name) for plug_name in plug_names]
+    values = sample_plugs(plugs, frames, method=method)
+
+    if delete_constraints:
+        cmds.delete(nodes, constraints=True)
+        for blend_plug in blend_plugs:
+            cmds.setAttr(blend_plug, 0)
+
+    write_plug_keys(dict((plug_name, (frames, values[:, i])) for i, plug_name in enumerate(plug_names)))
+
+
+# -----------------------------------------------------------------------------
+# Hierarchy Index
+# -----------------------------------------------------------------------------
+class HierarchyIndex(object):
+    """
+    In memory index of the transforms in the scene. Each namespace is built with
+    one cmds.ls call and maps the full path of every node to its top node, rig
+    (top most parent in the same namespace) and the set of _CTRL nodes below
+    it, and every node name to its full paths. Namespaces are dropped by the
+    DAG change callbacks, see add_scene_callbacks
+    """
+
+    def __init__(self):
+        self.namespaces = {}
+
+    def build(self, namespaces=None):
+        """
+        Method indexes the given namespaces, or every namespace in the scene
+        """
+        if namespaces is None:
+            paths = cmds.ls(type="transform", long=True) or []
+            self.namespaces = {}
+        else:
+            paths = []
+            for namespace in namespaces:
+                pattern = "{0}:*".format(namespace) if namespace else "*"
+                paths = paths + (cmds.ls(pattern, type="transform", long=True) or [])
+            for namespace in namespaces:
+                self.namespaces[namespace] = self.new_entry()
+
+        for path in paths:
+            parts = path.split("|")[1:]
+            node = parts[-1]
+            namespace = get_namespace(node)
+            if namespaces is not None and namespace not in namespaces:
+                continue
+            entry = self.namespaces.get(namespace)
+            if entry is None:
+                entry = self.namespaces[namespace] = self.new_entry()
+
+            # Parents in the same namespace, the first one is the rig
+            ancestors = [index for index, part in enumerate(parts[:-1]) if get_namespace(part) == namespace]
+            entry["paths"].setdefault(node, []).append(path)
+            entry["top_nodes"][path] = parts[0]
+            entry["rigs"][path] = parts[ancestors[0]] if ancestors else node
+            if node.endswith(CTRL_sfx):
+                for index in ancestors:
+                    ancestor = "|" + "|".join(parts[:index + 1])
+                    entry["controls"].setdefault(ancestor, set()).add(node)
+
+    def new_entry(self):
+        """
+        Method returns an empty namespace entry
+        """
+        return {"paths": {}, "top_nodes": {}, "rigs": {}, "controls": {}}
+
+    def invalidate(self, namespace=None):
+        """
+        Method drops the given namespace, or everything, so it is rebuilt on the
+        next lookup
+        """
+        if namespace is None:
+            self.namespaces = {}
+        else:
+            self.namespaces.pop(namespace, None)
+
+    def lookup(self, node, key):
+        """
+        Method returns the indexed value of the node, rebuilding the node's
+        namespace if the node isn't in the index yet. Nodes that don't exist
+        aren't remembered, so they're found once they are created
+        """
+        path = self.get_path(node)
+        if path is None:
+            return None
+        namespace = get_namespace(path.rpartition("|")[2])
+        entry = self.namespaces.get(namespace)
+        if entry is None or path not in entry["rigs"]:
+            self.build([namespace])
+            entry = self.namespaces[namespace]
+        return entry[key].get(path)
+
+    def get_path(self, node):
+        """
+        Method returns the full path of the transform, None if it doesn't exist
+        or its name isn't unique. Names and partial paths are resolved in the
+        index, the scene is only queried for names the index doesn't have
+        """
+        if not node:
+            return None
+        name = node.rpartition("|")[2]
+        namespace = get_namespace(name)
+        if namespace not in self.namespaces:
+            self.build([namespace])
+        paths = self.namespaces[namespace]["paths"].get(name, [])
+        if "|" in node:
+            paths = [path for path in paths if path == node or path.endswith("|" + node)]
+        if not paths:
+            paths = cmds.ls(node, type="transform", long=True) or []
+        return paths[0] if len(paths) == 1 else None
+
+    def get_top_node(self, node):
+        return self.lookup(node, "top_nodes")
+
+    def get_rig(self, node):
+        return self.lookup(node, "rigs")
+
+    def get_controls(self, node):
+        """
+        Method returns the sorted _CTRL nodes below the given node
+        """
+        return sorted(self.lookup(node, "controls") or [])
+
+    def get_namespace_controls(self, namespace):
+        """
+        Method returns the sorted _CTRL nodes in the namespace
+        """
+        if namespace not in self.namespaces:
+            self.build([namespace])
+        paths = self.namespaces[namespace]["rigs"]
+        return sorted(set(path.rpartition("|")[2] for path in paths if path.endswith(CTRL_sfx)))
+
+    def get_rigs(self):
+        """
+        Method returns every rig in the scene that has controls
+        """
+        if not self.namespaces:
+            self.build()
+        else:
+            namespaces = [""] + (cmds.namespaceInfo(":", listOnlyNamespaces=True, recurse=True) or [])
+            missing = [namespace for namespace in namespaces if namespace not in self.namespaces]
+            if missing:
+                self.build(missing)
+        rigs = set()
+        for entry in self.namespaces.values():
+            for control, rig in entry["rigs"].items():
+                if control.endswith(CTRL_sfx):
+                    rigs.add(rig)
+        return sorted(rigs)
+
+
+def get_hierarchy_index():
+    """
+    Function returns the scene hierarchy index, creating it if needed
+    """
+    if not isinstance(G.hierarchy_index, HierarchyIndex):
+        G.hierarchy_index = HierarchyIndex()
+        add_scene_callbacks()
+    return G.hierarchy_index
+
+
+# -----------------------------------------------------------------------------
+# Attribute Catalogue
+# -----------------------------------------------------------------------------
+class AttributeCatalogue(object):
+    """
+    In memory catalogue of the scalar attributes of nodes and their keyable,
+    unlocked, channelBox and connectable state. Nodes are read in batches through
+    the API, the candidate attributes are worked out once per node type and the
+    results are kept per namespace. Locking, keyable changes and added
+    attributes aren't tracked by the scene callbacks, so tools rebuild it once
+    at the start of an operation, see get_attribute_catalogue
+    """
+
+    def __init__(self):
+        self.namespaces = {}
+        self.node_types = {}
+
+    def get(self, nodes, attribute_options=None):
+        """
+        Method returns a dictionary of node: tuple of attribute names that match
+        all of the given attribute options
+        """
+        mask = 0
+        for option in attribute_options or []:
+            mask |= ATTRIBUTE_OPTIONS[option]
+
+        missing = [node for node in nodes if node not in self.namespaces.get(get_namespace(node), {})]
+        if missing:
+            self.read(missing)
+
+        node_attributes = {}
+        for node in nodes:
+            attributes = self.namespaces[get_namespace(node)][node]
+            node_attributes[node] = tuple(name for name, flags in attributes if flags & mask == mask)
+        return node_attributes
+
+    def read(self, nodes):
+        """
+        Method reads the attribute flags of all the given nodes
+        """
+        selection = om.MSelectionList()
+        for node in nodes:
+            selection.add(node)
+
+        for i, node in enumerate(nodes):
+            mobject = selection.getDependNode(i)
+            depend_node = om.MFnDependencyNode(mobject)
+            static_attributes, static_names = self.get_static_attributes(depend_node.typeName)
+
+            # Dynamic attributes are the ones the node type doesn't have
+            dynamic_attributes = []
+            for index in range(depend_node.attributeCount()):
+                attribute = depend_node.attribute(index)
+                if om.MFnAttribute(attribute).name not in static_names and self.is_candidate(attribute):
+                    dynamic_attributes.append(attribute)
+
+            attributes = []
+            for attribute in static_attributes + dynamic_attributes:
+                plug = om.MPlug(mobject, attribute)
+                flags = 0
+                if plug.isKeyable:
+                    flags |= ATTRIBUTE_OPTIONS["keyable"]
+                if not plug.isLocked:
+                    flags |= ATTRIBUTE_OPTIONS["unlocked"]
+                if plug.isChannelBox:
+                    flags |= ATTRIBUTE_OPTIONS["channelBox"]
+                if om.MFnAttribute(attribute).connectable:
+                    flags |= ATTRIBUTE_OPTIONS["connectable"]
+                attributes.append((om.MFnAttribute(attribute).name, flags))
+
+            self.namespaces.setdefault(get_namespace(node), {})[node] = tuple(attributes)
+
+    def get_static_attributes(self, node_type):
+        """
+        Method returns the candidate static attributes of a node type and the
+        names of all of its static attributes, worked out once per node type
+        """
+        if node_type not in self.node_types:
+            all_attributes = om.MNodeClass(node_type).getAttributes()
+            candidates = [attribute for attribute in all_attributes if self.is_candidate(attribute)]
+            names = set(om.MFnAttribute(attribute).name for attribute in all_attributes)
+            self.node_types[node_type] = (candidates, names)
+        return self.node_types[node_type]
+
+    def is_candidate(self, attribute):
+        """
+        Method returns True if the attribute holds a single value that could be
+        keyed, the same attributes cmds.listAttr would return
+        """
+        if attribute.hasFn(om.MFn.kCompoundAttribute):
+            return False
+        if not (attribute.hasFn(om.MFn.kNumericAttribute) or
+                attribute.hasFn(om.MFn.kUnitAttribute) or
+                attribute.hasFn(om.MFn.kEnumAttribute)):
+            return False
+        fn_attribute = om.MFnAttribute(attribute)
+        if fn_attribute.array:
+            return False
+        if not fn_attribute.parent.isNull() and om.MFnAttribute(fn_attribute.parent).array:
+            return False
+        return True
+
+    def invalidate(self, namespace=None):
+        """
+        Method drops the given namespace, or everything, so it is read again on
+        the next lookup
+        """
+        if namespace is None:
+            self.namespaces = {}
+        else:
+            self.namespaces.pop(namespace, None)
+
+
+def get_attribute_catalogue(rebuild=False):
+    """
+    Function returns the attribute catalogue, creating it if needed and
+    dropping the nodes read so far if a rebuild is asked for. Tools rebuild it
+    once at the start of an operation so attribute state changes are seen
+    """
+    if not isinstance(G.attribute_catalogue, AttributeCatalogue):
+        G.attribute_catalogue = AttributeCatalogue()
+        add_scene_callbacks()
+    if rebuild:
+        G.attribute_catalogue.invalidate()
+    return G.attribute_catalogue
+
+
+# -----------------------------------------------------------------------------
+# Anim Curve Index
+# -----------------------------------------------------------------------------
+class AnimCurveIndex(object):
+    """
+    Index of every time based anim curve in the scene by node, attribute and anim
+    layer. Built with a handful of bulk listConnections calls that follow the
+    anim layer blend nodes and the pairBlends of keyed constrained attributes
+    down to the attribute each curve drives, so looking up a curve is a
+    dictionary hit. Curves on the base layer, including those feeding the
+    first blend node, are stored under the root anim layer
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.plugs = {}
+        self.base_layer = None
+        self.blend_layers = {}
+        self.blend_outputs = {}
+        self.pair_blends = set()
+        self.pair_blend_outputs = {}
+        self.built = False
+
+    def build(self):
+        """
+        Method indexes every anim curve in the scene
+        """
+        self.nodes = {}
+        self.plugs = {}
+        self.base_layer = cmds.animLayer(query=True, root=True)
+
+        # Get the anim layer of every blend node
+        self.blend_layers = {}
+        for anim_layer in cmds.ls(type="animLayer") or []:
+            for blend_node in cmds.animLayer(anim_layer, query=True, blendNodes=True) or []:
+                self.blend_layers[blend_node] = anim_layer
+
+        # Get where every blend node output goes
+        self.blend_outputs = {}
+        if self.blend_layers:
+            connections = cmds.listConnections(list(self.blend_layers), source=False, destination=True,
+                                               plugs=True, connections=True) or []
+            for source, destination in zip(connections[::2], connections[1::2]):
+                if source.partition(".")[2].startswith("output"):
+                    self.blend_outputs[source] = destination
+
+        # Get where every pairBlend output goes
+        self.pair_blend_outputs = {}
+        self.pair_blends = set(cmds.ls(type="pairBlend") or [])
+        if self.pair_blends:
+            connections = cmds.listConnections(list(self.pair_blends), source=False, destination=True,
+                                               plugs=True, connections=True) or []
+            for source, destination in zip(connections[::2], connections[1::2]):
+                if source.partition(".")[2].startswith("out"):
+                    self.pair_blend_outputs[source] = destination
+
+        # Follow every anim curve to the attribute it drives
+        anim_curves = cmds.ls(type=ANIM_CURVE_TYPES) or []
+        if anim_curves:
+            connections = cmds.listConnections(anim_curves, source=False, destination=True,
+                                               plugs=True, connections=True) or []
+            for source, destination in zip(connections[::2], connections[1::2]):
+                plug, anim_layer = self.resolve(destination)
+                if plug is None:
+                    continue
+                anim_curve = source.partition(".")[0]
+                node, _, attribute = plug.partition(".")
+                self.nodes.setdefault(node, {}).setdefault(attribute, {})[anim_layer] = anim_curve
+                self.plugs[anim_curve] = (node, attribute, anim_layer)
+
+        self.built = True
+
+    def resolve(self, destination):
+        """
+        Method follows a curve's destination plug through the blend nodes and
+        returns the driven "node.attribute" and the anim layer of the curve
+        """
+        destination = self.follow_pair_blend(destination)
+        if destination is None:
+            return None, None
+        node, _, attribute = destination.partition(".")
+        if node not in self.blend_layers:
+            return destination, self.base_layer
+
+        if attribute.startswith("inputB"):
+            anim_layer = self.blend_layers[node]
+        elif attribute.startswith("inputA"):
+            anim_layer = self.base_layer
+        else:
+            return None, None
+
+        # Blend nodes stack on each other through inputA
+        while node in self.blend_layers:
+            if not attribute.startswith(("inputA", "inputB")):
+                return None, None
+            suffix = attribute[6:]
+            destination = self.blend_outputs.get("{0}.output{1}".format(node, suffix))
+            if destination is None and suffix and "{0}.output".format(node) in self.blend_outputs:
+                destination = self.get_child_plug(self.blend_outputs["{0}.output".format(node)], suffix)
+            if destination is None:
+                return None, None
+            node, _, attribute = destination.partition(".")
+        return self.follow_pair_blend(destination), anim_layer
+
+    def get_child_plug(self, destination, axis):
+        """
+        Method returns the child plug of the axis of a compound destination,
+        e.g rotateX of rotate, or inRotateX1 of a pairBlend's inRotate1
+        """
+        node, _, attribute = destination.partition(".")
+        if node in self.pair_blends:
+            match = PAIR_BLEND_INPUT.match(attribute)
+            if match is not None and not match.group(2):
+                return "{0}.in{1}{2}{3}".format(node, match.group(1), axis, match.group(3))
+        return destination + axis
+
+    def follow_pair_blend(self, destination):
+        """
+        Method follows a plug into a pairBlend, e.g inTranslateX1, out to the
+        attribute the pairBlend drives. Other plugs are returned as they are
+        """
+        if destination is None:
+            return None
+        node, _, attribute = destination.partition(".")
+        if node not in self.pair_blends:
+            return destination
+        match = PAIR_BLEND_INPUT.match(attribute)
+        if match is None:
+            return None
+        channel, axis = match.group(1), match.group(2)
+        output = self.pair_blend_outputs.get("{0}.out{1}{2}".format(node, channel, axis))
+        if output is None and axis and "{0}.out{1}".format(node, channel) in self.pair_blend_outputs:
+            output = self.pair_blend_outputs["{0}.out{1}".format(node, channel)] + axis
+        return output
+
+    def get_curve(self, node, attribute, anim_layer=None):
+        """
+        Method returns the curve of the node's attribute on the anim layer, or
+        the base layer if no anim layer is given
+        """
+        anim_layer = anim_layer or self.base_layer
+        return self.nodes.get(node, {}).get(attribute, {}).get(anim_layer)
+
+    def get_curves(self, nodes=None, attributes=None, anim_layers=None):
+        """
+        Method returns all curves of the given nodes, attributes and anim layers,
+        any of them left as None matches all
+        """
+        anim_curves = []
+        for node in self.nodes if nodes is None else nodes:
+            node_attributes = self.nodes.get(node, {})
+            for attribute in node_attributes if attributes is None else attributes:
+                layer_curves = node_attributes.get(attribute, {})
+                for anim_layer in layer_curves if anim_layers is None else anim_layers:
+                    anim_curve = layer_curves.get(anim_layer)
+                    if anim_curve:
+                        anim_curves.append(anim_curve)
+        return anim_curves
+
+    def get_plug(self, anim_curve):
+        """
+        Method returns the (node, attribute, anim_layer) driven by the curve
+        """
+        return self.plugs.get(anim_curve)
+
+    def get_layers(self, node, attribute):
+        """
+        Method returns the anim layers the node's attribute has curves on
+        """
+        return list(self.nodes.get(node, {}).get(attribute, {}))
+
+    def invalidate(self, namespace=None):
+        """
+        Method drops the index so it is built again on the next lookup. Curves
+        connect across namespaces so the whole index is dropped
+        """
+        self.built = False
+
+
+def get_anim_curve_index(rebuild=False):
+    """
+    Function returns the anim curve index, building it if it isn't built or a
+    rebuild is asked for. Tools rebuild it once at the start of an operation
+    and then look curves up from the warm index
+    """
+    if not isinstance(G.anim_curve_index, AnimCurveIndex):
+        G.anim_curve_index = AnimCurveIndex()
+        add_scene_callbacks()
+    if rebuild or not G.anim_curve_index.built:
+        G.anim_curve_index.build()
+    return G.anim_curve_index
+
+
+# -----------------------------------------------------------------------------
+# Mirror Table
+# -----------------------------------------------------------------------------
+class MirrorTable(object):
+    """
+    Per namespace table of every control's opposite control, worked out once
+    from the rig's control list with a precompiled side pattern. Controls whose
+    opposite doesn't exist in the rig are kept as missing
+    """
+
+    def __init__(self):
+        self.namespaces = {}
+        self.opposite_sides = {}
+        for left, right in MIRROR_SIDES:
+            self.opposite_sides[left] = right
+            self.opposite_sides[right] = left
+        self.side_pattern = re.compile("|".join(re.escape(side) for side in self.opposite_sides))
+
+    def build(self, namespace):
+        """
+        Method builds the table of the namespace from its controls
+        """
+        controls = get_hierarchy_index().get_namespace_controls(namespace)
+        control_set = set(controls)
+        entry = {"opposites": {},
+                 "missing": set(),
+                 "sides": dict((side, []) for side in self.opposite_sides)}
+
+        for control in controls:
+            match = self.side_pattern.search(control)
+            if match is None:
+                entry["opposites"][control] = control
+                continue
+            side = match.group(0)
+            entry["sides"][side].append(control)
+            opposite = control[:match.start()] + self.opposite_sides[side] + control[match.end():]
+            if opposite in control_set:
+                entry["opposites"][control] = opposite
+            else:
+                entry["missing"].add(control)
+
+        self.namespaces[namespace] = entry
+        return entry
+
+    def get_entry(self, namespace):
+        entry = self.namespaces.get(namespace)
+        if entry is None:
+            entry = self.build(namespace)
+        return entry
+
+    def get_opposite(self, control):
+        """
+        Method returns the opposite of the control, the control itself if it has
+        no side and None if its opposite is missing. Nodes that aren't controls
+        get their side swapped
+        """
+        entry = self.get_entry(get_namespace(control))
+        if control in entry["opposites"]:
+            return entry["opposites"][control]
+        if control in entry["missing"]:
+            return None
+        return self.side_pattern.sub(lambda match: self.opposite_sides[match.group(0)], control, count=1)
+
+    def get_missing(self, namespace):
+        """
+        Method returns the controls of the namespace that have no opposite
+        """
+        return sorted(self.get_entry(namespace)["missing"])
+
+    def get_side_controls(self, namespace, side):
+        """
+        Method returns all controls of the namespace on the given side, e.g ":l_"
+        """
+        return list(self.get_entry(namespace)["sides"].get(side, []))
+
+    def invalidate(self, namespace=None):
+        """
+        Method drops the given namespace, or everything, so it is built again
+        on the next lookup
+        """
+        if namespace is None:
+            self.namespaces = {}
+        else:
+            self.namespaces.pop(namespace, None)
+
+
+def get_mirror_table():
+    """
+    Function returns the mirror table, creating it if needed
+    """
+    if not isinstance(G.mirror_table, MirrorTable):
+        G.mirror_table = MirrorTable()
+        add_scene_callbacks()
+    return G.mirror_table
+
+
+# -----------------------------------------------------------------------------
+# Control Mapping
+# -----------------------------------------------------------------------------
+class ControlMapping(object):
+    """
+    Per source and target namespace, the target control every source control
+    maps onto. Names are matched once from both control lists, exactly, then
+    by a prefix or suffix one name adds to the other, then by the closest
+    name on the same side. Source controls with no match are kept as missing
+    """
+
+    def __init__(self):
+        self.mappings = {}
+        sides = [side.strip(":") for pair in MIRROR_SIDES for side in pair]
+        self.side_pattern = re.compile("(?:^|_)({0})".format("|".join(re.escape(side) for side in sides)))
+
+    def build(self, source_namespace, target_namespace):
+        """
+        Method builds the mapping of the source namespace onto the target
+        namespace from their controls
+        """
+        hierarchy_index = get_hierarchy_index()
+        source_controls = hierarchy_index.get_namespace_controls(source_namespace)
+        target_names = dict((control.rpartition(":")[2], control) for control in
+                            hierarchy_index.get_namespace_controls(target_namespace))
+        entry = {"targets": {}, "sources": {}, "missing": []}
+
+        unmatched = []
+        for source_control in source_controls:
+            name = source_control.rpartition(":")[2]
+            if name in target_names:
+                self.add_pair(entry, source_control, target_names.pop(name))
+            else:
+                unmatched.append((source_control, name))
+
+        for source_control, name in unmatched:
+            target_name = self.match_affixed(name, target_names) or self.match_closest(name, target_names)
+            if target_name:
+                self.add_pair(entry, source_control, target_names.pop(target_name))
+            else:
+                entry["missing"].append(source_control)
+
+        self.mappings[(source_namespace, target_namespace)] = entry
+        return entry
+
+    def add_pair(self, entry, source_control, target_control):
+        entry["targets"][source_control] = target_control
+        entry["sources"][target_control] = source_control
+
+    def match_affixed(self, name, target_names):
+        """
+        Method returns the target name on the same side that is the name with a
+        prefix or suffix added or taken away, e.g l_arm_CTRL and v2_l_arm_CTRL,
+        the closest in length if there are several
+        """
+        base = name[:-len(CTRL_sfx)] if name.endswith(CTRL_sfx) else name
+        side = self.get_side(name)
+        candidates = []
+        for target_name in target_names:
+            if self.get_side(target_name) != side:
+                continue
+            target_base = target_name[:-len(CTRL_sfx)] if target_name.endswith(CTRL_sfx) else target_name
+            if (target_base.endswith("_" + base) or base.endswith("_" + target_base) or
+                    target_base.startswith(base + "_") or base.startswith(target_base + "_")):
+                candidates.append((abs(len(target_name) - len(name)), target_name))
+        return min(candidates)[1] if candidates else None
+
+    def match_closest(self, name, target_names):
+        """
+        Method returns the target name closest to the name on the same side, or
+        None if none is close enough
+        """
+        side = self.get_side(name)
+        candidates = [target_name for target_name in target_names if self.get_side(target_name) == side]
+        matches = difflib.get_close_matches(name, candidates, n=1, cutoff=MAPPING_CUTOFF)
+        return matches[0] if matches else None
+
+    def get_side(self, name):
+        """
+        Method returns the side prefix of the name, at its start or after a
+        prefix, e.g l_ of v2_l_arm_CTRL, or None for centre controls
+        """
+        match = self.side_pattern.search(name)
+        return match.group(1) if match else None
+
+    def get_entry(self, source_namespace, target_namespace):
+        entry = self.mappings.get((source_namespace, target_namespace))
+        if entry is None:
+            entry = self.build(source_namespace, target_namespace)
+        return entry
+
+    def get_target(self, source_namespace, target_namespace, source_control):
+        """
+        Method returns the target control of the source control, or None if it
+        is missing
+        """
+        return self.get_entry(source_namespace, target_namespace)["targets"].get(source_control)
+
+    def get_pairs(self, source_namespace, target_namespace, source_controls=None, target_controls=None):
+        """
+        Method returns the (source control, target control) pairs, in source
+        control order, limited to the given source or target controls
+        """
+        entry = self.get_entry(source_namespace, target_namespace)
+        if target_controls is not None:
+            pairs = [(entry["sources"][target], target) for target in target_controls if target in entry["sources"]]
+            if source_controls is None:
+                return pairs
+            source_controls = set(source_controls)
+            return [(source, target) for source, target in pairs if source in source_controls]
+        if source_controls is None:
+            source_controls = sorted(entry["targets"])
+        return [(source, entry["targets"][source]) for source in source_controls if source in entry["targets"]]
+
+    def get_missing(self, source_namespace, target_namespace):
+        """
+        Method returns the source controls with no target control
+        """
+        return list(self.get_entry(source_namespace, target_namespace)["missing"])
+
+    def invalidate(self, namespace=None):
+        """
+        Method drops every mapping to or from the namespace, or everything
+        """
+        if namespace is None:
+            self.mappings = {}
+        else:
+            for key in [key for key in self.mappings if namespace in key]:
+                self.mappings.pop(key)
+
+
+def get_control_mapping():
+    """
+    Function returns the control mapping, creating it if needed
+    """
+    if not isinstance(G.control_mapping, ControlMapping):
+        G.control_mapping = ControlMapping()
+        add_scene_callbacks()
+    return G.control_mapping
+
+
+# -----------------------------------------------------------------------------
+# Anim Layer Membership
+# -----------------------------------------------------------------------------
+class AnimLayerMembership(object):
+    """
+    Which anim layers every plug and node belongs to, held as an int with one
+    bit per anim layer, along with the selected and override state of each
+    layer. Filled with one query per layer and reused for a whole operation, so
+    membership checks are a dictionary hit and a bit test
+    """
+
+    def __init__(self):
+        self.anim_layers = []
+        self.base_layer = None
+        self.layer_bits = {}
+        self.selected = {}
+        self.override = {}
+        self.plugs = {}
+        self.nodes = {}
+        self.built = False
+
+    def build(self):
+        """
+        Method reads the members and state of every anim layer
+        """
+        self.anim_layers = cmds.ls(type="animLayer") or []
+        self.base_layer = cmds.animLayer(query=True, root=True)
+        self.layer_bits = {}
+        self.selected = {}
+        self.override = {}
+        self.plugs = {}
+        self.nodes = {}
+
+        for i, anim_layer in enumerate(self.anim_layers):
+            bit = 1 << i
+            self.layer_bits[anim_layer] = bit
+            self.selected[anim_layer] = bool(cmds.animLayer(anim_layer, query=True, selected=True))
+            self.override[anim_layer] = bool(cmds.animLayer(anim_layer, query=True, override=True))
+            if anim_layer == self.base_layer:
+                continue
+            for plug in cmds.animLayer(anim_layer, query=True, attribute=True) or []:
+                node = plug.partition(".")[0]
+                self.plugs[plug] = self.plugs.get(plug, 0) | bit
+                self.nodes[node] = self.nodes.get(node, 0) | bit
+
+        self.built = True
+
+    def get_mask(self, anim_layers):
+        """
+        Method returns the bits of the given anim layers
+        """
+        mask = 0
+        for anim_layer in anim_layers:
+            mask = mask | self.layer_bits.get(anim_layer, 0)
+        return mask
+
+    def get_layers(self, mask):
+        """
+        Method returns the anim layers of the bits in the mask, in scene order
+        """
+        return [anim_layer for anim_layer in self.anim_layers if mask & self.layer_bits[anim_layer]]
+
+    def get_selected_layers(self):
+        return [anim_layer for anim_layer in self.anim_layers if self.selected[anim_layer]]
+
+    def get_node_layers(self, node):
+        """
+        Method returns the anim layers the node has any attribute in
+        """
+        return self.get_layers(self.nodes.get(node, 0))
+
+    def is_node_in_layer(self, node, anim_layer):
+        """
+        Method returns if any attribute of the node is in the anim layer. Every
+        node is in the base layer
+        """
+        if anim_layer == self.base_layer:
+            return True
+        return bool(self.nodes.get(node, 0) & self.layer_bits.get(anim_layer, 0))
+
+    def is_plug_in_layer(self, plug, anim_layer):
+        """
+        Method returns if the "node.attribute" plug is in the anim layer
+        """
+        if anim_layer == self.base_layer:
+            return True
+        return bool(self.plugs.get(plug, 0) & self.layer_bits.get(anim_layer, 0))
+
+    def invalidate(self, namespace=None):
+        """
+        Method drops the membership so it is read again on the next lookup
+        """
+        self.built = False
+
+
+def get_anim_layer_membership(rebuild=False):
+    """
+    Function returns the anim layer membership, reading it if it isn't built or
+    a rebuild is asked for. Layer selection isn't tracked by the scene
+    callbacks, so tools rebuild it once at the start of an operation
+    """
+    if not isinstance(G.anim_layer_membership, AnimLayerMembership):
+        G.anim_layer_membership = AnimLayerMembership()
+        add_scene_callbacks()
+    if rebuild or not G.anim_layer_membership.built:
+        G.anim_layer_membership.build()
+    return G.anim_layer_membership
+
+
+# -----------------------------------------------------------------------------
+# Node Handle Cache
+# -----------------------------------------------------------------------------
+class NodeHandleCache(object):
+    """
+    Node names resolved once to MObjectHandles. A handle follows its node
+    through renames and reparenting, so a name is only looked up again once
+    its node is deleted. Plugs of the attributes tools touch are cached per
+    node as well
+    """
+
+    def __init__(self):
+        self.handles = {}
+        self.plugs = {}
+
+    def get_handle(self, node):
+        """
+        Method returns the valid MObjectHandle of the node, or None if it
+        doesn't exist
+        """
+        handle = self.handles.get(node)
+        if handle is not None and handle.isValid():
+            return handle
+
+        self.plugs.pop(node, None)
+        selection_list = om.MSelectionList()
+        try:
+            selection_list.add(node)
+        except RuntimeError:
+            self.handles.pop(node, None)
+            return None
+        handle = om.MObjectHandle(selection_list.getDependNode(0))
+        self.handles[node] = handle
+        return handle
+
+    def get_object(self, node):
+        handle = self.get_handle(node)
+        return handle.object() if handle else None
+
+    def get_dag_path(self, node):
+        """
+        Method returns the node's current dag path
+        """
+        node_object = self.get_object(node)
+        if node_object is None or not node_object.hasFn(om.MFn.kDagNode):
+            return None
+        return om.MDagPath.getAPathTo(node_object)
+
+    def get_name(self, node):
+        """
+        Method returns the node's current unique name, to pass to cmds after it
+        may have been renamed or reparented
+        """
+        dag_path = self.get_dag_path(node)
+        if dag_path is not None:
+            return dag_path.partialPathName()
+        node_object = self.get_object(node)
+        return om.MFnDependencyNode(node_object).name() if node_object else None
+
+    def get_plug(self, node, attribute):
+        """
+        Method returns the cached MPlug of the node's attribute, or None if it
+        doesn't exist
+        """
+        node_object = self.get_object(node)
+        if node_object is None:
+            return None
+        node_plugs = self.plugs.setdefault(node, {})
+        plug = node_plugs.get(attribute)
+        if plug is None:
+            try:
+                plug = om.MFnDependencyNode(node_object).findPlug(attribute, False)
+            except RuntimeError:
+                selection_list = om.MSelectionList()
+                try:
+                    selection_list.add("{0}.{1}".format(self.get_name(node), attribute))
+                    plug = selection_list.getPlug(0)
+                except (RuntimeError, TypeError):
+                    return None
+            node_plugs[attribute] = plug
+        return plug
+
+    def get_world_matrix(self, node):
+        """
+        Method returns the node's world matrix at the current time
+        """
+        dag_path = self.get_dag_path(node)
+        return dag_path.inclusiveMatrix() if dag_path is not None else None
+
+    def get_world_position(self, node):
+        """
+        Method returns the node's world space position at the current time, as
+        the translation of its world matrix like xform(q=True, t=True, ws=True)
+        """
+        world_matrix = self.get_world_matrix(node)
+        return [world_matrix[12], world_matrix[13], world_matrix[14]] if world_matrix is not None else None
+
+    def invalidate(self, namespace=None):
+        """
+        Method drops the handles of the given namespace, or everything
+        """
+        if namespace is None:
+            self.handles = {}
+            self.plugs = {}
+            return
+        for node in list(self.handles):
+            if get_namespace(node) == namespace:
+                self.handles.pop(node, None)
+                self.plugs.pop(node, None)
+
+
+def get_node_handle_cache():
+    """
+    Function returns the node handle cache, creating it if needed
+    """
+    if not isinstance(G.node_handle_cache, NodeHandleCache):
+        G.node_handle_cache = NodeHandleCache()
+        add_scene_callbacks()
+    return G.node_handle_cache
+
+
+# -----------------------------------------------------------------------------
+# Sample Method Cache
+# -----------------------------------------------------------------------------
+class SampleMethodCache(object):
+    """
+    The sample method measured faster per rig namespace, see get_sample_method
+    """
+
+    def __init__(self):
+        self.methods = {}
+
+    def get(self, namespace):
+        """
+        Method returns the sample method of the namespace, or None if it hasn't
+        been measured
+        """
+        return self.methods.get(namespace)
+
+    def set(self, namespace, method):
+        self.methods[namespace] = method
+
+    def invalidate(self, namespace=None):
+        """
+        Method drops the measured method of the namespace, or of every namespace
+        """
+        if namespace is None:
+            self.methods = {}
+        else:
+            self.methods.pop(namespace, None)
+
+
+def get_sample_method_cache():
+    """
+    Function returns the sample method cache, creating it if needed
+    """
+    if not isinstance(G.sample_method_cache, SampleMethodCache):
+        G.sample_method_cache = SampleMethodCache()
+        add_scene_callbacks()
+    return G.sample_method_cache
+
+
+# -----------------------------------------------------------------------------
+# Scene Caches
+# -----------------------------------------------------------------------------
+def invalidate_scene_caches(namespace=None):
+    """
+    Function invalidates the given namespace, or everything, in every scene cache
+    """
+    for cache_name in SCENE_CACHES:
+        cache = getattr(G, cache_name)
+        if cache:
+            cache.invalidate(namespace)
+
+
+def add_scene_callbacks():
+    """
+    Function registers the callbacks that keep the scene caches in step with
+    new scenes, reference edits and DAG changes. Only registered once per
+    session
+    """
+    if G.scene_callbacks:
+        return
+    G.scene_callbacks = []
+    for message in [om.MSceneMessage.kAfterNew, om.MSceneMessage.kAfterOpen]:
+        G.scene_callbacks.append(om.MSceneMessage.addCallback(message, on_scene_changed))
+    for message in [om.MSceneMessage.kAfterCreateReference,
+                    om.MSceneMessage.kAfterLoadReference,
+                    om.MSceneMessage.kAfterUnloadReference,
+                    om.MSceneMessage.kAfterRemoveReference]:
+        G.scene_callbacks.append(om.MSceneMessage.addReferenceCallback(message, on_reference_changed))
+    G.scene_callbacks.append(om.MDagMessage.addAllDagChangesCallback(on_dag_changed))
+    G.scene_callbacks.append(om.MNodeMessage.addNameChangedCallback(om.MObject(), on_name_changed))
+
+
+def on_scene_changed(*args):
+    """
+    Callback to drop every scene cache
+    """
+    invalidate_scene_caches()
+
+
+def on_dag_changed(message, child, parent, *args):
+    """
+    Callback to drop the namespace of a reparented, added or removed transform
+    from the hierarchy index
+    """
+    if G.hierarchy_index:
+        G.hierarchy_index.invalidate(get_namespace(child.partialPathName()))
+
+
+def on_name_changed(node, previous_name, *args):
+    """
+    Callback to drop the old and new namespace of a renamed node from the
+    hierarchy index
+    """
+    if G.hierarchy_index and node.hasFn(om.MFn.kTransform):
+        G.hierarchy_index.invalidate(get_namespace(previous_name))
+        G.hierarchy_index.invalidate(get_namespace(om.MFnDependencyNode(node).name()))
+
+
+def on_reference_changed(file_object, *args):
+    """
+    Callback to drop the namespace of the changed reference from the scene caches
+    """
+    try:
+        namespace = cmds.referenceQuery(file_object.resolvedFullName(), namespace=True)
+        namespace = namespace.lstrip(":")
+    except RuntimeError:
+        namespace = None
+    invalidate_scene_caches(namespace)
 
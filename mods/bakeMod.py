@@ -0,0 +1,212 @@
+"""
+Import this mod to sample long frame ranges in chunks across workers, e.g
+headless mayapy processes loaded with the same scene, and merge the chunks
+back into one array to bake in the interactive session. Nothing here imports
+Maya until a worker process runs, so scheduling is usable with LocalWorker
+anywhere
+"""
+# -----------------------------------------------------------------------------
+# Import Modules
+# -----------------------------------------------------------------------------
+# python
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# numpy
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Constants
+# -----------------------------------------------------------------------------
+# Fewest frames worth sending to a worker, shorter ranges are split less
+MIN_CHUNK_FRAMES = 25
+
+# Folder holding the ncTools package, put on the path of worker processes
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# -----------------------------------------------------------------------------
+# Chunks
+# -----------------------------------------------------------------------------
+def chunk_frames(frames, chunk_count=1, min_chunk_frames=MIN_CHUNK_FRAMES):
+    """
+    Function splits the sorted frames into at most chunk_count runs of
+    neighbouring frames of near equal length, none shorter than
+    min_chunk_frames unless there are fewer frames than that
+    """
+    frames = list(frames)
+    if not frames:
+        return []
+    chunk_count = max(1, min(chunk_count, len(frames) // max(1, min_chunk_frames)))
+    bounds = np.linspace(0, len(frames), chunk_count + 1).round().astype(int)
+    return [frames[bounds[i]:bounds[i + 1]] for i in range(chunk_count)]
+
+
+def merge_chunks(chunks, results):
+    """
+    Function joins the sampled arrays of the chunks, each frames first, into
+    the frames and values of the whole range in frame order
+    """
+    frames = np.concatenate([np.asarray(chunk, dtype=np.float64) for chunk in chunks])
+    values = np.concatenate(results, axis=0)
+    order = np.argsort(frames, kind="mergesort")
+    return frames[order], values[order]
+
+
+# -----------------------------------------------------------------------------
+# Workers
+# -----------------------------------------------------------------------------
+class LocalWorker(object):
+    """
+    Worker that samples in this process with a sampler function taking plug
+    names, frames and the data type, "double" or "matrix", e.g one wrapping
+    animMod.sample_plugs, or a stand in returning arrays without Maya
+    """
+
+    def __init__(self, sampler):
+        self.sampler = sampler
+
+    def submit(self, plug_names, frames, data="double"):
+        """
+        Method samples the chunk straight away, the job is its result
+        """
+        return self.sampler(plug_names, frames, data)
+
+    def collect(self, job):
+        return job
+
+    def cancel(self, job):
+        pass
+
+
+class MayapyWorker(object):
+    """
+    Worker that samples in a headless mayapy process. Every job opens the scene
+    file, samples the plugs in time contexts and hands the array back through
+    a .npy file, so the interactive session only waits for the results
+    """
+
+    def __init__(self, scene_path, mayapy="mayapy"):
+        self.scene_path = scene_path
+        self.mayapy = mayapy
+
+    def submit(self, plug_names, frames, data="double"):
+        """
+        Method starts a mayapy process sampling the chunk and returns the job
+        to collect
+        """
+        job_folder = tempfile.mkdtemp(prefix="ncToolsBake")
+        request_path = os.path.join(job_folder, "request.json")
+        output_path = os.path.join(job_folder, "values.npy")
+        with open(request_path, "w") as request_file:
+            json.dump({"scene": self.scene_path,
+                       "plugs": list(plug_names),
+                       "frames": [float(frame) for frame in frames],
+                       "data": data,
+                       "output": output_path}, request_file)
+
+        environment = dict(os.environ)
+        environment["PYTHONPATH"] = os.pathsep.join([PACKAGE_ROOT] + [path for path in
+                                                     [environment.get("PYTHONPATH")] if path])
+        process = subprocess.Popen([self.mayapy, os.path.splitext(os.path.abspath(__file__))[0] + ".py", request_path],
+                                   env=environment, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        return (process, job_folder, output_path)
+
+    def collect(self, job):
+        """
+        Method waits for the job's process and returns its array
+        """
+        process, job_folder, output_path = job
+        output = process.communicate()[0]
+        try:
+            if process.returncode != 0 or not os.path.exists(output_path):
+                raise RuntimeError("Bake worker failed:\n{0}".format(output))
+            return np.load(output_path)
+        finally:
+            shutil.rmtree(job_folder, ignore_errors=True)
+
+    def cancel(self, job):
+        """
+        Method stops the job's process if it's still running and deletes its
+        folder
+        """
+        process, job_folder, output_path = job
+        try:
+            if process.poll() is None:
+                process.kill()
+                process.communicate()
+        finally:
+            shutil.rmtree(job_folder, ignore_errors=True)
+
+
+def run_worker(request_path):
+    """
+    Function runs one job of a MayapyWorker inside mayapy
+    """
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    import maya.cmds as cmds
+    from ncTools.mods import animMod
+
+    with open(request_path) as request_file:
+        request = json.load(request_file)
+    cmds.file(request["scene"], open=True, force=True)
+    plugs = [animMod.get_plug(plug_name) for plug_name in request["plugs"]]
+    values = animMod.sample_plugs(plugs, request["frames"], method="context", data=request["data"])
+    np.save(request["output"], values)
+
+
+# -----------------------------------------------------------------------------
+# Bake Scheduler
+# -----------------------------------------------------------------------------
+class BakeScheduler(object):
+    """
+    Splits a frame range into one chunk per worker, samples every chunk on
+    its worker at the same time and merges the results. Folders the workers
+    read from, e.g the exported scene, are deleted by close
+    """
+
+    def __init__(self, workers, min_chunk_frames=MIN_CHUNK_FRAMES, folders=None):
+        self.workers = workers
+        self.min_chunk_frames = min_chunk_frames
+        self.folders = list(folders or [])
+
+    def sample(self, plug_names, frames, data="double"):
+        """
+        Method returns the frames and a frames x plugs array of the plugs
+        sampled on every frame, frames x plugs x 4 x 4 for matrices. If a
+        worker fails the jobs not collected yet are cancelled before the error
+        is raised
+        """
+        chunks = chunk_frames(frames, len(self.workers), self.min_chunk_frames)
+        jobs = []
+        results = []
+        try:
+            for worker, chunk in zip(self.workers, chunks):
+                jobs.append(worker.submit(plug_names, chunk, data))
+            for worker, job in zip(self.workers, jobs):
+                results.append(worker.collect(job))
+        finally:
+            for worker, job in list(zip(self.workers, jobs))[len(results):]:
+                worker.cancel(job)
+        if not results:
+            shape = (0, len(plug_names)) + ((4, 4) if data == "matrix" else ())
+            return np.zeros(0), np.zeros(shape)
+        return merge_chunks(chunks, results)
+
+    def close(self):
+        """
+        Method deletes the folders of the scheduler, call it once all samples
+        are collected
+        """
+        for folder in self.folders:
+            shutil.rmtree(folder, ignore_errors=True)
+        self.folders = []
+
+
+if __name__ == "__main__":
+    run_worker(sys.argv[1])
@@ -0,0 +1,609 @@
+"""
+Import this mod to evaluate anim curves offline. Curves are read from Maya once
+into an AnimCurve and then evaluated at any array of times with NumPy, without
+changing the current time
+"""
+# -----------------------------------------------------------------------------
+# Import Modules
+# -----------------------------------------------------------------------------
+# python
+import time
+
+# numpy
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Constants
+# -----------------------------------------------------------------------------
+# Tangent types, as named by cmds.keyTangent
+TANGENT_TYPES = ["spline", "linear", "flat", "step", "stepnext", "clamped", "plateau", "fixed", "auto"]
+SPLINE, LINEAR, FLAT, STEP, STEPNEXT, CLAMPED, PLATEAU, FIXED, AUTO = range(len(TANGENT_TYPES))
+
+# Infinity types, as named by cmds.setInfinity
+INFINITY_TYPES = ["constant", "linear", "cycle", "cycleRelative", "oscillate"]
+
+# Values closer than this count as equal when working out clamped tangents
+CLAMPED_TOLERANCE = 1e-5
+
+# Kernels smooth_values can smooth keys with
+SMOOTHING_KERNELS = ["neighbour", "gaussian", "savitzky_golay"]
+
+# Bisection steps used to find the time on weighted segments, halves the error
+# each step so 50 steps is well below float precision of a frame
+BEZIER_ITERATIONS = 50
+
+
+# -----------------------------------------------------------------------------
+# Anim Curve
+# -----------------------------------------------------------------------------
+class AnimCurve(object):
+    """
+    Keys of one anim curve in frames and ui units. Tangents are (x, y) vectors
+    per key, x in frames and y in ui units, with the slope y / x. Weighted
+    curves place their bezier control points a third of the tangent away from
+    the key, non weighted curves use only the slope
+    """
+
+    def __init__(self, times, values, in_tangents=None, out_tangents=None,
+                 in_types=None, out_types=None, weighted=False,
+                 pre_infinity="constant", post_infinity="constant"):
+        self.times = np.asarray(times, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.in_types = get_tangent_codes(in_types, len(self.times))
+        self.out_types = get_tangent_codes(out_types, len(self.times))
+        self.weighted = weighted
+        self.pre_infinity = pre_infinity
+        self.post_infinity = post_infinity
+
+        # Work out the tangents of the keys that weren't given any
+        if in_tangents is None or out_tangents is None:
+            in_slopes, out_slopes = compute_tangents(self.times, self.values, self.in_types, self.out_types)
+            in_tangents = slopes_to_tangents(self.times, in_slopes, True)
+            out_tangents = slopes_to_tangents(self.times, out_slopes, False)
+        self.in_tangents = np.asarray(in_tangents, dtype=np.float64).reshape(-1, 2)
+        self.out_tangents = np.asarray(out_tangents, dtype=np.float64).reshape(-1, 2)
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def in_slopes(self):
+        return get_slopes(self.in_tangents)
+
+    @property
+    def out_slopes(self):
+        return get_slopes(self.out_tangents)
+
+    def evaluate(self, times):
+        """
+        Method returns the value of the curve at each of the times, a float for
+        a single time and an array for an array of times
+        """
+        single = np.ndim(times) == 0
+        times = np.atleast_1d(np.asarray(times, dtype=np.float64))
+        values = self.evaluate_array(times)
+        if single:
+            return float(values[0])
+        return values
+
+    def evaluate_array(self, times):
+        """
+        Method evaluates the curve at an array of times
+        """
+        count = len(self.times)
+        if count == 0:
+            return np.zeros(len(times))
+        if count == 1:
+            return np.full(len(times), self.values[0])
+
+        first, last = self.times[0], self.times[-1]
+        values = np.empty(len(times))
+        inside = (times >= first) & (times <= last)
+        values[inside] = self.evaluate_segments(times[inside])
+
+        before = times < first
+        if before.any():
+            values[before] = self.evaluate_infinity(times[before], self.pre_infinity, True)
+        after = times > last
+        if after.any():
+            values[after] = self.evaluate_infinity(times[after], self.post_infinity, False)
+        return values
+
+    def evaluate_infinity(self, times, infinity, pre):
+        """
+        Method evaluates times outside of the keys by the infinity type
+        """
+        first, last = self.times[0], self.times[-1]
+        if infinity == "constant":
+            return np.full(len(times), self.values[0] if pre else self.values[-1])
+        if infinity == "linear":
+            if pre:
+                return self.values[0] + (times - first) * self.in_slopes[0]
+            return self.values[-1] + (times - last) * self.out_slopes[-1]
+
+        period = last - first
+        cycles = np.floor((times - first) / period)
+        local_times = times - cycles * period
+        if infinity == "oscillate":
+            odd = np.mod(cycles, 2) != 0
+            local_times = np.where(odd, last - (local_times - first), local_times)
+        values = self.evaluate_segments(np.clip(local_times, first, last))
+        if infinity == "cycleRelative":
+            values = values + cycles * (self.values[-1] - self.values[0])
+        return values
+
+    def evaluate_segments(self, times):
+        """
+        Method evaluates times that are within the keys
+        """
+        last_segment = len(self.times) - 2
+        segments = np.clip(np.searchsorted(self.times, times, side="right") - 1, 0, last_segment)
+        start_times = self.times[segments]
+        end_times = self.times[segments + 1]
+        start_values = self.values[segments]
+        end_values = self.values[segments + 1]
+        durations = end_times - start_times
+        out_tangents = self.out_tangents[segments]
+        in_tangents = self.in_tangents[segments + 1]
+
+        if self.weighted:
+            values = evaluate_bezier(times, start_times, start_values, end_values, durations,
+                                     out_tangents, in_tangents)
+        else:
+            values = evaluate_hermite(times, start_times, start_values, end_values, durations,
+                                      get_slopes(out_tangents), get_slopes(in_tangents))
+
+        # Stepped segments hold one of the key values
+        out_types = self.out_types[segments]
+        values = np.where(out_types == STEP, start_values, values)
+        values = np.where(out_types == STEPNEXT, end_values, values)
+
+        # Keys land exactly on their values
+        values = np.where(times == start_times, start_values, values)
+        values = np.where(times == end_times, end_values, values)
+        return values
+
+
+# -----------------------------------------------------------------------------
+# Interpolation
+# -----------------------------------------------------------------------------
+def evaluate_hermite(times, start_times, start_values, end_values, durations, out_slopes, in_slopes):
+    """
+    Function evaluates non weighted segments as cubic hermite curves of time
+    """
+    s = (times - start_times) / durations
+    s2 = s * s
+    s3 = s2 * s
+    h00 = 2 * s3 - 3 * s2 + 1
+    h10 = s3 - 2 * s2 + s
+    h01 = -2 * s3 + 3 * s2
+    h11 = s3 - s2
+    return (h00 * start_values + h10 * durations * out_slopes +
+            h01 * end_values + h11 * durations * in_slopes)
+
+
+def evaluate_bezier(times, start_times, start_values, end_values, durations, out_tangents, in_tangents):
+    """
+    Function evaluates weighted segments as 2D cubic bezier curves. Control
+    points are kept inside the segment in time, as Maya does, so time only
+    grows along the curve and the parameter of each time is found by bisection
+    """
+    out_x, out_y = out_tangents[:, 0] / 3.0, out_tangents[:, 1] / 3.0
+    in_x, in_y = in_tangents[:, 0] / 3.0, in_tangents[:, 1] / 3.0
+
+    # Keep the control points inside the segment, keeping their slopes
+    out_scale = np.where(out_x > durations, durations / np.where(out_x > 0, out_x, 1.0), 1.0)
+    in_scale = np.where(in_x > durations, durations / np.where(in_x > 0, in_x, 1.0), 1.0)
+    x1 = np.clip(out_x * out_scale / durations, 0.0, 1.0)
+    x2 = 1.0 - np.clip(in_x * in_scale / durations, 0.0, 1.0)
+    y1 = start_values + out_y * out_scale
+    y2 = end_values - in_y * in_scale
+
+    # Find the parameter of each time
+    x = (times - start_times) / durations
+    low = np.zeros(len(times))
+    high = np.ones(len(times))
+    for i in range(BEZIER_ITERATIONS):
+        u = (low + high) * 0.5
+        below = bezier(u, 0.0, x1, x2, 1.0) < x
+        low = np.where(below, u, low)
+        high = np.where(below, high, u)
+    u = (low + high) * 0.5
+    return bezier(u, start_values, y1, y2, end_values)
+
+
+def bezier(u, p0, p1, p2, p3):
+    """
+    Function returns the cubic bezier of the four points at parameter u
+    """
+    v = 1.0 - u
+    return v * v * v * p0 + 3 * v * v * u * p1 + 3 * v * u * u * p2 + u * u * u * p3
+
+
+# -----------------------------------------------------------------------------
+# Tangents
+# -----------------------------------------------------------------------------
+def get_tangent_codes(tangent_types, count):
+    """
+    Function turns tangent type names, or codes, into an array of codes.
+    Missing types default to auto
+    """
+    if tangent_types is None:
+        return np.full(count, AUTO, dtype=np.int8)
+    codes = [TANGENT_TYPES.index(tangent_type) if not isinstance(tangent_type, (int, np.integer)) else tangent_type
+             for tangent_type in tangent_types]
+    return np.asarray(codes, dtype=np.int8)
+
+
+def get_slopes(tangents):
+    """
+    Function returns the y / x slope of tangent vectors, vertical tangents are
+    given a very steep slope
+    """
+    x = tangents[:, 0]
+    return tangents[:, 1] / np.where(np.abs(x) > 1e-12, x, 1e-12)
+
+
+def slopes_to_tangents(times, slopes, in_tangent):
+    """
+    Function returns tangent vectors of the slopes, as long in time as a third
+    of the segment they point into so weighted curves start out matching non
+    weighted ones
+    """
+    gaps = np.diff(times)
+    if len(gaps) == 0:
+        lengths = np.ones(len(times))
+    elif in_tangent:
+        lengths = np.concatenate([gaps[:1], gaps])
+    else:
+        lengths = np.concatenate([gaps, gaps[-1:]])
+    return np.column_stack([lengths, lengths * slopes])
+
+
+def compute_tangents(times, values, in_types, out_types):
+    """
+    Function works out the in and out slopes of every key from its tangent
+    types, the way Maya sets them when keys are made or moved. Fixed tangents
+    can't be worked out and are made flat
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    count = len(times)
+    if count < 2:
+        return np.zeros(count), np.zeros(count)
+
+    # Slope of the segment before and after each key, end keys reuse their one
+    chords = np.diff(values) / np.diff(times)
+    previous_chords = np.concatenate([chords[:1], chords])
+    next_chords = np.concatenate([chords, chords[-1:]])
+
+    # Spline slope through the neighbouring keys
+    spline = np.empty(count)
+    spline[1:-1] = (values[2:] - values[:-2]) / (times[2:] - times[:-2])
+    spline[0] = chords[0]
+    spline[-1] = chords[-1]
+
+    # Clamped uses the slope towards a neighbour with nearly the same value
+    clamped = spline.copy()
+    previous_close = np.concatenate([[False], np.abs(np.diff(values)) <= CLAMPED_TOLERANCE])
+    next_close = np.concatenate([np.abs(np.diff(values)) <= CLAMPED_TOLERANCE, [False]])
+    clamped = np.where(next_close, next_chords, clamped)
+    clamped = np.where(previous_close, previous_chords, clamped)
+
+    # Plateau is flat on extremes and end keys, elsewhere the spline slope is
+    # limited so the curve can't overshoot its neighbours
+    plateau = np.where(np.sign(previous_chords) == np.sign(next_chords), spline, 0.0)
+    limit = 3.0 * np.minimum(np.abs(previous_chords), np.abs(next_chords))
+    plateau = np.sign(plateau) * np.minimum(np.abs(plateau), limit)
+    plateau[0] = 0.0
+    plateau[-1] = 0.0
+
+    slopes = {SPLINE: spline, CLAMPED: clamped, PLATEAU: plateau, AUTO: plateau}
+    zeros = np.zeros(count)
+    in_slopes = np.zeros(count)
+    out_slopes = np.zeros(count)
+    for tangent_type, tangent_slopes in slopes.items():
+        in_slopes = np.where(in_types == tangent_type, tangent_slopes, in_slopes)
+        out_slopes = np.where(out_types == tangent_type, tangent_slopes, out_slopes)
+    in_slopes = np.where(in_types == LINEAR, previous_chords, in_slopes)
+    out_slopes = np.where(out_types == LINEAR, next_chords, out_slopes)
+    for tangent_type in [FLAT, STEP, STEPNEXT, FIXED]:
+        in_slopes = np.where(in_types == tangent_type, zeros, in_slopes)
+        out_slopes = np.where(out_types == tangent_type, zeros, out_slopes)
+    return in_slopes, out_slopes
+
+
+# -----------------------------------------------------------------------------
+# Smoothing
+# -----------------------------------------------------------------------------
+def smooth_neighbour(times, values):
+    """
+    Function moves every key onto the straight line between its previous and
+    next key, at its own time so uneven spacing is kept
+    """
+    smoothed = values.copy()
+    previous_times, current_times, next_times = times[:-2], times[1:-1], times[2:]
+    previous_values, next_values = values[:-2], values[2:]
+    smoothed[1:-1] = previous_values + ((current_times - previous_times) * (next_values - previous_values) /
+                                        (next_times - previous_times))
+    return smoothed
+
+
+def smooth_gaussian(times, values, width=2, sigma=None):
+    """
+    Function averages every key with up to width keys either side, weighted by
+    a gaussian of their distance in time. Sigma defaults to half the mean key
+    spacing times the width
+    """
+    count = len(times)
+    indices = np.arange(count)[:, np.newaxis] + np.arange(-width, width + 1)
+    valid = (indices >= 0) & (indices < count)
+    indices = np.clip(indices, 0, count - 1)
+    if sigma is None:
+        sigma = max((times[-1] - times[0]) / (count - 1), 1e-6) * width * 0.5
+    offsets = times[indices] - times[:, np.newaxis]
+    weights = np.exp(-0.5 * (offsets / sigma) ** 2) * valid
+    return (weights * values[indices]).sum(axis=1) / weights.sum(axis=1)
+
+
+def smooth_savitzky_golay(times, values, width=2, order=2):
+    """
+    Function fits a polynomial of the order through the window of 2 * width + 1
+    keys around every key by least squares on their actual times, and moves
+    the key onto it. Windows at the ends are shifted to stay inside the keys
+    """
+    count = len(times)
+    window = min(2 * width + 1, count)
+    order = min(order, window - 1)
+    starts = np.clip(np.arange(count) - width, 0, count - window)
+    indices = starts[:, np.newaxis] + np.arange(window)
+
+    # Times relative to the key, scaled to the window so the fit is well posed
+    offsets = times[indices] - times[:, np.newaxis]
+    scale = np.abs(offsets).max(axis=1, keepdims=True)
+    offsets = offsets / np.where(scale == 0, 1.0, scale)
+    design = offsets[..., np.newaxis] ** np.arange(order + 1)
+    transposed = np.swapaxes(design, 1, 2)
+    coefficients = np.linalg.solve(np.matmul(transposed, design),
+                                   np.matmul(transposed, values[indices][..., np.newaxis]))
+    return coefficients[:, 0, 0]
+
+
+def smooth_values(times, values, kernel="neighbour", passes=1, width=2, sigma=None, order=2):
+    """
+    Function smooths the key values at the key times with the kernel, one of
+    SMOOTHING_KERNELS, the given number of passes. The first and last keys are
+    kept so the smoothed keys still meet the rest of the curve. Width, sigma
+    and order are used by the kernels that take them
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.array(values, dtype=np.float64)
+    if len(times) < 3:
+        return values
+    for i in range(passes):
+        if kernel == "gaussian":
+            smoothed = smooth_gaussian(times, values, width=width, sigma=sigma)
+        elif kernel == "savitzky_golay":
+            smoothed = smooth_savitzky_golay(times, values, width=width, order=order)
+        else:
+            smoothed = smooth_neighbour(times, values)
+        values[1:-1] = smoothed[1:-1]
+    return values
+
+
+# -----------------------------------------------------------------------------
+# Key Reduction
+# -----------------------------------------------------------------------------
+def get_step_signs(values, tolerance=0.0):
+    """
+    Function returns the direction, -1, 0 or 1, of every step between
+    neighbouring values, steps no bigger than the tolerance are flat
+    """
+    steps = np.diff(np.asarray(values, dtype=np.float64))
+    return np.where(np.abs(steps) <= tolerance, 0, np.sign(steps)).astype(np.int8)
+
+
+def fill_signs(signs):
+    """
+    Function returns the signs with every flat step given the last direction
+    before it, or 0 if there is none
+    """
+    indices = np.maximum.accumulate(np.where(signs != 0, np.arange(len(signs)), 0))
+    return signs[indices]
+
+
+def extreme_key_mask(values, tolerance=0.0, keep_plateaus=True):
+    """
+    Function returns a mask of the keys to keep to hold the shape of the
+    values, the first and last key and every peak and trough. Changes no
+    bigger than the tolerance count as flat. A flat peak or trough keeps both
+    its edges, as does any other hold when keep_plateaus is on, or only its
+    first key when it is off
+    """
+    values = np.asarray(values, dtype=np.float64)
+    count = len(values)
+    keep = np.ones(count, dtype=bool)
+    if count < 3:
+        return keep
+
+    signs = get_step_signs(values, tolerance)
+    incoming = fill_signs(signs)[:-1]
+    outgoing = fill_signs(signs[::-1])[::-1][1:]
+    into, out_of = signs[:-1], signs[1:]
+
+    # Peaks and troughs, every key of a flat one turns the direction around
+    extreme = incoming * outgoing < 0
+    if keep_plateaus:
+        edge = (into != 0) | (out_of != 0)
+        hold_edge = (into == 0) != (out_of == 0)
+        keep[1:-1] = (extreme & edge) | hold_edge
+    else:
+        keep[1:-1] = extreme & (into != 0)
+    return keep
+
+
+def spaced_runs(mask, spacing=2):
+    """
+    Function returns the mask with every spacing-th entry of each run of True
+    left on, starting from the first, so entries left on are at least spacing
+    apart
+    """
+    positions = np.arange(len(mask))
+    run_starts = np.maximum.accumulate(np.where(mask, -1, positions))
+    return mask & ((positions - run_starts) % spacing == 1)
+
+
+def get_kept_tangents(anim_curve, kept):
+    """
+    Function returns the in and out tangents the kept keys of an AnimCurve
+    have once the others are deleted. Keys that keep both neighbours keep
+    their tangents, the others have them worked out again from their type as
+    Maya does, apart from fixed tangents which don't change
+    """
+    times, values = anim_curve.times[kept], anim_curve.values[kept]
+    in_types, out_types = anim_curve.in_types[kept], anim_curve.out_types[kept]
+    in_slopes, out_slopes = compute_tangents(times, values, in_types, out_types)
+    in_tangents = slopes_to_tangents(times, in_slopes, True)
+    out_tangents = slopes_to_tangents(times, out_slopes, False)
+
+    gaps = np.diff(kept)
+    moved = np.concatenate([[False], gaps > 1]) | np.concatenate([gaps > 1, [False]])
+    keep_in = (~moved | (in_types == FIXED))[:, np.newaxis]
+    keep_out = (~moved | (out_types == FIXED))[:, np.newaxis]
+    in_tangents = np.where(keep_in, anim_curve.in_tangents[kept], in_tangents)
+    out_tangents = np.where(keep_out, anim_curve.out_tangents[kept], out_tangents)
+    return in_tangents, out_tangents
+
+
+def redundant_key_mask(anim_curve, value_tolerance=1e-4, tangent_tolerance=1e-3):
+    """
+    Function returns a mask of the keys of an AnimCurve that can be deleted
+    because the curve without them still passes within the value tolerance of
+    the original at every key and segment middle, with the tangents of their
+    neighbours worked out again, see get_kept_tangents. Only keys whose in and
+    out slopes agree within the tangent tolerance are deleted and the first
+    and last keys are always kept. Deleting a key changes its neighbours'
+    tangents and the segments either side of them, so each pass tries every
+    fourth key of a run of candidates, whose changes can't overlap, and keeps
+    the ones the whole curve allows. Keys a pass keeps aren't tried again
+    """
+    count = len(anim_curve)
+    redundant = np.zeros(count, dtype=bool)
+    if count < 3:
+        return redundant
+
+    times = anim_curve.times
+    check_times = np.concatenate([times, (times[:-1] + times[1:]) * 0.5])
+    original_values = anim_curve.evaluate_array(check_times)
+    candidates = np.abs(anim_curve.in_slopes - anim_curve.out_slopes) <= tangent_tolerance
+    candidates[[0, -1]] = False
+    while True:
+        kept = np.flatnonzero(~redundant)
+        tried = spaced_runs(candidates[kept], 4)
+        if not tried.any():
+            break
+
+        # The curve without every tried key
+        trial = kept[~tried]
+        in_tangents, out_tangents = get_kept_tangents(anim_curve, trial)
+        trial_curve = AnimCurve(times[trial], anim_curve.values[trial], in_tangents, out_tangents,
+                                anim_curve.in_types[trial], anim_curve.out_types[trial], anim_curve.weighted)
+        errors = np.abs(trial_curve.evaluate_array(check_times) - original_values)
+
+        # Worst error of every trial segment, a tried key is deleted if the
+        # segments from two keys before it to two keys after it are in
+        segments = np.clip(np.searchsorted(times[trial], check_times, side="right") - 1, 0, len(trial) - 2)
+        segment_errors = np.zeros(len(trial) - 1)
+        np.maximum.at(segment_errors, segments, errors)
+        padded_errors = np.concatenate([[0.0], segment_errors, [0.0]])
+        previous = np.searchsorted(trial, kept[tried]) - 1
+        span_errors = np.maximum(np.maximum(padded_errors[previous], padded_errors[previous + 1]),
+                                 padded_errors[previous + 2])
+        deleted = span_errors <= value_tolerance
+        redundant[kept[tried][deleted]] = True
+        candidates[kept[tried]] = False
+    return redundant
+
+
+def is_static(anim_curve, value_tolerance=1e-4, tangent_tolerance=1e-3):
+    """
+    Function returns if the AnimCurve holds one value, all its keys within the
+    value tolerance and all its tangents flat within the tangent tolerance
+    """
+    if len(anim_curve) == 0:
+        return True
+    return (np.ptp(anim_curve.values) <= value_tolerance and
+            np.abs(anim_curve.in_slopes).max() <= tangent_tolerance and
+            np.abs(anim_curve.out_slopes).max() <= tangent_tolerance)
+
+
+def reduce_key_mask(times, values, max_error=0.01, tangent_type="spline"):
+    """
+    Function returns a mask of as few keys as needed for their curve, with
+    tangents of the tangent type worked out from the kept keys, to stay within
+    the max error of the values at every time. Starting from the first and
+    last key, every pass splits each segment that is still out at its middle
+    key. Splitting in the middle needs fewer keys than keeping the furthest
+    off key, which bunches keys up where the error peaks
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    count = len(times)
+    keep = np.zeros(count, dtype=bool)
+    keep[[0, -1]] = True
+    if count < 3:
+        keep[:] = True
+        return keep
+
+    while True:
+        kept = np.flatnonzero(keep)
+        tangent_types = [tangent_type] * len(kept)
+        fitted = AnimCurve(times[kept], values[kept], in_types=tangent_types, out_types=tangent_types)
+        errors = np.abs(fitted.evaluate_array(times) - values)
+        if errors.max() <= max_error:
+            return keep
+
+        # Split every segment that is still out
+        out = np.flatnonzero(np.maximum.reduceat(errors, kept[:-1]) > max_error)
+        keep[(kept[out] + kept[out + 1]) // 2] = True
+
+
+def benchmark_reduction(curve_count=300, frame_count=1000, max_error=0.01, seed=0):
+    """
+    Function reduces made up baked curves, smooth motion with noise as from a
+    bake or mocap, and returns a dictionary of the curve count, key count
+    before and after, reduction and seconds taken
+    """
+    random = np.random.RandomState(seed)
+    times = np.arange(frame_count, dtype=np.float64)
+    curves = []
+    for i in range(curve_count):
+        phases = random.uniform(0, 2 * np.pi, 3)
+        speeds = random.uniform(0.005, 0.05, 3)
+        amplitudes = random.uniform(0.5, 5.0, 3)
+        values = (amplitudes[:, np.newaxis] * np.sin(speeds[:, np.newaxis] * times + phases[:, np.newaxis])).sum(axis=0)
+        curves.append(values + random.normal(0, max_error * 0.1, frame_count))
+
+    start = time.time()
+    key_counts = [int(reduce_key_mask(times, values, max_error).sum()) for values in curves]
+    duration = time.time() - start
+
+    result = {"curves": curve_count,
+              "keys_before": curve_count * frame_count,
+              "keys_after": sum(key_counts),
+              "seconds": duration}
+    result["reduction"] = 1.0 - float(result["keys_after"]) / result["keys_before"]
+    return result
+
+
+# -----------------------------------------------------------------------------
+# Evaluate things
+# -----------------------------------------------------------------------------
+def evaluate_curves(anim_curves, times):
+    """
+    Function evaluates a dictionary of name: AnimCurve at the times and returns
+    a dictionary of name: values
+    """
+    times = np.asarray(times, dtype=np.float64)
+    curve_values = dict((name, anim_curve.evaluate(times)) for name, anim_curve in anim_curves.items())
+    return curve_values
@@ -0,0 +1,271 @@
+"""
+Import this mod to use FrameSet, a compact sorted set of frames that tools pass
+around instead of lists of frames
+"""
+# -----------------------------------------------------------------------------
+# Import Modules
+# -----------------------------------------------------------------------------
+# python
+import bisect
+import heapq
+import math
+
+# -----------------------------------------------------------------------------
+# Constants
+# -----------------------------------------------------------------------------
+# Decimal places frames are rounded to, so 10.5 and 10.5000000001 are one frame
+FRAME_PRECISION = 6
+
+
+# -----------------------------------------------------------------------------
+# Frame Set
+# -----------------------------------------------------------------------------
+class FrameSet(object):
+    """
+    Sorted set of frames stored as runs of whole frame steps. Frames are grouped
+    by their subframe offset, so 10, 11, 12 is one run and 10.5, 11.5 is another,
+    and a range of any length is held as a single (start, end) pair
+    """
+
+    def __init__(self, runs=None):
+        self.runs = runs or {}
+        self._counts = None
+
+    # -------------------------------------------------------------------------
+    # Constructors
+    # -------------------------------------------------------------------------
+    @classmethod
+    def from_range(cls, start, end):
+        """
+        Method returns the frames from start to end, both included
+        """
+        start = round_frame(start)
+        end = round_frame(end)
+        if end < start:
+            return cls()
+        end = start + math.floor(round_frame(end - start))
+        return cls({get_subframe(start): [(start, end)]})
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        Method returns a frame set of any iterable of frames, e.g the keyed times
+        returned by cmds.keyframe
+        """
+        runs = {}
+        for frame in sorted(set(round_frame(frame) for frame in frames)):
+            subframe_runs = runs.setdefault(get_subframe(frame), [])
+            if subframe_runs and round_frame(frame - subframe_runs[-1][1]) <= 1:
+                subframe_runs[-1] = (subframe_runs[-1][0], frame)
+            else:
+                subframe_runs.append((frame, frame))
+        return cls(runs)
+
+    # -------------------------------------------------------------------------
+    # Set operations
+    # -------------------------------------------------------------------------
+    def union(self, other):
+        """
+        Method returns the frames in either frame set
+        """
+        runs = {}
+        for subframe in set(self.runs) | set(other.runs):
+            runs[subframe] = merge_runs(self.runs.get(subframe, []) + other.runs.get(subframe, []))
+        return FrameSet(runs)
+
+    def intersection(self, other):
+        """
+        Method returns the frames in both frame sets
+        """
+        runs = {}
+        for subframe in set(self.runs) & set(other.runs):
+            subframe_runs = intersect_runs(self.runs[subframe], other.runs[subframe])
+            if subframe_runs:
+                runs[subframe] = subframe_runs
+        return FrameSet(runs)
+
+    def difference(self, other):
+        """
+        Method returns the frames in this frame set that aren't in the other
+        """
+        runs = {}
+        for subframe, subframe_runs in self.runs.items():
+            subframe_runs = subtract_runs(subframe_runs, other.runs.get(subframe, []))
+            if subframe_runs:
+                runs[subframe] = subframe_runs
+        return FrameSet(runs)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+    def __contains__(self, frame):
+        frame = round_frame(frame)
+        subframe_runs = self.runs.get(get_subframe(frame))
+        if not subframe_runs:
+            return False
+        index = bisect.bisect_right(subframe_runs, (frame, float("inf"))) - 1
+        return index >= 0 and subframe_runs[index][0] <= frame <= subframe_runs[index][1]
+
+    def __iter__(self):
+        iterators = [iterate_runs(subframe_runs) for subframe_runs in self.runs.values()]
+        if len(iterators) == 1:
+            return iterators[0]
+        return heapq.merge(*iterators)
+
+    def __len__(self):
+        return sum(run_length(run) for subframe_runs in self.runs.values() for run in subframe_runs)
+
+    def __bool__(self):
+        return bool(self.runs)
+
+    __nonzero__ = __bool__
+
+    def __getitem__(self, index):
+        """
+        Method returns the frame at the index in sorted order, e.g frames[0] and
+        frames[-1] for the first and last frame
+        """
+        if index < 0:
+            index = index + len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("FrameSet index out of range")
+        if len(self.runs) != 1:
+            for i, frame in enumerate(self):
+                if i == index:
+                    return frame
+
+        # Single subframe offset, find the run through the cumulative counts
+        subframe_runs = list(self.runs.values())[0]
+        if self._counts is None:
+            self._counts = []
+            count = 0
+            for run in subframe_runs:
+                count = count + run_length(run)
+                self._counts.append(count)
+        run_index = bisect.bisect_right(self._counts, index)
+        run_start = self._counts[run_index - 1] if run_index else 0
+        return round_frame(subframe_runs[run_index][0] + index - run_start)
+
+    def __eq__(self, other):
+        return isinstance(other, FrameSet) and self.runs == other.runs
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "FrameSet({0})".format(", ".join("{0}-{1}".format(*run) for run in self.ranges()))
+
+    @property
+    def first(self):
+        return min(subframe_runs[0][0] for subframe_runs in self.runs.values()) if self.runs else None
+
+    @property
+    def last(self):
+        return max(subframe_runs[-1][1] for subframe_runs in self.runs.values()) if self.runs else None
+
+    def ranges(self):
+        """
+        Method returns the sorted (start, end) runs, the form Maya's time flags
+        take. A run only holds frames of one subframe offset but as a Maya time
+        range it includes any subframe keys inside it
+        """
+        return sorted(run for subframe_runs in self.runs.values() for run in subframe_runs)
+
+    def to_list(self):
+        """
+        Method returns all the frames as a list
+        """
+        return list(self)
+
+
+# -----------------------------------------------------------------------------
+# Run helpers
+# -----------------------------------------------------------------------------
+def round_frame(frame):
+    """
+    Function rounds a frame to the frame precision, whole frames become floats
+    so 10 and 10.0 are the same frame
+    """
+    return round(float(frame), FRAME_PRECISION)
+
+
+def get_subframe(frame):
+    """
+    Function returns the subframe offset of a frame, 0.0 for whole frames
+    """
+    subframe = round_frame(frame - math.floor(frame))
+    if subframe >= 1.0:
+        subframe = 0.0
+    return subframe
+
+
+def run_length(run):
+    """
+    Function returns the number of frames in a run
+    """
+    return int(round(run[1] - run[0])) + 1
+
+
+def iterate_runs(runs):
+    """
+    Function yields every frame in the sorted runs
+    """
+    for start, end in runs:
+        for i in range(run_length((start, end))):
+            yield round_frame(start + i)
+
+
+def merge_runs(runs):
+    """
+    Function sorts runs and joins the ones that overlap or touch
+    """
+    merged = []
+    for start, end in sorted(runs):
+        if merged and round_frame(start - merged[-1][1]) <= 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def intersect_runs(runs, other_runs):
+    """
+    Function returns the overlap of two sorted run lists
+    """
+    intersected = []
+    i = j = 0
+    while i < len(runs) and j < len(other_runs):
+        start = max(runs[i][0], other_runs[j][0])
+        end = min(runs[i][1], other_runs[j][1])
+        if start <= end:
+            intersected.append((start, end))
+        if runs[i][1] < other_runs[j][1]:
+            i = i + 1
+        else:
+            j = j + 1
+    return intersected
+
+
+def subtract_runs(runs, other_runs):
+    """
+    Function returns the parts of the sorted runs not covered by the other runs
+    """
+    subtracted = []
+    j = 0
+    for start, end in runs:
+        while j < len(other_runs) and other_runs[j][1] < start:
+            j = j + 1
+        k = j
+        while k < len(other_runs) and other_runs[k][0] <= end:
+            if other_runs[k][0] > start:
+                subtracted.append((start, round_frame(other_runs[k][0] - 1)))
+            start = round_frame(max(start, other_runs[k][1] + 1))
+            k = k + 1
+        if start <= end:
+            subtracted.append((start, end))
+    return subtracted
@@ -0,0 +1,115 @@
+"""
+Import this mod to use AnimationSnapshot, the columnar store of stored animation
+that copy and paste tools read from
+"""
+# -----------------------------------------------------------------------------
+# Import Modules
+# -----------------------------------------------------------------------------
+# python
+try:
+    intern
+except NameError:
+    from sys import intern
+
+# numpy
+import numpy as np
+
+
+# -----------------------------------------------------------------------------
+# Animation Snapshot
+# -----------------------------------------------------------------------------
+class AnimationSnapshot(object):
+    """
+    Values of a set of channels over a set of frames, held as one float64
+    frames x channels array. Channels are interned "control.attribute" names
+    mapped to their column. Slicing frames and picking channels share the array
+    of the snapshot they came from, so neither copies any values
+    """
+
+    def __init__(self, frames, channels, values, channel_index=None):
+        self.frames = np.asarray(frames, dtype=np.float64)
+        self.channels = tuple(intern(str(channel)) for channel in channels)
+        self.values = values
+        if channel_index is None:
+            channel_index = dict((channel, column) for column, channel in enumerate(self.channels))
+        self.channel_index = channel_index
+
+    @classmethod
+    def empty(cls, frames, channels):
+        """
+        Method returns a snapshot of the frames and channels with its values
+        left to be filled in
+        """
+        return cls(frames, channels, np.zeros((len(frames), len(channels)), dtype=np.float64))
+
+    # -------------------------------------------------------------------------
+    # Views
+    # -------------------------------------------------------------------------
+    def slice_frames(self, start=None, end=None):
+        """
+        Method returns a snapshot of the frames from start to end, both included
+        """
+        first = 0 if start is None else int(np.searchsorted(self.frames, start, side="left"))
+        last = len(self.frames) if end is None else int(np.searchsorted(self.frames, end, side="right"))
+        return AnimationSnapshot(self.frames[first:last], self.channels, self.values[first:last],
+                                 channel_index=self.channel_index)
+
+    def select_channels(self, channels):
+        """
+        Method returns a snapshot of the given channels, channels the snapshot
+        doesn't hold are left out
+        """
+        channels = [channel for channel in channels if channel in self.channel_index]
+        channel_index = dict((channel, self.channel_index[channel]) for channel in channels)
+        return AnimationSnapshot(self.frames, channels, self.values, channel_index=channel_index)
+
+    # -------------------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------------------
+    def __contains__(self, channel):
+        return channel in self.channel_index
+
+    def __len__(self):
+        return len(self.frames)
+
+    def get_row(self, frame):
+        """
+        Method returns the row of the frame, or None if the frame isn't stored
+        """
+        row = int(np.searchsorted(self.frames, frame))
+        if row < len(self.frames) and abs(self.frames[row] - frame) < 1e-6:
+            return row
+        return None
+
+    def get_value(self, frame, channel):
+        """
+        Method returns the value of the channel at the frame
+        """
+        row = self.get_row(frame)
+        if row is None:
+            raise KeyError(frame)
+        return float(self.values[row, self.channel_index[channel]])
+
+    def get_channel(self, channel):
+        """
+        Method returns the values of the channel over all frames, a view into
+        the snapshot
+        """
+        return self.values[:, self.channel_index[channel]]
+
+    def get_pose(self, frame):
+        """
+        Method returns a dictionary of channel: value at the frame
+        """
+        row = self.get_row(frame)
+        if row is None:
+            raise KeyError(frame)
+        frame_values = self.values[row]
+        return dict((channel, float(frame_values[self.channel_index[channel]])) for channel in self.channels)
+
+    def to_array(self):
+        """
+        Method returns a frames x channels array in the order of the channels
+        """
+        columns = [self.channel_index[channel] for channel in self.channels]
+        return self.values[:, columns]
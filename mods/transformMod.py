@@ -0,0 +1,344 @@
+"""
+Import this mod to solve transforms with NumPy. Matrices follow Maya's row
+vector convention, a point p is moved by p * M and a child's world matrix is
+its local matrix * its parent's world matrix. Functions work on stacks of
+matrices, e.g frames x 4 x 4, so a whole frame range is solved at once
+"""
+# -----------------------------------------------------------------------------
+# Import Modules
+# -----------------------------------------------------------------------------
+# numpy
+import numpy as np
+
+# -----------------------------------------------------------------------------
+# Constants
+# -----------------------------------------------------------------------------
+# Rotate orders in the order of the rotateOrder enum, first axis applied first
+ROTATE_ORDERS = ["xyz", "yzx", "zxy", "xzy", "yxz", "zyx"]
+
+# Below this the middle rotation is treated as gimbal locked
+GIMBAL_TOLERANCE = 1e-9
+
+
+# -----------------------------------------------------------------------------
+# Rotation
+# -----------------------------------------------------------------------------
+def get_rotate_order(rotate_order):
+    """
+    Function returns the rotate order name of a rotateOrder enum value or name
+    """
+    if isinstance(rotate_order, (int, np.integer)):
+        return ROTATE_ORDERS[int(rotate_order)]
+    return rotate_order
+
+
+def get_axes(rotate_order):
+    """
+    Function returns the axis indices of the rotate order and if they are an
+    odd permutation of x, y, z
+    """
+    axes = ["xyz".index(axis) for axis in get_rotate_order(rotate_order)]
+    odd = get_rotate_order(rotate_order) not in ["xyz", "yzx", "zxy"]
+    return axes, odd
+
+
+def axis_rotation(angles, axis):
+    """
+    Function returns a stack of 3x3 matrices rotating by the angles, in
+    radians, around the axis index
+    """
+    angles = np.asarray(angles, dtype=np.float64)
+    c = np.cos(angles)
+    s = np.sin(angles)
+    matrices = np.zeros(angles.shape + (3, 3))
+    j, k = [(1, 2), (2, 0), (0, 1)][axis]
+    matrices[..., axis, axis] = 1.0
+    matrices[..., j, j] = c
+    matrices[..., j, k] = s
+    matrices[..., k, j] = -s
+    matrices[..., k, k] = c
+    return matrices
+
+
+def compose_rotation(rotations, rotate_order="xyz"):
+    """
+    Function returns a stack of 3x3 matrices of euler rotations, ... x 3 in
+    radians, applied in the rotate order
+    """
+    rotations = np.asarray(rotations, dtype=np.float64)
+    axes, odd = get_axes(rotate_order)
+    matrices = axis_rotation(rotations[..., axes[0]], axes[0])
+    for axis in axes[1:]:
+        matrices = np.matmul(matrices, axis_rotation(rotations[..., axis], axis))
+    return matrices
+
+
+def decompose_rotation(matrices, rotate_order="xyz"):
+    """
+    Function returns the euler rotations, ... x 3 in radians, of a stack of
+    3x3 rotation matrices in the rotate order. The matrix is relabelled so any
+    order is solved as xyz, odd orders flip the handedness and so the angles
+    """
+    matrices = np.asarray(matrices, dtype=np.float64)
+    axes, odd = get_axes(rotate_order)
+    permuted = matrices[..., axes, :][..., :, axes]
+
+    cos_b = np.sqrt(permuted[..., 0, 0] ** 2 + permuted[..., 0, 1] ** 2)
+    locked = cos_b < GIMBAL_TOLERANCE
+    a = np.where(locked,
+                 np.arctan2(-permuted[..., 2, 1], permuted[..., 1, 1]),
+                 np.arctan2(permuted[..., 1, 2], permuted[..., 2, 2]))
+    b = np.arctan2(-permuted[..., 0, 2], cos_b)
+    c = np.where(locked, 0.0, np.arctan2(permuted[..., 0, 1], permuted[..., 0, 0]))
+    if odd:
+        a, b, c = -a, -b, -c
+
+    rotations = np.empty(matrices.shape[:-2] + (3,))
+    rotations[..., axes[0]] = a
+    rotations[..., axes[1]] = b
+    rotations[..., axes[2]] = c
+    return rotations
+
+
+def unwrap_rotations(rotations):
+    """
+    Function removes 360 degree jumps, in radians, between consecutive frames
+    of a frames x ... x 3 stack of rotations
+    """
+    return np.unwrap(np.asarray(rotations, dtype=np.float64), axis=0)
+
+
+def get_flipped_rotations(rotations, rotate_order="xyz"):
+    """
+    Function returns the other euler rotations, ... x 3 in radians, that give
+    the same orientation in the rotate order, the first and last axes turned
+    half way round and the middle axis mirrored around a half turn
+    """
+    axes, odd = get_axes(rotate_order)
+    flipped = np.array(rotations, dtype=np.float64)
+    flipped[..., axes[0]] += np.pi
+    flipped[..., axes[1]] = np.pi - flipped[..., axes[1]]
+    flipped[..., axes[2]] += np.pi
+    return flipped
+
+
+def euler_filter(rotations, rotate_order="xyz"):
+    """
+    Function returns a frames x ... x 3 stack of euler rotations in radians
+    with every frame turned into the equivalent rotation, flipped or whole
+    turns added, closest to the frame before. The first frame is kept as is
+    """
+    rotations = np.asarray(rotations, dtype=np.float64)
+    filtered = rotations.copy()
+    flipped = get_flipped_rotations(rotations, rotate_order)
+    for frame in range(1, len(rotations)):
+        previous = filtered[frame - 1]
+        candidates = np.stack([rotations[frame], flipped[frame]])
+        candidates = candidates + 2 * np.pi * np.round((previous - candidates) / (2 * np.pi))
+        distances = np.abs(candidates - previous).sum(axis=-1)
+        filtered[frame] = np.where((distances[1] < distances[0])[..., np.newaxis], candidates[1], candidates[0])
+    return filtered
+
+
+def euler_filter_keyed(rotations, rotate_order="xyz", keyed=(True, True, True)):
+    """
+    Function euler filters a frames x 3 stack of rotations in radians where
+    only the keyed axes can change, e.g a control with a locked or unkeyed
+    rotate axis held at its value. If the filtered rotations would change an
+    axis that isn't keyed only whole turns are taken out
+    """
+    rotations = np.asarray(rotations, dtype=np.float64)
+    filtered = euler_filter(rotations, rotate_order)
+    unkeyed = ~np.asarray(keyed, dtype=bool)
+    if not np.allclose(filtered[:, unkeyed], rotations[:, unkeyed]):
+        filtered = unwrap_rotations(rotations)
+    return filtered
+
+
+# -----------------------------------------------------------------------------
+# Matrices
+# -----------------------------------------------------------------------------
+def to_matrices(values):
+    """
+    Function turns flat lists of 16 floats, as xform and MMatrix give, into a
+    stack of 4x4 matrices
+    """
+    values = np.asarray(values, dtype=np.float64)
+    return values.reshape(values.shape[:-1] + (4, 4))
+
+
+def get_local_matrices(world_matrices, parent_inverse_matrices):
+    """
+    Function returns the local matrices that place nodes at the world matrices
+    under parents with the given parent inverse matrices
+    """
+    return np.matmul(world_matrices, parent_inverse_matrices)
+
+
+def translation_matrices(translations):
+    """
+    Function returns a stack of 4x4 matrices that translate by the vectors
+    """
+    translations = np.asarray(translations, dtype=np.float64)
+    matrices = np.zeros(translations.shape[:-1] + (4, 4))
+    matrices[..., 0, 0] = matrices[..., 1, 1] = matrices[..., 2, 2] = matrices[..., 3, 3] = 1.0
+    matrices[..., 3, :3] = translations
+    return matrices
+
+
+def invert_matrices(matrices):
+    """
+    Function returns the inverse of every matrix in the stack
+    """
+    return np.linalg.inv(np.asarray(matrices, dtype=np.float64))
+
+
+# -----------------------------------------------------------------------------
+# Transforms
+# -----------------------------------------------------------------------------
+class TransformAttributes(object):
+    """
+    The attributes of a transform or joint that stay the same over time and
+    shape its local matrix around the animated translate, rotate and scale.
+    Angles are in radians, pivots in the same units as the translations and
+    shear is the xy, xz, yz shear attribute. Maya builds the local matrix of a
+    transform as
+
+        Sp^-1 * S * Sh * Sp * St * Rp^-1 * Ra * R * Rp * Rt * T
+
+    and of a joint as S * Sh * Ra * R * Jo * Is * T, where Is undoes the
+    parent's scale when segment scale compensate is on. So with zero pivots,
+    and no joint orient or Is on transforms, both are
+
+        Sp^-1 * S * Sh * Sp * St * Rp^-1 * Ra * R * Jo * Is * Rp * Rt * T
+
+    Is changes over time with the parent's scale, so it is passed to
+    compose_transform and decompose_transform as the joint's inverseScale
+    values rather than kept here
+    """
+
+    def __init__(self, rotate_order="xyz", rotate_axis=None, joint_orient=None,
+                 rotate_pivot=None, rotate_pivot_translate=None,
+                 scale_pivot=None, scale_pivot_translate=None,
+                 shear=None, segment_scale_compensate=False):
+        self.rotate_order = get_rotate_order(rotate_order)
+        self.rotate_axis = np.zeros(3) if rotate_axis is None else np.asarray(rotate_axis, dtype=np.float64)
+        self.joint_orient = np.zeros(3) if joint_orient is None else np.asarray(joint_orient, dtype=np.float64)
+        self.rotate_pivot = np.zeros(3) if rotate_pivot is None else np.asarray(rotate_pivot, dtype=np.float64)
+        self.rotate_pivot_translate = (np.zeros(3) if rotate_pivot_translate is None
+                                       else np.asarray(rotate_pivot_translate, dtype=np.float64))
+        self.scale_pivot = np.zeros(3) if scale_pivot is None else np.asarray(scale_pivot, dtype=np.float64)
+        self.scale_pivot_translate = (np.zeros(3) if scale_pivot_translate is None
+                                      else np.asarray(scale_pivot_translate, dtype=np.float64))
+        self.shear = np.zeros(3) if shear is None else np.asarray(shear, dtype=np.float64)
+        self.segment_scale_compensate = segment_scale_compensate
+
+    def get_rotate_axis_matrix(self):
+        return compose_rotation(self.rotate_axis, "xyz")
+
+    def get_joint_orient_matrix(self):
+        return compose_rotation(self.joint_orient, "xyz")
+
+    def get_shear_matrix(self):
+        matrix = np.identity(4)
+        matrix[1, 0], matrix[2, 0], matrix[2, 1] = self.shear
+        return matrix
+
+
+def compose_transform(translations, rotations, scales=None, attributes=None, inverse_scales=None):
+    """
+    Function returns the local matrices, ... x 4 x 4, of translate, rotate in
+    radians and scale values of a node with the given TransformAttributes.
+    Joints with segment scale compensate are given the inverseScale values of
+    each matrix, ... x 3
+    """
+    attributes = attributes or TransformAttributes()
+    translations = np.asarray(translations, dtype=np.float64)
+    rotations = np.asarray(rotations, dtype=np.float64)
+    if scales is None:
+        scales = np.ones(translations.shape)
+    scales = np.asarray(scales, dtype=np.float64)
+
+    # Scale around the scale pivot
+    matrices = translation_matrices(-attributes.scale_pivot)
+    scale_matrices = np.zeros(scales.shape[:-1] + (4, 4))
+    scale_matrices[..., 0, 0] = scales[..., 0]
+    scale_matrices[..., 1, 1] = scales[..., 1]
+    scale_matrices[..., 2, 2] = scales[..., 2]
+    scale_matrices[..., 3, 3] = 1.0
+    matrices = np.matmul(matrices, scale_matrices)
+    matrices = np.matmul(matrices, attributes.get_shear_matrix())
+    matrices = np.matmul(matrices, translation_matrices(attributes.scale_pivot + attributes.scale_pivot_translate))
+
+    # Rotate around the rotate pivot
+    matrices = np.matmul(matrices, translation_matrices(-attributes.rotate_pivot))
+    rotation = np.matmul(np.matmul(attributes.get_rotate_axis_matrix(),
+                                   compose_rotation(rotations, attributes.rotate_order)),
+                         attributes.get_joint_orient_matrix())
+    rotation_4x4 = np.zeros(rotation.shape[:-2] + (4, 4))
+    rotation_4x4[..., :3, :3] = rotation
+    rotation_4x4[..., 3, 3] = 1.0
+    matrices = np.matmul(matrices, rotation_4x4)
+    if attributes.segment_scale_compensate and inverse_scales is not None:
+        inverse_scales = np.asarray(inverse_scales, dtype=np.float64)
+        matrices[..., :3, :3] = matrices[..., :3, :3] / inverse_scales[..., np.newaxis, :]
+    matrices = np.matmul(matrices, translation_matrices(attributes.rotate_pivot +
+                                                        attributes.rotate_pivot_translate + translations))
+    return matrices
+
+
+def decompose_transform(matrices, attributes=None, inverse_scales=None):
+    """
+    Function returns the translate, rotate in radians and scale values that
+    give a node with the TransformAttributes the local matrices. Joints with
+    segment scale compensate are given the inverseScale values of each
+    matrix, ... x 3. Shear is keyed by none of the values, so the matrices are
+    matched exactly only when their shear is the node's shear attribute
+    """
+    attributes = attributes or TransformAttributes()
+    matrices = np.asarray(matrices, dtype=np.float64)
+    rows = matrices[..., :3, :3]
+    if attributes.segment_scale_compensate and inverse_scales is not None:
+        rows = rows * np.asarray(inverse_scales, dtype=np.float64)[..., np.newaxis, :]
+
+    # The rows are S * Sh * (Ra * R * Jo), a lower triangle times a rotation,
+    # so the rotation's rows are the rows made orthonormal in x, y, z order
+    x_axis, y_axis, z_axis = rows[..., 0, :], rows[..., 1, :], rows[..., 2, :]
+    x_scales = np.sqrt((x_axis ** 2).sum(axis=-1))
+    x_axis = x_axis / np.where(x_scales == 0, 1.0, x_scales)[..., np.newaxis]
+    y_axis = y_axis - (y_axis * x_axis).sum(axis=-1)[..., np.newaxis] * x_axis
+    y_scales = np.sqrt((y_axis ** 2).sum(axis=-1))
+    y_axis = y_axis / np.where(y_scales == 0, 1.0, y_scales)[..., np.newaxis]
+    z_rest = (z_axis - (z_axis * x_axis).sum(axis=-1)[..., np.newaxis] * x_axis -
+              (z_axis * y_axis).sum(axis=-1)[..., np.newaxis] * y_axis)
+    z_scales = np.sqrt((z_rest ** 2).sum(axis=-1))
+
+    # A negative determinant is put on the scale of the last axis
+    z_scales = np.where(np.linalg.det(rows) < 0, -z_scales, z_scales)
+    scales = np.stack([x_scales, y_scales, z_scales], axis=-1)
+    rotation = np.stack([x_axis, y_axis, np.cross(x_axis, y_axis)], axis=-2)
+    rotation = np.matmul(np.matmul(attributes.get_rotate_axis_matrix().T, rotation),
+                         attributes.get_joint_orient_matrix().T)
+    rotations = decompose_rotation(rotation, attributes.rotate_order)
+
+    # Translate is what's left once everything else is in place
+    zero_translations = np.zeros(matrices.shape[:-2] + (3,))
+    pivot_matrices = compose_transform(zero_translations, rotations, scales, attributes, inverse_scales)
+    translations = matrices[..., 3, :3] - pivot_matrices[..., 3, :3]
+    return translations, rotations, scales
+
+
+# -----------------------------------------------------------------------------
+# IK
+# -----------------------------------------------------------------------------
+def pole_vector_positions(start_positions, mid_positions, end_positions, weights=(.75, .75)):
+    """
+    Function returns the pole vector positions of three joint chains, ... x 3
+    world positions, e.g frames x sides x 3. The pole vector sits out from the
+    middle joint along both bones, each scaled by its weight
+    """
+    start_positions = np.asarray(start_positions, dtype=np.float64)
+    mid_positions = np.asarray(mid_positions, dtype=np.float64)
+    end_positions = np.asarray(end_positions, dtype=np.float64)
+    return (mid_positions + (mid_positions - start_positions) * weights[0] +
+            (mid_positions - end_positions) * weights[1])
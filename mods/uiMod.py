@@ -220,6 +220,29 @@ def radio_button(label="Radio Button", size = (25,25), font_size=8):
 
     return radio_button
 
+def combo_box(items=(), size=(25,25), font_size=8):
+    font = QtGui.QFont()
+    font.setPointSize(font_size)
+
+    combo_box = QtWidgets.QComboBox()
+    combo_box.addItems(list(items))
+    combo_box.setMinimumSize(*size)
+    combo_box.setMaximumSize(*size)
+    combo_box.setFont(font)
+    return combo_box
+
+def spin_box(value=1, minimum=1, maximum=99, size=(25,25), font_size=8):
+    font = QtGui.QFont()
+    font.setPointSize(font_size)
+
+    spin_box = QtWidgets.QSpinBox()
+    spin_box.setRange(minimum, maximum)
+    spin_box.setValue(value)
+    spin_box.setMinimumSize(*size)
+    spin_box.setMaximumSize(*size)
+    spin_box.setFont(font)
+    return spin_box
+
 def add_context_menu(parent=None, context_menu=None):
     parent.setContextMenuPolicy(QtCore.Qt.ActionsContextMenu)
 
@@ -0,0 +1,9 @@
+"""
+Puts the mods folder on the path so the mods without Maya imports, e.g
+curveMod, transformMod, snapshotMod, bakeMod and frameMod, can be tested headless with
+pytest from the ncTools folder
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mods"))
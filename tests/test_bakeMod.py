@@ -0,0 +1,89 @@
+"""
+Tests for bakeMod
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pytest
+
+import bakeMod
+
+
+def sampler(plug_names, frames, data):
+    # Stands in for animMod.sample_plugs, every plug's value is its column
+    # plus the frame
+    return np.asarray(frames, dtype=np.float64)[:, np.newaxis] + np.arange(len(plug_names))
+
+
+def test_chunk_frames():
+    chunks = bakeMod.chunk_frames(range(100), chunk_count=3, min_chunk_frames=25)
+    assert [len(chunk) for chunk in chunks] == [33, 34, 33]
+    assert sum(chunks, []) == list(range(100))
+    assert len(bakeMod.chunk_frames(range(30), chunk_count=4, min_chunk_frames=25)) == 1
+    assert bakeMod.chunk_frames([], chunk_count=4) == []
+
+
+def test_merge_chunks_sorts_frames():
+    frames, values = bakeMod.merge_chunks([[3, 4], [1, 2]], [np.array([[3.0], [4.0]]), np.array([[1.0], [2.0]])])
+    np.testing.assert_array_equal(frames, [1, 2, 3, 4])
+    np.testing.assert_array_equal(values[:, 0], [1, 2, 3, 4])
+
+
+def test_scheduler_matches_one_sample():
+    frames = list(range(1, 121))
+    workers = [bakeMod.LocalWorker(sampler) for i in range(4)]
+    scheduler = bakeMod.BakeScheduler(workers, min_chunk_frames=25)
+    sampled_frames, values = scheduler.sample(["a.tx", "b.tx"], frames)
+    np.testing.assert_array_equal(sampled_frames, frames)
+    np.testing.assert_array_equal(values, sampler(["a.tx", "b.tx"], frames, "double"))
+
+
+def test_scheduler_without_frames():
+    scheduler = bakeMod.BakeScheduler([bakeMod.LocalWorker(sampler)])
+    frames, values = scheduler.sample(["a.worldMatrix[0]"], [], data="matrix")
+    assert values.shape == (0, 1, 4, 4)
+
+
+def test_close_deletes_folders():
+    folder = tempfile.mkdtemp(prefix="ncToolsBakeTest")
+    open(os.path.join(folder, "bakeScene.ma"), "w").close()
+    scheduler = bakeMod.BakeScheduler([bakeMod.LocalWorker(sampler)], folders=[folder])
+    scheduler.close()
+    assert not os.path.exists(folder)
+    assert scheduler.folders == []
+
+
+class FailingWorker(bakeMod.LocalWorker):
+    # Worker whose job fails when collected, the way a crashed mayapy does
+    def collect(self, job):
+        raise RuntimeError("Bake worker failed")
+
+
+class CancelWorker(bakeMod.LocalWorker):
+    cancelled = []
+
+    def cancel(self, job):
+        self.cancelled.append(job)
+
+
+def test_scheduler_cancels_jobs_after_a_failure():
+    frames = list(range(1, 101))
+    workers = [CancelWorker(sampler), FailingWorker(sampler), CancelWorker(sampler), CancelWorker(sampler)]
+    scheduler = bakeMod.BakeScheduler(workers, min_chunk_frames=25)
+    with pytest.raises(RuntimeError):
+        scheduler.sample(["a.tx"], frames)
+    # The first job was collected, the failed job and the ones after it are
+    # cancelled
+    assert len(CancelWorker.cancelled) == 2
+    np.testing.assert_array_equal(CancelWorker.cancelled[0][:, 0], frames[50:75])
+
+
+def test_mayapy_worker_cancel_stops_the_process():
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    job_folder = tempfile.mkdtemp(prefix="ncToolsBake")
+    bakeMod.MayapyWorker("scene.ma").cancel((process, job_folder, os.path.join(job_folder, "values.npy")))
+    assert process.returncode is not None
+    assert not os.path.exists(job_folder)
@@ -0,0 +1,206 @@
+"""
+Tests for curveMod
+"""
+import numpy as np
+import pytest
+
+import curveMod
+
+
+# -----------------------------------------------------------------------------
+# Evaluation
+# -----------------------------------------------------------------------------
+def test_keys_land_on_their_values():
+    anim_curve = curveMod.AnimCurve([0, 5, 12], [1.0, -3.0, 4.0], in_types=["spline"] * 3,
+                                    out_types=["spline"] * 3)
+    np.testing.assert_allclose(anim_curve.evaluate([0, 5, 12]), [1.0, -3.0, 4.0])
+    assert isinstance(anim_curve.evaluate(5), float)
+
+
+def test_linear_and_step_segments():
+    anim_curve = curveMod.AnimCurve([0, 10, 20], [0.0, 10.0, 0.0], in_types=["linear"] * 3,
+                                    out_types=["linear", "step", "linear"])
+    np.testing.assert_allclose(anim_curve.evaluate([2.5, 5.0, 15.0, 19.9]), [2.5, 5.0, 10.0, 10.0])
+
+
+def test_flat_tangents_ease_in_and_out():
+    anim_curve = curveMod.AnimCurve([0, 10], [0.0, 10.0], in_types=["flat"] * 2, out_types=["flat"] * 2)
+    np.testing.assert_allclose(anim_curve.evaluate([2.5, 5.0, 7.5]), [1.5625, 5.0, 8.4375])
+
+
+def test_spline_tangents_follow_the_neighbours():
+    in_slopes, out_slopes = curveMod.compute_tangents([0, 1, 3], [0.0, 1.0, 5.0], np.zeros(3), np.zeros(3))
+    np.testing.assert_allclose(in_slopes, [1.0, 5.0 / 3.0, 2.0])
+    np.testing.assert_allclose(out_slopes, in_slopes)
+
+
+def test_weighted_matches_non_weighted_with_default_tangents():
+    times, values = [0, 4, 10], [0.0, 3.0, -2.0]
+    non_weighted = curveMod.AnimCurve(times, values, in_types=["spline"] * 3, out_types=["spline"] * 3)
+    weighted = curveMod.AnimCurve(times, values, in_types=["spline"] * 3, out_types=["spline"] * 3,
+                                  weighted=True)
+    samples = np.linspace(0, 10, 41)
+    np.testing.assert_allclose(weighted.evaluate(samples), non_weighted.evaluate(samples), atol=1e-9)
+
+
+def test_infinity():
+    anim_curve = curveMod.AnimCurve([0, 10], [0.0, 10.0], in_types=["linear"] * 2, out_types=["linear"] * 2,
+                                    pre_infinity="linear", post_infinity="cycleRelative")
+    np.testing.assert_allclose(anim_curve.evaluate([-5.0, 15.0, 25.0]), [-5.0, 15.0, 25.0])
+    anim_curve.post_infinity = "oscillate"
+    np.testing.assert_allclose(anim_curve.evaluate([12.0, 22.0]), [8.0, 2.0])
+    anim_curve.post_infinity = "constant"
+    assert anim_curve.evaluate(30.0) == 10.0
+
+
+def test_evaluate_curves():
+    anim_curves = {"a": curveMod.AnimCurve([0, 1], [0.0, 2.0], in_types=["linear"] * 2, out_types=["linear"] * 2),
+                   "b": curveMod.AnimCurve([0], [7.0])}
+    curve_values = curveMod.evaluate_curves(anim_curves, [0.5])
+    np.testing.assert_allclose(curve_values["a"], [1.0])
+    np.testing.assert_allclose(curve_values["b"], [7.0])
+
+
+# -----------------------------------------------------------------------------
+# Smoothing
+# -----------------------------------------------------------------------------
+def make_noisy_keys(count=40):
+    times = np.cumsum(np.random.RandomState(3).uniform(0.5, 2.0, count))
+    values = np.sin(times * 0.3) + np.random.RandomState(4).normal(0, 0.2, count)
+    return times, values
+
+
+def roughness(times, values):
+    # Total change of slope between neighbouring keys
+    return np.abs(np.diff(np.diff(values) / np.diff(times))).sum()
+
+
+@pytest.mark.parametrize("kernel", curveMod.SMOOTHING_KERNELS)
+@pytest.mark.parametrize("width", [2, 3])
+def test_smoothing_keeps_the_end_keys_and_smooths(kernel, width):
+    times, values = make_noisy_keys()
+    smoothed = curveMod.smooth_values(times, values, kernel=kernel, width=width)
+    assert smoothed[0] == values[0] and smoothed[-1] == values[-1]
+    assert roughness(times, smoothed) < roughness(times, values)
+    assert values.min() <= smoothed.min() and smoothed.max() <= values.max()
+
+
+@pytest.mark.parametrize("kernel", curveMod.SMOOTHING_KERNELS)
+def test_smoothing_passes_repeat_the_kernel(kernel):
+    times, values = make_noisy_keys()
+    once = curveMod.smooth_values(times, values, kernel=kernel)
+    twice = curveMod.smooth_values(times, values, kernel=kernel, passes=2)
+    np.testing.assert_allclose(twice, curveMod.smooth_values(times, once, kernel=kernel))
+    assert roughness(times, twice) < roughness(times, once)
+
+
+@pytest.mark.parametrize("kernel", ["neighbour", "savitzky_golay"])
+def test_smoothing_keeps_straight_lines_with_uneven_spacing(kernel):
+    times, values = make_noisy_keys()
+    line = 2.0 * times - 1.0
+    np.testing.assert_allclose(curveMod.smooth_values(times, line, kernel=kernel, passes=3), line)
+
+
+@pytest.mark.parametrize("width", [2, 3])
+def test_savitzky_golay_keeps_polynomials_of_its_order(width):
+    times, values = make_noisy_keys()
+    quadratic = 0.1 * times ** 2 - times
+    np.testing.assert_allclose(curveMod.smooth_values(times, quadratic, kernel="savitzky_golay", width=width,
+                                                      order=2), quadratic, atol=1e-9)
+
+
+@pytest.mark.parametrize("kernel", curveMod.SMOOTHING_KERNELS)
+def test_smoothing_keys_fewer_than_the_kernel_width(kernel):
+    times = np.array([0.0, 1.0, 3.0, 4.0])
+    values = np.array([0.0, 2.0, -1.0, 1.0])
+    smoothed = curveMod.smooth_values(times, values, kernel=kernel, width=5)
+    assert np.isfinite(smoothed).all()
+    assert smoothed[0] == values[0] and smoothed[-1] == values[-1]
+    np.testing.assert_array_equal(curveMod.smooth_values([0, 1], [3.0, 4.0], kernel=kernel, width=5), [3.0, 4.0])
+
+
+# -----------------------------------------------------------------------------
+# Key Reduction
+# -----------------------------------------------------------------------------
+def test_extreme_keys_are_peaks_and_troughs():
+    np.testing.assert_array_equal(curveMod.extreme_key_mask([0, 2, 1, 3, 0]), [1, 1, 1, 1, 1])
+    np.testing.assert_array_equal(curveMod.extreme_key_mask([0, 1, 2, 3, 4]), [1, 0, 0, 0, 1])
+    np.testing.assert_array_equal(curveMod.extreme_key_mask([4, 1, 2, 1.5, 1.6]), [1, 1, 1, 1, 1])
+
+
+def test_extreme_keys_of_plateaus():
+    # A flat peak keeps both edges, or only its first key without plateaus
+    np.testing.assert_array_equal(curveMod.extreme_key_mask([0, 1, 1, 1, 0]), [1, 1, 0, 1, 1])
+    np.testing.assert_array_equal(curveMod.extreme_key_mask([0, 1, 1, 1, 0], keep_plateaus=False),
+                                  [1, 1, 0, 0, 1])
+    # A hold on the way up is only kept with plateaus
+    np.testing.assert_array_equal(curveMod.extreme_key_mask([0, 1, 1, 2]), [1, 1, 1, 1])
+    np.testing.assert_array_equal(curveMod.extreme_key_mask([0, 1, 1, 2], keep_plateaus=False), [1, 0, 0, 1])
+    # Changes within the tolerance are flat
+    np.testing.assert_array_equal(curveMod.extreme_key_mask([0, 1, 1.05, 2]), [1, 0, 0, 1])
+    np.testing.assert_array_equal(curveMod.extreme_key_mask([0, 1, 1.05, 2], tolerance=0.1), [1, 1, 1, 1])
+
+
+def test_extreme_keys_at_the_ends():
+    # End keys are always kept, a hold from the first key only keeps its edge
+    np.testing.assert_array_equal(curveMod.extreme_key_mask([0, 0, 0, 1]), [1, 0, 1, 1])
+    np.testing.assert_array_equal(curveMod.extreme_key_mask([1, 0, 0, 0]), [1, 1, 0, 1])
+    np.testing.assert_array_equal(curveMod.extreme_key_mask([3, 3, 3]), [1, 0, 1])
+
+
+def test_extreme_keys_of_short_curves():
+    for values in [[], [1.0], [1.0, 2.0]]:
+        np.testing.assert_array_equal(curveMod.extreme_key_mask(values), np.ones(len(values), dtype=bool))
+
+
+def test_redundant_keys_of_a_straight_line():
+    times = np.arange(20.0)
+    anim_curve = curveMod.AnimCurve(times, times * 2 + 1, in_types=["spline"] * 20, out_types=["spline"] * 20)
+    redundant = curveMod.redundant_key_mask(anim_curve)
+    assert redundant[1:-1].all() and not redundant[[0, -1]].any()
+
+
+def test_redundant_keys_keep_the_curve_with_recomputed_tangents():
+    times = np.arange(60.0)
+    values = np.sin(times * 0.15) * 3 + np.where(times > 30, 0.5, 0.0)
+    for tangent_type in ["spline", "auto", "clamped", "linear"]:
+        anim_curve = curveMod.AnimCurve(times, values, in_types=[tangent_type] * 60,
+                                        out_types=[tangent_type] * 60)
+        redundant = curveMod.redundant_key_mask(anim_curve, value_tolerance=0.01, tangent_tolerance=1.0)
+        kept = np.flatnonzero(~redundant)
+        in_tangents, out_tangents = curveMod.get_kept_tangents(anim_curve, kept)
+        reduced = curveMod.AnimCurve(times[kept], values[kept], in_tangents, out_tangents,
+                                     anim_curve.in_types[kept], anim_curve.out_types[kept])
+        samples = np.linspace(0, 59, 600)
+        error = np.abs(reduced.evaluate(samples) - anim_curve.evaluate(samples)).max()
+        assert error <= 0.02, tangent_type
+
+
+def test_kept_tangents_only_change_next_to_deleted_keys():
+    times = np.arange(6.0)
+    anim_curve = curveMod.AnimCurve(times, [0.0, 1.0, 3.0, 2.0, 5.0, 4.0], in_types=["spline"] * 6,
+                                    out_types=["spline"] * 6)
+    kept = np.array([0, 1, 3, 4, 5])
+    in_tangents, out_tangents = curveMod.get_kept_tangents(anim_curve, kept)
+    np.testing.assert_allclose(in_tangents[[0, 3, 4]], anim_curve.in_tangents[[0, 4, 5]])
+    # Keys 1 and 3 are now neighbours, their spline slopes go through keys 0 and 4
+    np.testing.assert_allclose(curveMod.get_slopes(out_tangents[[1, 2]]), [2.0 / 3.0, 4.0 / 3.0])
+
+
+def test_reduce_key_mask_stays_within_the_error():
+    times = np.arange(300.0)
+    values = np.sin(times * 0.03) * 4 + np.random.RandomState(3).normal(0, 0.001, 300)
+    for tangent_type in ["spline", "linear", "clamped", "plateau"]:
+        keep = curveMod.reduce_key_mask(times, values, max_error=0.01, tangent_type=tangent_type)
+        assert keep[[0, -1]].all() and keep.sum() < 150
+        tangent_types = [tangent_type] * int(keep.sum())
+        fitted = curveMod.AnimCurve(times[keep], values[keep], in_types=tangent_types, out_types=tangent_types)
+        assert np.abs(fitted.evaluate(times) - values).max() <= 0.01
+
+
+def test_benchmark_reduction_returns_without_printing(capsys):
+    result = curveMod.benchmark_reduction(curve_count=5, frame_count=200)
+    assert capsys.readouterr().out == ""
+    assert result["curves"] == 5 and result["keys_before"] == 1000
+    assert 0 < result["keys_after"] < 1000
+    assert result["reduction"] == 1.0 - result["keys_after"] / 1000.0
@@ -0,0 +1,73 @@
+"""
+Tests for frameMod
+"""
+import pytest
+
+from frameMod import FrameSet
+
+
+# -----------------------------------------------------------------------------
+# Constructors
+# -----------------------------------------------------------------------------
+def test_from_range_is_one_run():
+    frames = FrameSet.from_range(1, 100000)
+    assert frames.ranges() == [(1.0, 100000.0)]
+    assert len(frames) == 100000
+    assert frames[0] == 1.0 and frames[-1] == 100000.0 and frames[500] == 501.0
+
+
+def test_from_range_stops_at_the_last_whole_step():
+    assert FrameSet.from_range(1, 5.5).to_list() == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert FrameSet.from_range(1.5, 4).to_list() == [1.5, 2.5, 3.5]
+    assert not FrameSet.from_range(5, 1)
+
+
+def test_from_frames_merges_neighbouring_frames_into_runs():
+    frames = FrameSet.from_frames([5, 1, 2, 3, 3.0, 10, 11, 7])
+    assert frames.ranges() == [(1.0, 3.0), (5.0, 5.0), (7.0, 7.0), (10.0, 11.0)]
+    assert frames.to_list() == [1.0, 2.0, 3.0, 5.0, 7.0, 10.0, 11.0]
+
+
+def test_subframes_are_kept_in_their_own_runs():
+    frames = FrameSet.from_frames([1, 1.5, 2, 2.5, 3, 10.25, 10.5000000001])
+    assert frames.to_list() == [1.0, 1.5, 2.0, 2.5, 3.0, 10.25, 10.5]
+    assert frames.ranges() == [(1.0, 3.0), (1.5, 2.5), (10.25, 10.25), (10.5, 10.5)]
+    assert frames[1] == 1.5 and frames[-1] == 10.5
+    assert 2.5 in frames and 2.25 not in frames and 10.5 in frames
+
+
+# -----------------------------------------------------------------------------
+# Set operations
+# -----------------------------------------------------------------------------
+def test_union_joins_overlapping_and_touching_runs():
+    frames = FrameSet.from_range(1, 5) | FrameSet.from_range(6, 8) | FrameSet.from_range(3, 4)
+    assert frames.ranges() == [(1.0, 8.0)]
+    frames = frames | FrameSet.from_frames([20, 8.5])
+    assert frames.ranges() == [(1.0, 8.0), (8.5, 8.5), (20.0, 20.0)]
+
+
+def test_intersection_keeps_frames_in_both():
+    frames = FrameSet.from_range(1, 10) & FrameSet.from_frames([0, 2, 3, 4, 9, 12, 4.5])
+    assert frames.to_list() == [2.0, 3.0, 4.0, 9.0]
+    assert not FrameSet.from_range(1, 5) & FrameSet.from_range(6, 10)
+
+
+def test_difference_splits_runs():
+    frames = FrameSet.from_range(1, 10) - FrameSet.from_frames([1, 4, 5, 10])
+    assert frames.ranges() == [(2.0, 3.0), (6.0, 9.0)]
+    assert FrameSet.from_range(1, 3) - FrameSet.from_range(0, 5) == FrameSet()
+
+
+# -----------------------------------------------------------------------------
+# Empty set
+# -----------------------------------------------------------------------------
+def test_empty_frame_set():
+    frames = FrameSet()
+    assert not frames and len(frames) == 0
+    assert frames.to_list() == [] and frames.ranges() == []
+    assert frames.first is None and frames.last is None
+    assert 1 not in frames
+    assert frames | FrameSet.from_range(1, 2) == FrameSet.from_range(1, 2)
+    assert not frames & FrameSet.from_range(1, 2)
+    with pytest.raises(IndexError):
+        frames[0]
@@ -0,0 +1,48 @@
+"""
+Tests for snapshotMod
+"""
+import numpy as np
+import pytest
+
+import snapshotMod
+
+
+def make_snapshot():
+    frames = [1.0, 2.0, 3.0, 4.0]
+    channels = ["arm_CTRL.rotateX", "arm_CTRL.rotateY", "head_CTRL.translateX"]
+    values = np.arange(12, dtype=np.float64).reshape(4, 3)
+    return snapshotMod.AnimationSnapshot(frames, channels, values)
+
+
+def test_get_value_and_pose():
+    snapshot = make_snapshot()
+    assert snapshot.get_value(2.0, "arm_CTRL.rotateY") == 4.0
+    assert snapshot.get_pose(4.0) == {"arm_CTRL.rotateX": 9.0, "arm_CTRL.rotateY": 10.0,
+                                      "head_CTRL.translateX": 11.0}
+    assert snapshot.get_row(2.5) is None
+    with pytest.raises(KeyError):
+        snapshot.get_pose(5.0)
+
+
+def test_slice_frames_shares_values():
+    snapshot = make_snapshot()
+    sliced = snapshot.slice_frames(2.0, 3.0)
+    assert list(sliced.frames) == [2.0, 3.0]
+    assert np.shares_memory(sliced.values, snapshot.values)
+    assert sliced.get_value(3.0, "head_CTRL.translateX") == 8.0
+
+
+def test_select_channels_skips_missing():
+    snapshot = make_snapshot()
+    selected = snapshot.select_channels(["head_CTRL.translateX", "leg_CTRL.rotateX", "arm_CTRL.rotateX"])
+    assert selected.channels == ("head_CTRL.translateX", "arm_CTRL.rotateX")
+    assert "arm_CTRL.rotateY" not in selected
+    assert np.shares_memory(selected.values, snapshot.values)
+    np.testing.assert_array_equal(selected.to_array(), [[2, 0], [5, 3], [8, 6], [11, 9]])
+    np.testing.assert_array_equal(selected.get_channel("arm_CTRL.rotateX"), [0, 3, 6, 9])
+
+
+def test_empty():
+    snapshot = snapshotMod.AnimationSnapshot.empty([1.0, 2.0], ["a.tx"])
+    assert snapshot.values.shape == (2, 1)
+    assert len(snapshot) == 2
@@ -0,0 +1,175 @@
+"""
+Tests for transformMod
+"""
+import numpy as np
+import pytest
+
+import curveMod
+import transformMod
+
+
+# -----------------------------------------------------------------------------
+# Rotation
+# -----------------------------------------------------------------------------
+@pytest.mark.parametrize("rotate_order", transformMod.ROTATE_ORDERS)
+def test_decompose_rotation_round_trip(rotate_order):
+    rotations = np.random.RandomState(0).uniform(-1.5, 1.5, (50, 3))
+    matrices = transformMod.compose_rotation(rotations, rotate_order)
+    np.testing.assert_allclose(transformMod.decompose_rotation(matrices, rotate_order), rotations, atol=1e-9)
+
+
+def test_rotation_follows_row_vectors():
+    # Rotating the y axis a quarter turn around x gives the z axis
+    matrix = transformMod.compose_rotation([np.pi / 2, 0, 0])
+    np.testing.assert_allclose(np.dot([0, 1, 0], matrix), [0, 0, 1], atol=1e-12)
+
+
+# -----------------------------------------------------------------------------
+# Euler Filter
+# -----------------------------------------------------------------------------
+def make_rotations(count=120):
+    frames = np.linspace(0, 4 * np.pi, count)
+    return np.stack([frames, np.sin(frames) * 1.4, frames * 0.5], axis=1)
+
+
+@pytest.mark.parametrize("rotate_order", transformMod.ROTATE_ORDERS)
+def test_flipped_rotations_keep_the_orientation(rotate_order):
+    rotations = np.random.RandomState(2).uniform(-np.pi, np.pi, (50, 3))
+    flipped = transformMod.get_flipped_rotations(rotations, rotate_order)
+    np.testing.assert_allclose(transformMod.compose_rotation(flipped, rotate_order),
+                               transformMod.compose_rotation(rotations, rotate_order), atol=1e-9)
+
+
+@pytest.mark.parametrize("rotate_order", transformMod.ROTATE_ORDERS)
+def test_euler_filter_removes_flips_and_wraps(rotate_order):
+    # Decomposing gives angles wrapped into (-pi, pi] and the middle axis
+    # limited to a half turn, so the curves flip and wrap along the way
+    rotations = make_rotations()
+    matrices = transformMod.compose_rotation(rotations, rotate_order)
+    decomposed = transformMod.decompose_rotation(matrices, rotate_order)
+    assert np.abs(np.diff(decomposed, axis=0)).max() > np.pi
+
+    filtered = transformMod.euler_filter(decomposed, rotate_order)
+    np.testing.assert_allclose(transformMod.compose_rotation(filtered, rotate_order), matrices, atol=1e-9)
+    assert np.abs(np.diff(filtered, axis=0)).max() < 0.2
+    np.testing.assert_allclose(filtered[0], decomposed[0])
+
+
+@pytest.mark.parametrize("rotate_order", transformMod.ROTATE_ORDERS)
+def test_euler_filter_undoes_single_flips(rotate_order):
+    rotations = make_rotations(60) * 0.25
+    flipped = rotations.copy()
+    flipped[20:25] = transformMod.get_flipped_rotations(rotations[20:25], rotate_order)
+    flipped[40] += [2 * np.pi, -2 * np.pi, 0]
+    np.testing.assert_allclose(transformMod.euler_filter(flipped, rotate_order), rotations, atol=1e-9)
+
+
+def test_euler_filter_filters_each_stack_on_its_own():
+    rotations = make_rotations(60) * 0.25
+    stacked = np.stack([rotations, rotations + [2 * np.pi, 0, 0]], axis=1)
+    stacked[30:, 1] = transformMod.get_flipped_rotations(stacked[30:, 1])
+    filtered = transformMod.euler_filter(stacked)
+    np.testing.assert_allclose(filtered[:, 0], rotations, atol=1e-9)
+    np.testing.assert_allclose(filtered[:, 1], rotations + [2 * np.pi, 0, 0], atol=1e-9)
+
+
+@pytest.mark.parametrize("rotate_order", transformMod.ROTATE_ORDERS)
+def test_euler_filter_curves_keyed_at_different_times(rotate_order):
+    # Each axis is keyed at its own frames, the axes are evaluated and
+    # filtered together at all of their key times
+    frames = np.arange(120.0)
+    decomposed = transformMod.decompose_rotation(transformMod.compose_rotation(make_rotations(120), rotate_order),
+                                                 rotate_order)
+    key_frames = [frames[::2], frames[::3], frames[(frames % 5) != 1]]
+    curves = [curveMod.AnimCurve(axis_frames, decomposed[axis_frames.astype(int), axis],
+                                 in_types=["linear"] * len(axis_frames), out_types=["linear"] * len(axis_frames))
+              for axis, axis_frames in enumerate(key_frames)]
+    times = np.unique(np.concatenate(key_frames))
+    rotations = np.column_stack([curve.evaluate_array(times) for curve in curves])
+
+    filtered = transformMod.euler_filter_keyed(rotations, rotate_order)
+    assert not np.allclose(filtered, rotations)
+    np.testing.assert_allclose(transformMod.compose_rotation(filtered, rotate_order),
+                               transformMod.compose_rotation(rotations, rotate_order), atol=1e-9)
+
+
+def test_euler_filter_keeps_an_unkeyed_axis():
+    # The x and z jumps flip through the y axis near gimbal, which an unkeyed
+    # y can't follow, so only whole turns are taken out
+    rotations = np.zeros((20, 3))
+    rotations[:, 1] = 1.5
+    rotations[10:, [0, 2]] = np.pi - 0.1
+    rotations[15:, 2] -= 2 * np.pi
+    flipped = transformMod.euler_filter_keyed(rotations)
+    assert not np.allclose(flipped[:, 1], 1.5)
+
+    filtered = transformMod.euler_filter_keyed(rotations, keyed=[True, False, True])
+    np.testing.assert_array_equal(filtered[:, 1], rotations[:, 1])
+    np.testing.assert_allclose(filtered[15:, 2], np.pi - 0.1)
+    np.testing.assert_allclose(transformMod.compose_rotation(filtered), transformMod.compose_rotation(rotations),
+                               atol=1e-9)
+
+
+def test_euler_filter_unwraps_with_an_unkeyed_axis():
+    rotations = make_rotations()
+    rotations[:, 1] = 0.2
+    wrapped = (rotations + np.pi) % (2 * np.pi) - np.pi
+    filtered = transformMod.euler_filter_keyed(wrapped, "zxy", keyed=[True, False, True])
+    np.testing.assert_allclose(filtered, rotations - rotations[0] + wrapped[0], atol=1e-9)
+
+
+def test_unwrap_rotations_only_removes_whole_turns():
+    rotations = make_rotations()
+    wrapped = (rotations + np.pi) % (2 * np.pi) - np.pi
+    np.testing.assert_allclose(transformMod.unwrap_rotations(wrapped), rotations - rotations[0] + wrapped[0],
+                               atol=1e-9)
+
+
+# -----------------------------------------------------------------------------
+# Transforms
+# -----------------------------------------------------------------------------
+def make_values(count=40):
+    random = np.random.RandomState(1)
+    return (random.uniform(-5, 5, (count, 3)), random.uniform(-1.4, 1.4, (count, 3)),
+            random.uniform(0.5, 2.0, (count, 3)))
+
+
+def test_transform_round_trip_with_pivots_and_shear():
+    attributes = transformMod.TransformAttributes(rotate_order="yzx", rotate_axis=[0.1, 0.4, -0.2],
+                                                  rotate_pivot=[1, 2, 3], rotate_pivot_translate=[0.5, 0, 0],
+                                                  scale_pivot=[-1, 0, 2], scale_pivot_translate=[0, 0.3, 0],
+                                                  shear=[0.3, -0.2, 0.1])
+    translations, rotations, scales = make_values()
+    matrices = transformMod.compose_transform(translations, rotations, scales, attributes)
+    solved = transformMod.decompose_transform(matrices, attributes)
+    for values, solved_values in zip((translations, rotations, scales), solved):
+        np.testing.assert_allclose(solved_values, values, atol=1e-9)
+
+
+def test_shear_is_applied_after_scale():
+    attributes = transformMod.TransformAttributes(shear=[0.5, 0, 0])
+    matrix = transformMod.compose_transform([[0, 0, 0]], [[0, 0, 0]], [[2, 3, 1]], attributes)[0]
+    # The y axis leans towards x by xy, scaled along with y
+    np.testing.assert_allclose(matrix[1, :3], [1.5, 3, 0])
+
+
+def test_joint_round_trip_with_segment_scale_compensate():
+    attributes = transformMod.TransformAttributes(rotate_order="zxy", joint_orient=[0.3, -0.2, 0.5],
+                                                  segment_scale_compensate=True)
+    translations, rotations, scales = make_values()
+    inverse_scales = np.random.RandomState(2).uniform(0.5, 2.0, (40, 3))
+    matrices = transformMod.compose_transform(translations, rotations, scales, attributes, inverse_scales)
+    # The parent's scale is undone on the rotated axes
+    plain = transformMod.compose_transform(translations, rotations, scales, attributes)
+    np.testing.assert_allclose(matrices[..., :3, :3] * inverse_scales[:, np.newaxis, :], plain[..., :3, :3])
+    solved = transformMod.decompose_transform(matrices, attributes, inverse_scales)
+    for values, solved_values in zip((translations, rotations, scales), solved):
+        np.testing.assert_allclose(solved_values, values, atol=1e-9)
+
+
+def test_negative_scale_goes_on_the_last_axis():
+    matrices = transformMod.compose_transform([[1, 2, 3]], [[0.1, 0.2, 0.3]], [[1, 2, -3]])
+    translations, rotations, scales = transformMod.decompose_transform(matrices)
+    np.testing.assert_allclose(transformMod.compose_transform(translations, rotations, scales), matrices,
+                               atol=1e-12)
+    assert scales[0, 2] < 0
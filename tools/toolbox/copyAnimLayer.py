@@ -64,31 +64,30 @@ class CopyAnimLayer(object):
     def copy_anim_layer(self):
         controls = animMod.get_target("controls", selected=True)
         source_anim_layers = animMod.get_target("anim_layers", selected=True)
+        control_attributes = animMod.get_node_attributes(nodes=controls, attribute_options=["unlocked", "c", "keyable"], rebuild=True)
+        anim_layer_membership = animMod.get_anim_layer_membership()
         for anim_layer in source_anim_layers:
             anim_layer_name = str(anim_layer)
-            anim_layer_override = cmds.animLayer(anim_layer, query=True, override=True)
+            anim_layer_override = anim_layer_membership.override[anim_layer]
 
             #Create new anim layer
             new_anim_layer_name = "{0}_copy".format(anim_layer_name)
             new_anim_layer = cmds.animLayer(new_anim_layer_name, override=anim_layer_override)
 
             for control in controls:
-                print control
-                attributes = animMod.get_target("attributes", attribute_options=["unlocked", "c", "keyable"], node=control) or []
-                print attributes
-                for attribute in attributes:
+                #Is it in the source layer?
+                if not anim_layer_membership.is_node_in_layer(control, anim_layer):
+                    continue
 
-                    #Is it in the source layer?
-                    if not animMod.is_control_in_anim_layer(control, anim_layer):
-                        pass
-                    else:
+                attributes = control_attributes[control]
+                for attribute in attributes:
 
-                        #Are there curves on the attribute?
-                        anim_curves = cmds.copyKey(control, time = [], option="curve", animLayer=anim_layer)
+                    #Are there curves on the attribute?
+                    anim_curves = cmds.copyKey(control, time = [], option="curve", animLayer=anim_layer)
 
-                        if anim_curves > 0:
-                            #Add the control to the new layer
-                            cmds.select(control)
-                            cmds.animLayer(new_anim_layer, edit=True, at=control + "." + attribute)
-                            cmds.setKeyframe(control, at=attribute, al=new_anim_layer)
-                            cmds.pasteKey(control, option="replaceCompletely", al=new_anim_layer)
+                    if anim_curves > 0:
+                        #Add the control to the new layer
+                        cmds.select(control)
+                        cmds.animLayer(new_anim_layer, edit=True, at=control + "." + attribute)
+                        cmds.setKeyframe(control, at=attribute, al=new_anim_layer)
+                        cmds.pasteKey(control, option="replaceCompletely", al=new_anim_layer)
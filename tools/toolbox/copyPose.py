@@ -171,7 +171,7 @@ class CopyPose_UI(uiMod.BaseSubUI):
         return checked_attributes
 
     def get_paste_attributes(self, checked_attributes):
-        all_attributes = animMod.get_control_attributes(node=self.source_rig)
+        all_attributes = animMod.get_control_attributes(node=self.source_rig, rebuild=True)
         other_attributes = animMod.get_control_attributes(node=self.source_rig)
         paste_attributes = []
 
@@ -210,58 +210,75 @@ class CopyPose(object):
 
     def copy_pose(self, rig):
         self.source_time = cmds.currentTime(query=True)
+        self.source_namespace = animMod.get_namespace(rig)
         self.pose_data = animMod.store_animation_data(time_range=(self.source_time, self.source_time), rig=rig)
 
     def paste_pose(self, anim_data, paste_attributes):
         selected_frames = animMod.get_target("frames", selected=True)
-        print selected_frames
 
         target_rig = animMod.get_target("rigs", selected=True)[0]
         target_namespace = animMod.get_target("namespace", node=target_rig)
+        target_controls = animMod.get_target("controls", selected=True, node=target_rig)
+        target_attributes = self.get_target_attributes(paste_attributes, target_namespace, target_controls)
+        target_attributes = self.get_settable_attributes(target_attributes)
 
-        #Loop through selected controls on target rig and apply data
-        for frame in selected_frames:
-            print frame
-            for control in animMod.get_target("controls", selected=True, node=target_rig):
-                control_name = control.rpartition(":")[2]
-                target_control = "{0}:{1}".format(target_namespace,control_name)
-                for control_attribute in paste_attributes:
-                    attribute = control_attribute.rpartition(".")[2]
-                    if control_name in control_attribute:
-                        attribute_value = self.pose_data[self.source_time][control_attribute]
-                        target_attribute = "{0}:{1}".format(target_namespace,control_attribute)
-                        try:
-                            cmds.setAttr(target_attribute, attribute_value)
-                            cmds.setKeyframe(target_control, attribute=attribute, time=frame)
-                        except RuntimeError:
-                            pass
+        #Key the pose on every selected frame, all frames of an attribute at once
+        pose = self.pose_data.select_channels(target_attributes).get_pose(self.source_time)
+        frames = selected_frames.to_list()
+        animMod.write_plug_keys(dict((target_attributes[control_attribute], (frames, [attribute_value] * len(frames)))
+                                     for control_attribute, attribute_value in pose.items()))
 
     def copy_animation(self, rig):
         self.animation_source_frames = animMod.get_target("frames", selected = True)
+        self.source_namespace = animMod.get_namespace(rig)
         self.animation_data = animMod.store_animation_data(time_range=(self.animation_source_frames[0], self.animation_source_frames[-1]), rig=rig)
 
     def paste_animation(self, animation_data, paste_attributes):
         target_start = cmds.currentTime(query=True)
         source_start = self.animation_source_frames[0]
-        time_offset = abs(int(target_start - source_start))
 
         target_rig = animMod.get_target("rigs", selected=True)[0]
         target_namespace = animMod.get_target("namespace", node=target_rig)
-
-        for i in range(len(self.animation_source_frames)):
-            target_frame = target_start + i
-            source_frame = source_start + i
-
-            for control in animMod.get_target("controls", selected=True, node=target_rig):
-                control_name = control.rpartition(":")[2]
-                target_control = "{0}:{1}".format(target_namespace,control_name)
-                for control_attribute in paste_attributes:
-                    attribute = control_attribute.rpartition(".")[2]
-                    if control_name in control_attribute:
-                        attribute_value = self.animation_data[source_frame][control_attribute]
-                        target_attribute = "{0}:{1}".format(target_namespace,control_attribute)
-                        try:
-                            cmds.setAttr(target_attribute, attribute_value)
-                            cmds.setKeyframe(target_control, attribute=attribute, time=target_frame)
-                        except RuntimeError:
-                            pass
+        target_controls = animMod.get_target("controls", selected=True, node=target_rig)
+        target_attributes = self.get_target_attributes(paste_attributes, target_namespace, target_controls)
+        target_attributes = self.get_settable_attributes(target_attributes)
+
+        #Key every attribute over all frames at once
+        animation_data = self.animation_data.select_channels(target_attributes)
+        target_frames = animation_data.frames + (target_start - source_start)
+        animMod.write_plug_keys(dict((target_attributes[control_attribute],
+                                      (target_frames, animation_data.get_channel(control_attribute)))
+                                     for control_attribute in animation_data.channels))
+
+    def get_target_attributes(self, paste_attributes, target_namespace, target_controls):
+        """
+        Method returns a dictionary of the pasted "control.attribute" channels
+        of the copied rig onto the "namespace:control.attribute" they paste to,
+        for the target controls the control mapping pairs with a copied control
+        """
+        control_pairs = animMod.get_control_mapping().get_pairs(self.source_namespace, target_namespace,
+                                                                target_controls=target_controls)
+        target_names = dict((source.rpartition(":")[2], target) for source, target in control_pairs)
+        target_attributes = {}
+        for control_attribute in paste_attributes:
+            control, _, attribute = control_attribute.partition(".")
+            if control in target_names:
+                target_attributes[control_attribute] = "{0}.{1}".format(target_names[control], attribute)
+        return target_attributes
+
+    def get_settable_attributes(self, target_attributes):
+        """
+        Method returns the target attributes whose target plug can be keyed,
+        the ones that are missing, locked or connected are skipped with a
+        warning
+        """
+        settable_attributes = {}
+        skipped = []
+        for control_attribute, target_attribute in target_attributes.items():
+            if cmds.objExists(target_attribute) and cmds.getAttr(target_attribute, settable=True):
+                settable_attributes[control_attribute] = target_attribute
+            else:
+                skipped.append(target_attribute)
+        if skipped:
+            cmds.warning("Skipped missing, locked or connected attributes: {0}".format(", ".join(sorted(skipped))))
+        return settable_attributes
@@ -2,11 +2,15 @@
 # Import Modules
 # -----------------------------------------------------------------------------
 
+# python
+import re
+
 # maya
 import maya.cmds as cmds
 import maya.OpenMayaUI as omui
-import maya.mel as mel
-from functools import wraps
+
+# numpy
+import numpy as np
 
 # PySide2
 from PySide2 import QtCore
@@ -15,30 +19,102 @@ from PySide2 import QtWidgets
 # ncTools
 from ncTools.mods                   import uiMod;   reload(uiMod)
 from ncTools.mods                   import animMod; reload(animMod)
+from ncTools.mods                   import bakeMod; reload(bakeMod)
+from ncTools.mods                   import frameMod; reload(frameMod)
+from ncTools.mods                   import transformMod; reload(transformMod)
 from ncTools.tools.ncToolboxGlobals   import ncToolboxGlobals as G
 
 # -----------------------------------------------------------------------------
-# Decorators
+# Limb Definitions
 # -----------------------------------------------------------------------------
+# Limbs of every rig type, add a rig's limbs once their names are checked
+# against the rig. Names are control and joint names without namespace, side
+# or suffix, see CONTROL_NAME and JOINT_NAME. The fk and ik constraint pairs
+# are the joint each control follows when matched, the pole vector is placed
+# off its start, mid and end joints and the switch is the control, attribute,
+# fk value and ik value of the limb's ik/fk blend, or None
+LIMB_DEFINITIONS = {
+    "bird": {
+        "wing": {
+            "joints": ["wingJA", "wingJB", "alulaJA", "alulaJB"],
+            "fk_controls": ["wingFKA", "wingFKB", "wingFKC", "wingFKD"],
+            "ik_controls": ["wingIK", "wingPV"],
+            "fk_constraints": [("wingJA", "wingFKA"), ("wingJB", "wingFKB"),
+                               ("alulaJA", "wingFKC"), ("alulaJB", "wingFKD")],
+            "ik_constraints": [("alulaJA", "wingIK"), ("alulaJB", "wingFKD")],
+            "pole_vector": ("wingPV", ("wingJA", "wingJB", "alulaJA")),
+            "switch": None,
+        },
+    },
+}
+
+CONTROL_NAME = "{namespace}:{side}_{name}_CTRL"
+JOINT_NAME = "{namespace}:{side}_{name}_JNT"
+
+# Side and name of a control's short name, e.g l_wingFKA_CTRL
+CONTROL_PATTERN = re.compile(r"^([a-z])_(\w+)_CTRL$")
+
+# Limb of every control name by rig type, rig types can reuse control names
+CONTROL_LIMBS = {}
+for rig_type, limbs in LIMB_DEFINITIONS.items():
+    control_limbs = CONTROL_LIMBS[rig_type] = {}
+    for limb, definition in limbs.items():
+        for control_name in definition["fk_controls"] + definition["ik_controls"]:
+            control_limbs[control_name] = limb
+        if definition["switch"]:
+            control_limbs[definition["switch"][0]] = limb
 
-def viewport_off(func):
+
+# -----------------------------------------------------------------------------
+# Limb Node Map
+# -----------------------------------------------------------------------------
+class LimbNodeMap(object):
     """
-    Decorator to turn off viewport_off
+    The nodes of one limb definition on one side of one rig, names are resolved
+    once when the map is made
     """
-    @wraps(func)
-    def wrap(*args, **kwargs):
-
-        # Turn off main panel:
-        mel.eval("paneLayout -e -manage false $gMainPane")
 
-        try:
-            return func(*args, **kwargs)
-        except Exception:
-            raise # will raise original setVerticalScrollBar
-        finally:
-            mel.eval("paneLayout -e -manage true $gMainPane")
+    def __init__(self, namespace, side, rig_type, limb):
+        self.namespace = namespace
+        self.side = side
+        self.rig_type = rig_type
+        self.limb = limb
+        definition = LIMB_DEFINITIONS[rig_type][limb]
+
+        self.joints = [self.get_joint(name) for name in definition["joints"]]
+        self.fk_controls = [self.get_control(name) for name in definition["fk_controls"]]
+        self.ik_controls = [self.get_control(name) for name in definition["ik_controls"]]
+        self.controls = self.fk_controls + [control for control in self.ik_controls
+                                            if control not in self.fk_controls]
+        self.nodes = self.joints + self.controls
+        self.fk_pairs = [(self.get_joint(joint), self.get_control(control))
+                         for joint, control in definition["fk_constraints"]]
+        self.ik_pairs = [(self.get_joint(joint), self.get_control(control))
+                         for joint, control in definition["ik_constraints"]]
+
+        self.pole_vector = None
+        if definition["pole_vector"]:
+            control, joints = definition["pole_vector"]
+            self.pole_vector = (self.get_control(control), [self.get_joint(joint) for joint in joints])
+
+        self.switch = None
+        if definition["switch"]:
+            control, attribute, fk_value, ik_value = definition["switch"]
+            self.switch = ("{0}.{1}".format(self.get_control(control), attribute), fk_value, ik_value)
+
+    def get_control(self, name):
+        return CONTROL_NAME.format(namespace=self.namespace, side=self.side, name=name)
+
+    def get_joint(self, name):
+        return JOINT_NAME.format(namespace=self.namespace, side=self.side, name=name)
+
+    def get_missing_nodes(self):
+        """
+        Method returns the joints and controls of the limb that don't exist
+        """
+        handles = animMod.get_node_handle_cache()
+        return [node for node in self.nodes if handles.get_object(node) is None]
 
-    return wrap
 
 # -----------------------------------------------------------------------------
 # Class UI
@@ -79,14 +155,22 @@ class IkfkSnapTest_UI(uiMod.BaseSubUI):
         self.current_frame_radio.clicked.connect(lambda : setattr(ikfkSnapTest, "frame_type", "current"))
         self.main_layout.addWidget(self.current_frame_radio, 3, 0, 1, 6)
 
-        self.wing_switch = uiMod.push_button(label="Wing Switch To FK", size=(self.w[6], self.h[1]))
-        self.wing_switch.clicked.connect(ikfkSnapTest.wing_switch_to_fk)
-        self.main_layout.addWidget(self.wing_switch, 4, 0, 1, 6)
+        self.switch_to_fk = uiMod.push_button(label="Switch To FK", size=(self.w[6], self.h[1]))
+        self.switch_to_fk.clicked.connect(ikfkSnapTest.switch_to_fk)
+        self.main_layout.addWidget(self.switch_to_fk, 4, 0, 1, 6)
 
-        self.switch_to_ik = uiMod.push_button(label="Wing Switch To IK", size=(self.w[6], self.h[1]))
-        self.switch_to_ik.clicked.connect(ikfkSnapTest.wing_switch_to_ik)
+        self.switch_to_ik = uiMod.push_button(label="Switch To IK", size=(self.w[6], self.h[1]))
+        self.switch_to_ik.clicked.connect(ikfkSnapTest.switch_to_ik)
         self.main_layout.addWidget(self.switch_to_ik, 5, 0, 1, 6)
 
+        self.worker_label = uiMod.label(label="Workers", size=(self.w[4], self.h[1]))
+        self.main_layout.addWidget(self.worker_label, 6, 0, 1, 4)
+
+        self.worker_count = uiMod.spin_box(value=1, minimum=1, maximum=16, size=(self.w[2], self.h[1]))
+        self.worker_count.setToolTip("Mayapy processes long frame ranges are sampled across, 1 samples here")
+        self.worker_count.valueChanged.connect(lambda value : setattr(ikfkSnapTest, "worker_count", value))
+        self.main_layout.addWidget(self.worker_count, 6, 4, 1, 2)
+
         return self.frame_widget
 
 
@@ -99,197 +183,172 @@ class IkfkSnapTest():
         G.IkfkSnapTest = self
 
         self.frame_type = "current"
-        self.frames = []
+        self.frames = frameMod.FrameSet()
+        self.limb_node_maps = {}
 
+        # Mayapy processes long ranges are sampled across, 1 samples here
+        self.worker_count = 1
 
-    def wing_switch_to_fk(self):
-        cmds.undoInfo(ock=True)
-        self.setup_switch()
-        self.match_fk()
-        cmds.undoInfo(cck=True)
-        print "done"
 
+    def switch_to_fk(self):
+        self.switch("fk")
+
+
+    def switch_to_ik(self):
+        self.switch("ik")
+
+
+    def switch(self, mode):
+        """
+        Method matches every limb with a selected control, on any side of any
+        rig, to fk or ik in one pass
+        """
+        limbs = self.get_selected_limbs()
+        if not limbs:
+            cmds.warning("Select a control of a limb to switch")
+            return
 
-    def wing_switch_to_ik(self):
         cmds.undoInfo(ock=True)
-        self.setup_switch()
-        self.match_ik()
-        cmds.undoInfo(cck=True)
-        print "done"
+        try:
+            if not self.setup_switch(limbs):
+                return
+            if mode == "fk":
+                self.match_fk(limbs)
+            else:
+                self.match_ik(limbs)
+            self.set_switches(limbs, mode)
+        finally:
+            cmds.undoInfo(cck=True)
 
 
-    def get_frames(self):
+    def get_frames(self, controls):
         self.current_frame = int(cmds.currentTime(query=True))
-        self.min_time = int(cmds.playbackOptions(query = True, min=True))
-        self.max_time = int(cmds.playbackOptions(query=True, max=True))
 
         if self.frame_type == "all":
-            self.frames = list(range(self.min_time, self.max_time+1))
+            self.frames = animMod.get_playback_frames()
         elif self.frame_type == "keyed":
-            print self.controls
-            for control in self.controls:
-                frames = cmds.keyframe(control, query=True, timeChange=True)
-                if frames:
-                    self.frames = self.frames + frames
+            self.frames = animMod.get_keyed_frames(controls)
         elif self.frame_type == "current":
-            self.frames = [self.current_frame]
-        self.frames = list(set(self.frames))
-        self.frames.sort()
-        print "FRAMES: {frames}".format(frames=self.frames)
+            self.frames = frameMod.FrameSet.from_frames([self.current_frame])
         return self.frames
 
 
-    def setup_switch(self):
-        # Define selection
-        self.selection = cmds.ls(sl=1)
+    def get_limb_node_map(self, namespace, side, rig_type, limb):
+        """
+        Method returns the LimbNodeMap of the limb, made once per namespace and
+        side
+        """
+        key = (namespace, side, rig_type, limb)
+        if key not in self.limb_node_maps:
+            self.limb_node_maps[key] = LimbNodeMap(namespace, side, rig_type, limb)
+        return self.limb_node_maps[key]
+
+
+    def get_rig_type(self, node, control_name):
+        """
+        Method returns the rig type of the control, the one named in its
+        namespace or rig top node, or the only rig type with the control name.
+        None if the control isn't in the definitions or the rig type can't be
+        told, with a warning
+        """
+        rig_types = sorted(rig_type for rig_type, control_limbs in CONTROL_LIMBS.items()
+                           if control_name in control_limbs)
+        if len(rig_types) < 2:
+            return rig_types[0] if rig_types else None
+
+        namespace = node.rpartition(":")[0]
+        rig = (animMod.get_hierarchy_index().get_rig(node) or "").rpartition(":")[2]
+        named_types = [rig_type for rig_type in rig_types
+                       if rig_type in namespace.lower() or rig_type in rig.lower()]
+        if len(named_types) == 1:
+            return named_types[0]
+        cmds.warning("Skipping {0}, can't tell which rig type of {1} it is from its namespace or rig".format(
+            node, ", ".join(rig_types)))
+        return None
+
+
+    def get_selected_limbs(self):
+        """
+        Method returns the LimbNodeMaps of the limbs with a selected control.
+        Limbs missing any of their joints or controls are skipped with a
+        warning
+        """
+        limbs = []
+        skipped = []
+        for node in cmds.ls(sl=1) or []:
+            namespace, _, name = node.rpartition(":")
+            match = CONTROL_PATTERN.match(name)
+            if not match:
+                continue
+            rig_type = self.get_rig_type(node, match.group(2))
+            if rig_type is None:
+                continue
+            limb = CONTROL_LIMBS[rig_type][match.group(2)]
+            limb_node_map = self.get_limb_node_map(namespace, match.group(1), rig_type, limb)
+            if limb_node_map in limbs or limb_node_map in skipped:
+                continue
+            missing_nodes = limb_node_map.get_missing_nodes()
+            if missing_nodes:
+                cmds.warning("Skipping {0}, missing {1}".format(node, ", ".join(missing_nodes)))
+                skipped.append(limb_node_map)
+                continue
+            limbs.append(limb_node_map)
+        return limbs
+
+
+    def setup_switch(self, limbs):
+        # Controls and joints of all limbs
+        controls = [control for limb in limbs for control in limb.controls]
+        joints = [joint for limb in limbs for joint in limb.joints]
+        self.joint_columns = dict((joint, column) for column, joint in enumerate(joints))
+
+        if not self.get_frames(controls):
+            cmds.warning("No frames to switch")
+            return False
+
+        # Sample the joints of all limbs over all frames in one pass, long
+        # ranges across mayapy workers
+        if self.worker_count > 1 and len(self.frames) >= bakeMod.MIN_CHUNK_FRAMES * 2:
+            scheduler = animMod.get_bake_scheduler(self.worker_count)
+            try:
+                self.joint_matrices = animMod.sample_world_matrices(joints, list(self.frames), scheduler=scheduler)
+            finally:
+                scheduler.close()
+        else:
+            self.joint_matrices = animMod.sample_world_matrices(joints, list(self.frames))
 
-        # Define variables base on selection
-        self.define_variables()
+        # Zero all controls
+        self.zero_controls(controls)
 
-        # Make and bake locators for joints
-        self.locators = []
-        for joint in self.joint_names:
-            for direction in self.direction:
-                locator = self.make_locator(parent_object=self.nodes[joint][direction]["node"],
-                                            name=self.nodes[joint][direction]["locator"],
-                                            parent=True)
-                self.locators.append(locator[0])
-        self.bake(self.locators)
+        # Offset of every zeroed joint to its zeroed controls
+        joint_matrices = transformMod.to_matrices(animMod.get_world_matrices(joints))
+        self.joint_inverse_matrices = transformMod.invert_matrices(joint_matrices)
+        return True
 
-        # Zero all controls
-        self.zero_controls(self.controls)
-
-        # Create zero locators at zeroed joints
-        for joint in self.joint_names:
-            for direction in self.direction:
-                locator = self.make_locator(parent_object=self.nodes[joint][direction]["node"],
-                                            name=self.nodes[joint][direction]["zero_loc"],
-                                            parent=False)
-                self.locators.append(locator[0])
-
-
-    def define_variables(self):
-
-        # Node Names
-        self.wingFKA = "wingFKA"
-        self.wingFKB = "wingFKB"
-        self.wingFKC = "wingFKC"
-        self.wingFKD = "wingFKD"
-        self.wingIK = "wingIK"
-        self.wingPV = "wingPV"
-        self.wingJA = "wingJA"
-        self.wingJB = "wingJB"
-        self.alulaJA = "alulaJA"
-        self.alulaJB = "alulaJB"
-        self.left = "l"
-        self.right = "r"
-
-
-        # FK Constraint pairs:
-        self.fk_constraints = [(self.wingJA, self.wingFKA),
-                               (self.wingJB, self.wingFKB),
-                               (self.alulaJA, self.wingFKC),
-                               (self.alulaJB, self.wingFKD)
-                               ]
-
-        # IK Constraint pairs:
-        self.ik_constraints = [(self.alulaJA, self.wingIK),
-                               (self.alulaJB, self.wingFKD)
-                               ]
-
-
-        # Variables base on selection
-        self.namespace = self.selection[0].rpartition(":")[0]
-
-        # Define direction
-        self.direction = []
-        for control in self.selection:
-            if ":l_" in control:
-                self.direction.append(self.left)
-            elif ":r_" in control:
-                self.direction.append(self.right)
-        self.direction = list(set(self.direction))
-
-        # Get nodes
-        self.fk_controls = [self.wingFKA, self.wingFKB, self.wingFKC, self.wingFKD]
-        self.ik_controls = [self.wingIK, self.wingPV]
-        self.control_names = [self.wingFKA, self.wingFKB, self.wingFKC, self.wingFKD, self.wingIK, self.wingPV]
-        self.joint_names = [self.wingJA, self.wingJB, self.alulaJA, self.alulaJB]
-
-        # Node dictionary
-        self.nodes = {}
-
-        for control in self.control_names:
-            self.nodes[control] = {}
-            for direction in self.direction:
-                self.nodes[control][direction] = {}
-                self.nodes[control][direction]["node"] = "{0}:{1}_{2}_CTRL".format(self.namespace, direction, control)
-        for joint in self.joint_names:
-            self.nodes[joint] = {}
-            for direction in self.direction:
-                self.nodes[joint][direction] = {}
-                self.nodes[joint][direction]["node"] = "{0}:{1}_{2}_JNT".format(self.namespace, direction, joint)
-                self.nodes[joint][direction]["locator"] = "{0}_LOC".format(self.nodes[joint][direction]["node"])
-                self.nodes[joint][direction]["zero_loc"] = "{0}_ZEROLOC".format(self.nodes[joint][direction]["node"])
-                for pair in self.fk_constraints:
-                    if joint == pair[0]:
-                        fkChild = "{0}:{1}_{2}_CTRL".format(self.namespace, direction, pair[1])
-                        self.nodes[joint][direction]["fkChild"] = fkChild
-                for pair in self.ik_constraints:
-                    if joint == pair[0]:
-                        ikChild = "{0}:{1}_{2}_CTRL".format(self.namespace, direction, pair[1])
-                        self.nodes[joint][direction]["ikChild"] = ikChild
-
-
-        # Controls
-        self.controls = []
-        for control in self.control_names:
-            for direction in self.direction:
-                self.controls.append(self.nodes[control][direction]["node"])
-
-        # Joints
-        self.joints = []
-        for joint in self.joint_names:
-            for direction in self.direction:
-                self.joints.append(self.nodes[control][direction]["node"])
-
-        # Locators
-        self.locators = []
-
-        self.get_frames()
-
-
-    def make_locator(self, parent_object=None, parent=False, name=None):
-        locator = cmds.spaceLocator(name=name)
-        if parent == True:
-            cmds.parentConstraint(parent_object, locator)
-        if parent == False:
-            xform = cmds.xform(parent_object, m=True, ws=True, q=True)
-            cmds.xform(locator, m=xform, ws=True)
-        return locator
-
-
-    @viewport_off
-    def bake(self, objects):
-        for frame in self.frames:
-            cmds.currentTime(frame)
-            for obj in objects:
-                cmds.setKeyframe(obj)
-                try:
-                    cmds.setAttr(obj+".blendParent1", 1)
-                except:
-                    pass
-                try:
-                    cmds.setAttr(obj+".blendOrient1", 1)
-                except:
-                    pass
-                try:
-                    cmds.setAttr(obj+".blendPoint1", 1)
-                except:
-                    pass
-
-        cmds.currentTime(self.current_frame)
-        cmds.delete(objects, cn=True)
+
+    def get_matched_matrices(self, pairs):
+        """
+        Method returns the controls of the (joint, control) pairs and their
+        world matrices on every frame. A control keeps the offset it has to its
+        joint in the zero pose, as a constraint with maintain offset
+        """
+        joints = [joint for joint, control in pairs]
+        controls = [control for joint, control in pairs]
+        joint_columns = [self.joint_columns[joint] for joint in joints]
+
+        control_matrices = transformMod.to_matrices(animMod.get_world_matrices(controls))
+        offsets = np.matmul(control_matrices, self.joint_inverse_matrices[joint_columns])
+        world_matrices = np.matmul(offsets, self.joint_matrices[:, joint_columns])
+        return controls, world_matrices
+
+
+    def get_joint_positions(self, joints):
+        """
+        Method returns the sampled world positions of the joints, frames x
+        joints x 3
+        """
+        joint_columns = [self.joint_columns[joint] for joint in joints]
+        return self.joint_matrices[:, joint_columns, 3, :3]
 
 
     def zero_controls(self, objects):
@@ -312,107 +371,60 @@ class IkfkSnapTest():
                         pass
 
 
-    def match_fk(self):
-        # Constrain zero joints to fk control
-        for joint in self.joint_names:
-            for direction in self.direction:
-                zero_loc = self.nodes[joint][direction]["zero_loc"]
-                control = self.nodes[joint][direction]["fkChild"] or None
-                rotate_axis = ["x", "y", "z"]
-                skip = []
-                for xyz in rotate_axis:
-                    attribute = "rotate{0}".format(xyz.upper())
-                    attr = cmds.listAttr(control, k=True, st=[attribute])
-                    if attr is None:
-                        skip.append(xyz)
-                try:
-                    cmds.orientConstraint(zero_loc, control, skip=skip, mo=True)
-                except:
-                    pass
-
-
-        # Match zero_loc to self.locators
-        for joint in self.joint_names:
-            for direction in self.direction:
-                locator = self.nodes[joint][direction]["locator"]
-                zero_loc = self.nodes[joint][direction]["zero_loc"]
-                cmds.parentConstraint(locator, zero_loc)
-
-        # Bake controls
-        self.bake(self.controls)
-
-        # Delete all locators
-        cmds.delete(self.locators)
+    def match_fk(self, limbs):
+        # FK controls follow their joints, only their rotation is keyed
+        pairs = [pair for limb in limbs for pair in limb.fk_pairs]
+        controls, world_matrices = self.get_matched_matrices(pairs)
+        animMod.bake_world_matrices(controls, world_matrices, self.frames, channels=["rotate"])
 
         # Euler filter controls
-        self.euler_filter(self.controls)
+        self.euler_filter([control for limb in limbs for control in limb.controls])
 
 
     def euler_filter(self, controls):
-        curves = cmds.ls(controls, l=True)
-        cmds.filterCurve(curves)
-
-
-    def match_ik(self):
-        for pair in self.ik_constraints:
-            for direction in self.direction:
-                joint = pair[0]
-                zero_loc = self.nodes[joint][direction]["zero_loc"]
-                control = self.nodes[joint][direction]["ikChild"] or None
-                axis = ["x", "y", "z"]
-                skip = []
-                for xyz in axis:
-                    attribute = "rotate{0}".format(xyz.upper())
-                    attr = cmds.listAttr(control, k=True, st=[attribute])
-                    if attr is None:
-                        skip.append(xyz)
-                try:
-                    cmds.orientConstraint(zero_loc, control, skip=skip, mo=True)
-                    print control + "orientConstraint"
-                except:
-                    pass
-
-                skip = []
-                for xyz in axis:
-                    attribute = "translate{0}".format(xyz.upper())
-                    attr = cmds.listAttr(control, k=True, st=[attribute])
-                    if attr is None:
-                        skip.append(xyz)
-                try:
-                    cmds.pointConstraint(zero_loc, control, skip=skip, mo=True)
-                    print control +"constrained"
-                except:
-                    pass
-
-
-        # Match zero locs to locs
-        for pair in self.ik_constraints:
-            joint = pair[0]
-            for direction in self.direction:
-                locator = self.nodes[joint][direction]["locator"]
-                zero_loc = self.nodes[joint][direction]["zero_loc"]
-                cmds.parentConstraint(locator, zero_loc)
-
-        # Create pole vector locator
-        self.match_pole_vector()
-
-        # Bake controls
-        self.bake(self.controls)
-
-
-        # Delete all locators
-        cmds.delete(self.locators)
-
-    @viewport_off
-    def match_pole_vector(self):
-
-        for frame in self.frames:
-            cmds.currentTime(frame)
-
-            for direction in self.direction:
-                wingJA_VEC = [cmds.xform(self.nodes["wingJB"][direction]["locator"], t=True, ws=True, q=True)[i] - cmds.xform(self.nodes["wingJA"][direction]["locator"], t=True, ws=True, q=True)[i] for i in range(3)]
-                wingJB_VEC = [cmds.xform(self.nodes["wingJB"][direction]["locator"], t=True, ws=True, q=True)[i] - cmds.xform(self.nodes["alulaJA"][direction]["locator"], t=True, ws=True, q=True)[i] for i in range(3)]
-                cmds.xform(self.nodes["wingPV"][direction]["node"], t=[cmds.xform(self.nodes["wingJB"][direction]["locator"], t=True, q=True, ws=True)[i] + wingJA_VEC[i] * .75 + wingJB_VEC[i] * .75 for i in range(3)], ws=1)
-                cmds.setKeyframe(self.nodes["wingPV"][direction]["node"])
-
-        cmds.currentTime(self.current_frame)
+        animMod.euler_filter(controls)
+
+
+    def match_ik(self, limbs):
+        # IK controls follow their joints
+        pairs = [pair for limb in limbs for pair in limb.ik_pairs]
+        controls, world_matrices = self.get_matched_matrices(pairs)
+        animMod.bake_world_matrices(controls, world_matrices, self.frames, channels=["translate", "rotate"])
+
+        # Place pole vectors
+        self.match_pole_vector(limbs)
+
+
+    def match_pole_vector(self, limbs, weights=(.75, .75)):
+        limbs = [limb for limb in limbs if limb.pole_vector]
+        if not limbs:
+            return
+
+        # Start, mid and end joint positions of every limb, frames x limbs x 3
+        start_joints, mid_joints, end_joints = zip(*[limb.pole_vector[1] for limb in limbs])
+        start_positions = self.get_joint_positions(start_joints)
+        mid_positions = self.get_joint_positions(mid_joints)
+        end_positions = self.get_joint_positions(end_joints)
+
+        # Place and key the pole vectors of all limbs and frames at once
+        pole_vector_positions = transformMod.pole_vector_positions(start_positions, mid_positions,
+                                                                   end_positions, weights=weights)
+        pole_vectors = [limb.pole_vector[0] for limb in limbs]
+        world_matrices = transformMod.translation_matrices(pole_vector_positions)
+        animMod.bake_world_matrices(pole_vectors, world_matrices, self.frames, channels=["translate"])
+
+
+    def set_switches(self, limbs, mode):
+        """
+        Method keys the ik/fk switch of every limb that has one to the mode on
+        all switched frames
+        """
+        frames = list(self.frames)
+        plug_keys = {}
+        for limb in limbs:
+            if not limb.switch or not cmds.objExists(limb.switch[0]):
+                continue
+            plug, fk_value, ik_value = limb.switch
+            value = fk_value if mode == "fk" else ik_value
+            plug_keys[plug] = (frames, [value] * len(frames))
+        animMod.write_plug_keys(plug_keys)
@@ -17,6 +17,7 @@ from PySide2 import QtWidgets
 # ncTools
 from ncTools.mods                   import uiMod;       reload(uiMod)
 from ncTools.mods                   import animMod;     reload(animMod)
+from ncTools.mods                   import curveMod;    reload(curveMod)
 from ncTools.tools.ncToolboxGlobals   import ncToolboxGlobals as G
 
 
@@ -50,13 +51,31 @@ class KeyCleanupTools_UI(uiMod.BaseSubUI):
         self.smooth_keys.clicked.connect(self.on_smooth_keys_clicked)
         self.main_layout.addWidget(self.smooth_keys, 2, 0, 1, 6)
 
+        self.smooth_kernel = uiMod.combo_box(items = curveMod.SMOOTHING_KERNELS, size = (self.w[4], self.h[1]))
+        self.main_layout.addWidget(self.smooth_kernel, 3, 0, 1, 4)
+
+        self.smooth_passes = uiMod.spin_box(value = 1, minimum = 1, maximum = 20, size = (self.w[2], self.h[1]))
+        self.main_layout.addWidget(self.smooth_passes, 3, 4, 1, 2)
+
         self.delete_redundant_keys = uiMod.push_button(label = "Delete Redundant", size = (self.w[6], self.h[1]))
-        self.delete_redundant_keys.clicked.connect(G.keyCleanupTools.delete_redundant_keys)
-        self.main_layout.addWidget(self.delete_redundant_keys, 3, 0, 1, 6)
+        self.delete_redundant_keys.clicked.connect(lambda : G.keyCleanupTools.delete_redundant_keys())
+        self.main_layout.addWidget(self.delete_redundant_keys, 4, 0, 1, 6)
 
         self.keep_extreme_keys = uiMod.push_button(label = "Keep Extreme Keys", size = (self.w[6], self.h[1]))
-        self.keep_extreme_keys.clicked.connect(G.keyCleanupTools.keep_extreme_keys)
-        self.main_layout.addWidget(self.keep_extreme_keys, 4, 0, 1, 6)
+        self.keep_extreme_keys.clicked.connect(lambda : G.keyCleanupTools.keep_extreme_keys())
+        self.main_layout.addWidget(self.keep_extreme_keys, 5, 0, 1, 6)
+
+        self.reduce_keys = uiMod.push_button(label = "Reduce Keys", size = (self.w[6], self.h[1]))
+        self.reduce_keys.clicked.connect(lambda : G.keyCleanupTools.reduce_keys())
+        self.reduce_keys.setContextMenuPolicy(QtCore.Qt.ActionsContextMenu)
+        self.benchmark_reduction = QtWidgets.QAction("Benchmark Reduction", self.reduce_keys)
+        self.benchmark_reduction.triggered.connect(lambda : G.keyCleanupTools.benchmark_reduction())
+        self.reduce_keys.addAction(self.benchmark_reduction)
+        self.main_layout.addWidget(self.reduce_keys, 6, 0, 1, 6)
+
+        self.euler_filter = uiMod.push_button(label = "Euler Filter", size = (self.w[6], self.h[1]))
+        self.euler_filter.clicked.connect(lambda : G.keyCleanupTools.euler_filter())
+        self.main_layout.addWidget(self.euler_filter, 7, 0, 1, 6)
 
 
         return self.frame_widget
@@ -67,7 +86,8 @@ class KeyCleanupTools_UI(uiMod.BaseSubUI):
 
 
     def on_smooth_keys_clicked(self):
-        self.keyCleanupTools.smooth_keys()
+        self.keyCleanupTools.smooth_keys(kernel = self.smooth_kernel.currentText(),
+                                         passes = self.smooth_passes.value())
 
 
 class KeyCleanupTools(object):
@@ -79,83 +99,52 @@ class KeyCleanupTools(object):
 
     def average(self):
         cmds.undoInfo(openChunk = True)
-        anim_curves = cmds.keyframe(q = True, sl = True, n = True)
+        anim_curves = cmds.keyframe(q = True, sl = True, n = True) or []
+        curves = animMod.read_anim_curves(anim_curves)
+        key_indices = animMod.get_selected_key_indices(anim_curves)
         for anim_curve in anim_curves:
-            key_times = animMod.get_target("key_times", anim_curve = anim_curve, selected = True, get_from = "graphEditor")
-            key_values = animMod.get_target("key_values", anim_curve = anim_curve, selected = True, get_from = "graphEditor")
-            average_value = sum(key_values)/len(key_values)
-            for key_time in key_times:
-                cmds.keyframe(anim_curve, edit = True, time = (key_time, key_time), valueChange = average_value)
+            selected_keys = key_indices[anim_curve]
+            if len(selected_keys) == 0:
+                continue
+            key_times = curves[anim_curve].times[selected_keys]
+            key_values = curves[anim_curve].values[selected_keys]
+            average_value = key_values.mean()
+            animMod.write_keys(anim_curve, key_times, [average_value] * len(key_times), replace=False)
         cmds.undoInfo(closeChunk = True)
 
 
-    def smooth_keys(self):
+    def smooth_keys(self, kernel="neighbour", passes=1, width=2):
         cmds.undoInfo(openChunk = True)
 
         # Get the selected anim curves from the graph editor
-        anim_curves = cmds.keyframe(q = True, sl = True, n = True)
-        print "ANIM CURVES", anim_curves
+        anim_curves = cmds.keyframe(q = True, sl = True, n = True) or []
 
         # Throw and error if no curve is selected
         if len(anim_curves) == 0:
             cmds.error("Please select at least 3 keys in the graph editor.")
 
+        # Read all keys of the curves at once
+        curves = animMod.read_anim_curves(anim_curves)
+        key_indices = animMod.get_selected_key_indices(anim_curves)
+
         # For every anim curve selected
         for anim_curve in anim_curves:
             # Get the selected keys
-            key_times = cmds.keyframe(anim_curve, q = True, sl = True)
-            keyframe_count = len(key_times)
-
-            # Create a duplicate curve
-            anim_curve_copy = cmds.duplicate(anim_curve)[0]
+            selected_keys = key_indices[anim_curve]
+            key_times = curves[anim_curve].times[selected_keys]
+            key_values = curves[anim_curve].values[selected_keys]
 
             # Throw an error if less than three keys are selected
-            if keyframe_count < 3:
+            if len(key_times) < 3:
                 cmds.error("Please select at least 3 keys in the graph editor.")
 
             else:
-                """# Create a duplicate curve with average of keyframe values
-                for i in range(1, keyframe_count-1): #exludes start and end
-                    # Get the values of the previous, current and next keyframes
-                    previous_frame = key_times[i-1]
-                    current_frame = key_times[i]
-                    next_frame = key_times[i+1]
-                    previous_value = cmds.keyframe(anim_curve, query = True, time = (previous_frame, previous_frame), vc = True)[0]
-                    current_value = cmds.keyframe(anim_curve, query = True, time = (current_frame, current_frame), vc = True)[0]
-                    next_value = cmds.keyframe(anim_curve, query = True, time = (next_frame, next_frame), vc = True)[0]
-
-                    # Get the average value
-                    average_value = previous_value + ((current_frame-previous_frame)*(next_value - previous_value)/(next_frame-previous_frame))
-                    print average_value
-                    # Put new value on duplicate curve
-                    cmds.keyframe(anim_curve_copy, time=(current_frame, current_frame), absolute=True, vc=average_value)
-                    """
-
-                # Create a duplicate curve with average of keyframe values
-                for i in range(1, keyframe_count-1): #exludes start and end
-                    # Get the values of the previous, current and next keyframes
-                    previous_frame = key_times[i-1]
-                    current_frame = key_times[i]
-                    next_frame = key_times[i+1]
-                    previous_value = cmds.keyframe(anim_curve, query = True, time = (previous_frame, previous_frame), vc = True)[0]
-                    current_value = cmds.keyframe(anim_curve, query = True, time = (current_frame, current_frame), vc = True)[0]
-                    next_value = cmds.keyframe(anim_curve, query = True, time = (next_frame, next_frame), vc = True)[0]
-
-                    # Get the average value
-                    average_value = previous_value + ((current_frame-previous_frame)*(next_value - previous_value)/(next_frame-previous_frame))
-                    print average_value
-                    # Put new value on duplicate curve
-                    cmds.keyframe(anim_curve_copy, time=(current_frame, current_frame), absolute=True, vc=average_value)
-
-                # Once duplicate curve has been build, copy values to original curve
-
-                for i in range(1, keyframe_count-1):
-                    current_frame = key_times[i]
-                    copy_value = cmds.keyframe(anim_curve_copy, query=True, time=(current_frame, current_frame), vc=True)[0]
-                    cmds.keyframe(anim_curve, time=(current_frame, current_frame), absolute=True, vc=copy_value)
-
-            # Delete the duplicate anim curve
-            cmds.delete(anim_curve_copy)
+                # Smooth every key, excluding start and end, with the kernel
+                smoothed_values = curveMod.smooth_values(key_times, key_values, kernel=kernel,
+                                                         passes=passes, width=width)
+
+                # Write the smoothed values to the curve in one go
+                animMod.write_keys(anim_curve, key_times[1:-1], smoothed_values[1:-1], replace=False)
 
         # Print done
         print "DONE"
@@ -163,91 +152,84 @@ class KeyCleanupTools(object):
         cmds.undoInfo(closeChunk = True)
 
 
-    def keep_extreme_keys(self):
+    def keep_extreme_keys(self, tolerance=0.0, keep_plateaus=True):
         cmds.undoInfo(openChunk = True)
-        cut_keys = {}
-        anim_curves = cmds.keyframe(q = True, sl = True, n = True)
+
+        # Get the selected anim curves from the graph editor
+        anim_curves = cmds.keyframe(q = True, sl = True, n = True) or []
+
+        # Read all keys of the curves at once
+        curves = animMod.read_anim_curves(anim_curves)
+        key_indices = animMod.get_selected_key_indices(anim_curves)
+
+        # Cut every selected key that isn't an extreme, one cut per curve
         for anim_curve in anim_curves:
-            selected_keys = cmds.keyframe(anim_curve, q = True, sl = True)
-            remove_keys = self.get_extreme_frames(anim_curve)
-            print remove_keys
-            cut_keys[anim_curve] = [x for x in selected_keys if x not in remove_keys]
-        for anim_curve in cut_keys:
-            select_keys = cut_keys[anim_curve]
-            for frame in select_keys:
-                cmds.selectKey(anim_curve, time=(frame,frame), keyframe=True)
-                cmds.cutKey(animation="keys", clear=True)
+            selected_keys = key_indices[anim_curve]
+            key_times = curves[anim_curve].times[selected_keys]
+            keep = curveMod.extreme_key_mask(curves[anim_curve].values[selected_keys], tolerance=tolerance,
+                                             keep_plateaus=keep_plateaus)
+            animMod.cut_keys(anim_curve, key_times[~keep])
 
         cmds.undoInfo(closeChunk = True)
 
-    def get_extreme_frames(self, anim_curve):
-        extreme_frames = []
-        selected_frames = cmds.keyframe(anim_curve, query=True, selected=True, timeChange=True)
 
-        for previous_frame, current_frame, next_frame in animMod.get_prev_current_next(selected_frames):
-            if previous_frame is None:
-                previous_frame = current_frame
-            if next_frame is None:
-                next_frame = current_frame
+    def reduce_keys(self, max_errors=None):
+        cmds.undoInfo(openChunk = True)
 
-            previous_value = cmds.keyframe(anim_curve, query=True, time=(previous_frame, previous_frame), valueChange=True)
-            current_value = cmds.keyframe(anim_curve, query=True, time=(current_frame, current_frame), valueChange=True)
-            next_value = cmds.keyframe(anim_curve, query=True, time=(next_frame, next_frame), valueChange=True)
+        # The selected anim curves from the graph editor, or every curve of the
+        # selected controls
+        anim_curves = cmds.keyframe(q = True, sl = True, n = True)
+        if not anim_curves:
+            controls = animMod.get_target("controls", selected=True)
+            anim_curves = animMod.get_anim_curve_index(rebuild=True).get_curves(nodes=controls)
 
-            if previous_value < current_value > next_value:
-                extreme_frames.append(current_frame)
-            if previous_value > current_value < next_value:
-                extreme_frames.append(current_frame)
-            """
-            if previous_value == current_value:
-                extreme_frames.append(current_frame)
-            if next_value == current_value:
-                extreme_frames.append(current_frame)
-            """
-            print "previous", previous_frame
-            if previous_frame == current_frame:
-                extreme_frames.append(current_frame)
-            print "next", next_frame
-            if next_frame == current_frame:
-                extreme_frames.append(current_frame)
+        # Refit every curve with as few keys as stay within the errors
+        key_counts = animMod.reduce_anim_curves(anim_curves, max_errors=max_errors)
+        keys_before = sum(before for before, after in key_counts.values())
+        keys_after = sum(after for before, after in key_counts.values())
+        print "{0} curves reduced from {1} to {2} keys".format(len(key_counts), keys_before, keys_after)
 
-        extreme_frames = list(set(extreme_frames))
+        cmds.undoInfo(closeChunk = True)
 
-        print "extreme_frames", extreme_frames
 
-        return extreme_frames
+    def benchmark_reduction(self):
+        # Reduce made up baked curves and report the key counts and time
+        result = curveMod.benchmark_reduction()
+        print "{curves} curves, {keys_before} keys reduced to {keys_after} ({reduction:.1%}) in {seconds:.2f}s".format(**result)
+        return result
 
 
-    def delete_redundant_keys(self):
+    def euler_filter(self):
+        cmds.undoInfo(openChunk = True)
+
+        # Filter the rotations of every selected node
+        animMod.euler_filter(cmds.ls(sl = True))
 
+        cmds.undoInfo(closeChunk = True)
+
+
+    def delete_redundant_keys(self, value_tolerance=1e-4, tangent_tolerance=1e-3):
+        cmds.undoInfo(openChunk = True)
+
+        # Every curve on every anim layer of the selected controls, or of the
+        # whole scene if no controls are selected
         controls = animMod.get_target("controls", selected=True)
-        print controls
-
-        for control in controls:
-            print control
-            attributes = animMod.get_target("attributes", attribute_options = ["keyable"], node=control)
-            for attribute in attributes:
-                anim_layers = animMod.get_target("anim_layers", selected=False)
-
-                for anim_layer in anim_layers:
-                    anim_curves = animMod.get_target("anim_curves", anim_layer=anim_layer, attribute=attribute, node=control)
-                    for anim_curve in anim_curves:
-                        print anim_curve
-                        redundant_keys = []
-                        keyframes = cmds.keyframe(anim_curve, query=True, timeChange=True)
-                        for previous_frame, current_frame, next_frame in animMod.get_prev_current_next(keyframes):
-                            if previous_frame is None:
-                                previous_frame = current_frame
-                            if next_frame is None:
-                                next_frame = current_frame
-                            break
-                            previous_value = cmds.keyframe(anim_curve, query=True, time=(previous_frame, previous_frame), valueChange=True)
-                            current_value = cmds.keyframe(anim_curve, query=True, time=(current_frame, current_frame), valueChange=True)
-                            next_value = cmds.keyframe(anim_curve, query=True, time=(next_frame, next_frame), valueChange=True)
-
-                            if previous_value == current_value == next_value:
-                                redundant_keys.append(current_frame)
-
-                        for frame in redundant_keys:
-                            cmds.selectKey(anim_curve, time=(frame,frame), keyframe=True, remove=True)
-                        cmds.cutKey(animation="keys", clear=True)
+        anim_curve_index = animMod.get_anim_curve_index(rebuild=True)
+        anim_curves = anim_curve_index.get_curves(nodes=controls or None)
+
+        # Cut the redundant keys, static curves keep only their first key. Keys
+        # the cut curves Maya makes miss are put back
+        cut_counts = animMod.delete_redundant_keys(anim_curves, value_tolerance, tangent_tolerance)
+        report = {}
+        for anim_curve, (cut_count, static) in cut_counts.items():
+            rig = animMod.get_namespace(anim_curve_index.get_plug(anim_curve)[0]) or "scene"
+            rig_report = report.setdefault(rig, [0, 0])
+            rig_report[0] += cut_count
+            rig_report[1] += int(static)
+
+        # Report keys removed per rig
+        for rig in sorted(report):
+            print "{0}: {1} keys removed, {2} static curves".format(rig, report[rig][0], report[rig][1])
+
+        cmds.undoInfo(closeChunk = True)
+        return report
@@ -61,11 +61,17 @@ class MirrorAnim(object):
         controls = animMod.get_controls(selected=True)
         selected_frames = animMod.get_frames()
         anim_layers = animMod.get_anim_layers(selected=True)
+        control_attributes = animMod.get_node_attributes(nodes=controls, attribute_options=["unlocked", "c", "keyable"], rebuild=True)
+        missing = [control for control in controls if animMod.get_opposite_control(node=control) is None]
+        if missing:
+            cmds.warning("No opposite control for: {0}".format(", ".join(missing)))
         if len(anim_layers) > 0:
             for anim_layer in anim_layers:
                 for control in controls:
                     opposite_control = animMod.get_opposite_control(node=control)
-                    attributes = animMod.get_attributes(node=control, attribute_options=["unlocked", "c", "keyable"]) or []
+                    if opposite_control is None:
+                        continue
+                    attributes = control_attributes[control]
                     for attribute in attributes:
                         for frame in selected_frames:
                             if cmds.copyKey(control, time=(frame, frame), at=attribute, option="keys", al=anim_layer) != None:
@@ -75,7 +81,9 @@ class MirrorAnim(object):
         else:
             for control in controls:
                 opposite_control = animMod.get_opposite_control(node=control)
-                attributes = animMod.get_attributes(node=control, attribute_options=["unlocked", "c", "keyable"]) or []
+                if opposite_control is None:
+                    continue
+                attributes = control_attributes[control]
                 for attribute in attributes:
                     for frame in selected_frames:
                         current_key = cmds.copyKey(control, time=(frame, frame), at=attribute, option="keys")
@@ -58,41 +58,44 @@ class ScaleAnimLayer(object):
     def scale_anim_layer(self):
         controls = animMod.get_target("controls", selected=True)
         source_anim_layers = animMod.get_target("anim_layers", selected=True)
+        control_attributes = animMod.get_node_attributes(nodes=controls, attribute_options=["unlocked", "c", "keyable"], rebuild=True)
+        anim_layer_membership = animMod.get_anim_layer_membership()
         for anim_layer in source_anim_layers:
             anim_layer_name = str(anim_layer)
-            anim_layer_override = cmds.animLayer(anim_layer, query=True, override=True)
+            anim_layer_override = anim_layer_membership.override[anim_layer]
 
             #Create new anim layer
             new_anim_layer_name = "{0}_scale".format(anim_layer_name)
             new_anim_layer = cmds.animLayer(new_anim_layer_name, override=anim_layer_override)
 
+            new_plugs = []
             for control in controls:
-                attributes = animMod.get_target("attributes", attribute_options=["unlocked", "c", "keyable"], node=control) or []
+                #Is it in the source layer?
+                if not anim_layer_membership.is_node_in_layer(control, anim_layer):
+                    continue
 
+                attributes = control_attributes[control]
                 for attribute in attributes:
-                    #Is it in the source layer?
-                    if not animMod.is_control_in_anim_layer(control, anim_layer):
-                        pass
-                    else:
 
-                        #Are there curves on the attribute?
-                        anim_curves = cmds.copyKey(control, time = [], at=attribute, option="curve", animLayer=anim_layer)
-
-
-                        if anim_curves > 0:
-
-                            #Add the control to the new layer
-                            cmds.animLayer(new_anim_layer, edit=True, at=control + "." + attribute)
-                            cmds.setKeyframe(control, at=attribute, al=new_anim_layer)
-                            cmds.pasteKey(control, option="replaceCompletely", al=new_anim_layer)
-
-                            new_anim_curve = animMod.get_target("anim_curve", node=control, attribute=attribute, anim_layer=new_anim_layer)
-
-                            current_time = cmds.playbackOptions(query=True, minTime=True)
-                            print current_time
-
-                            current_value = cmds.getAttr(new_anim_curve, time=current_time)
-                            print current_value
-
-                            cmds.keyframe(new_anim_curve, edit=True, relative=True, valueChange=-current_value)
+                    #Are there curves on the attribute?
+                    anim_curves = cmds.copyKey(control, time = [], at=attribute, option="curve", animLayer=anim_layer)
+
+                    if anim_curves > 0:
+
+                        #Add the control to the new layer
+                        cmds.animLayer(new_anim_layer, edit=True, at=control + "." + attribute)
+                        cmds.setKeyframe(control, at=attribute, al=new_anim_layer)
+                        cmds.pasteKey(control, option="replaceCompletely", al=new_anim_layer)
+                        new_plugs.append((control, attribute))
+
+            # Index the new curves once the layer is filled, then offset them
+            anim_curve_index = animMod.get_anim_curve_index(rebuild=True)
+            current_time = cmds.playbackOptions(query=True, minTime=True)
+            new_anim_curves = [anim_curve_index.get_curve(control, attribute, new_anim_layer)
+                               for control, attribute in new_plugs]
+            new_anim_curves = [new_anim_curve for new_anim_curve in new_anim_curves if new_anim_curve]
+            curve_values = animMod.evaluate_anim_curves(new_anim_curves, [current_time])
+            for new_anim_curve in new_anim_curves:
+                current_value = float(curve_values[new_anim_curve][0])
+                cmds.keyframe(new_anim_curve, edit=True, relative=True, valueChange=-current_value)
             cmds.animLayer(new_anim_layer_name, edit=True, override=False)
@@ -81,7 +81,7 @@ class SelectionTools(object):
         self.get_selection_data()
         all_controls = []
         for namespace in self.namespaces:
-            controls = self.get_all_controls(self.SD[namespace]["top_node"])
+            controls = self.get_all_controls(self.SD[namespace]["selected"][0])
             all_controls = all_controls + controls
         cmds.select(all_controls)
 
@@ -222,7 +222,7 @@ class SelectionTools(object):
             self.SD[namespace]["top_node"] = self.get_top_node(self.SD[namespace]["selected"][0])
 
             # For each namespace get all the controls for that rig
-            self.SD[namespace]["all"] = self.get_all_controls(self.SD[namespace]["top_node"])
+            self.SD[namespace]["all"] = self.get_all_controls(self.SD[namespace]["selected"][0])
 
     def select_fk_chain(self):
         """
@@ -244,10 +244,8 @@ class SelectionTools(object):
             root_control = "{root_name}FKA_CTRL".format(root_name=root_name)
             fk_controls.append(root_control)
 
-            children = cmds.listRelatives(root_control, ad=True, type="transform")
-            for child in children:
-                if child.endswith("_CTRL"):
-                    fk_controls.append(child)
+            children = animMod.get_hierarchy_index().get_controls(root_control)
+            fk_controls = fk_controls + children
 
         fk_controls.sort()
         cmds.select(fk_controls)
@@ -279,13 +277,7 @@ class SelectionTools(object):
         """
         Procedure to get the top node of the selected node
         """
-        current_node = [node]
-        parent = cmds.listRelatives(current_node, p=True, type="transform")
-        while parent is not None:
-            current_node = parent
-            parent = cmds.listRelatives(current_node, p=True, type="transform")
-        top_node = current_node[0]
-        print top_node
+        top_node = animMod.get_top_node(node)
         return top_node
 
 
@@ -325,12 +317,10 @@ class SelectionTools(object):
         Procedure to get all controls on a certain side of the rig based on
         whether left or right is selected
         """
-        all_controls = self.get_all_controls(selection[0])
+        namespace = self.get_namespace(selection[0])
         controls = []
-        for control in all_controls:
-            for side in sides:
-                if side in control:
-                    controls.append(control)
+        for side in sides:
+            controls = controls + animMod.get_mirror_table().get_side_controls(namespace, side)
         return controls
 
 
@@ -338,12 +328,8 @@ class SelectionTools(object):
         """
         Procedure to get all controls in a given rig
         """
-        top_node = self.get_top_node(node)
-        all_controls = []
-        relatives = cmds.listRelatives(top_node, ad=True, type="transform")
-        for control in relatives:
-            if control.endswith("_CTRL"):
-                all_controls.append(control)
+        rig = animMod.get_hierarchy_index().get_rig(node)
+        all_controls = animMod.get_hierarchy_index().get_controls(rig)
         return all_controls
 
 
@@ -367,10 +353,6 @@ class SelectionTools(object):
 
 
     def get_display_group_controls(self, display_group):
-        display_group_controls = []
-        # Get all children of the display group
-        relatives = cmds.listRelatives(display_group, ad=True, type="transform")
-        for control in relatives:
-            if control.endswith("_CTRL"):
-                display_group_controls.append(control)
+        # Get all controls below the display group
+        display_group_controls = animMod.get_hierarchy_index().get_controls(display_group)
         return display_group_controls
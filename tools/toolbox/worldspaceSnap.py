@@ -40,25 +40,34 @@ class WorldspaceSnap_UI(uiMod.BaseSubUI):
         self.main_widget.setLayout(self.main_layout)
 
         # Create buttons
+        self.current_frame_radio = uiMod.radio_button(label="Current Frame", size=(self.w[6], self.h[1]))
+        self.current_frame_radio.setChecked(True)
+        self.current_frame_radio.clicked.connect(lambda : setattr(worldspaceSnap, "frame_type", "current"))
+        self.main_layout.addWidget(self.current_frame_radio, 1, 0, 1, 6)
+
+        self.frame_range_radio = uiMod.radio_button(label="Frame Range", size=(self.w[6], self.h[1]))
+        self.frame_range_radio.clicked.connect(lambda : setattr(worldspaceSnap, "frame_type", "range"))
+        self.main_layout.addWidget(self.frame_range_radio, 2, 0, 1, 6)
+
         self.snap_selected = uiMod.push_button(label="Snap Selection", size=(self.w[6], self.h[1]))
         self.snap_selected.clicked.connect(worldspaceSnap.snap_selection)
-        self.main_layout.addWidget(self.snap_selected, 1, 0, 1, 6)
+        self.main_layout.addWidget(self.snap_selected, 3, 0, 1, 6)
 
         self.snap_rig = uiMod.push_button(label="Snap Rigs", size=(self.w[6], self.h[1]))
         self.snap_rig.clicked.connect(worldspaceSnap.snap_rig)
-        self.main_layout.addWidget(self.snap_rig, 2, 0, 1, 6)
+        self.main_layout.addWidget(self.snap_rig, 4, 0, 1, 6)
 
         self.snap_selected_to_rig = uiMod.push_button(label="Snap Selected to Rig", size=(self.w[6], self.h[1]))
         self.snap_selected_to_rig.clicked.connect(worldspaceSnap.snap_selected_to_rig)
-        self.main_layout.addWidget(self.snap_selected_to_rig, 3, 0, 1, 6)
+        self.main_layout.addWidget(self.snap_selected_to_rig, 5, 0, 1, 6)
 
         self.make_locators = uiMod.push_button(label="Make Locators", size=(self.w[6], self.h[1]))
         self.make_locators.clicked.connect(worldspaceSnap.make_locators)
-        self.main_layout.addWidget(self.make_locators, 4, 0, 1, 6)
+        self.main_layout.addWidget(self.make_locators, 6, 0, 1, 6)
 
-        self.test = uiMod.push_button(label="test", size=(self.w[6], self.h[1]))
-        self.test.clicked.connect(worldspaceSnap.test)
-        self.main_layout.addWidget(self.test, 5, 0, 1, 6)
+        self.bake_constraints = uiMod.push_button(label="Bake Constraints", size=(self.w[6], self.h[1]))
+        self.bake_constraints.clicked.connect(worldspaceSnap.bake_constraints)
+        self.main_layout.addWidget(self.bake_constraints, 7, 0, 1, 6)
 
         return self.frame_widget
 
@@ -71,6 +80,8 @@ class WorldspaceSnap():
             return
         G.WorldspaceSnap = self
 
+        self.frame_type = "current"
+
 
     def snap_selection(self):
         print "snap"
@@ -80,248 +91,96 @@ class WorldspaceSnap():
         selection.remove(source_control)
         targets = selection
 
-        for target in targets:
-            self.snap(source_control, target)
+        self.snap_batch([(source_control, target) for target in targets])
 
     def snap_rig(self):
         print "snap rig"
         source_rig = cmds.ls(sl=1)[0]
         target_rig = cmds.ls(sl=1)[1]
 
-        source_namespace = source_rig.rpartition(":")[0]
-        target_namespace = target_rig.rpartition(":")[0]
+        source_namespace = animMod.get_namespace(source_rig)
+        target_namespace = animMod.get_namespace(target_rig)
 
         source_controls = animMod.get_target("controls", selected=False, node=source_rig)
-        print source_controls
-
-        for source_control in source_controls:
-            control = source_control.rpartition(":")[2]
-            target_control = target_namespace + ":" + control
-
-            if cmds.objExists(target_control):
-                self.snap(source_control, target_control)
-            else:
-                print target_control, "doesn't exist"
-
+        control_mapping = animMod.get_control_mapping()
+        snap_pairs = control_mapping.get_pairs(source_namespace, target_namespace, source_controls=source_controls)
+        for source_control in control_mapping.get_missing(source_namespace, target_namespace):
+            cmds.warning("{0} has no control in {1}".format(source_control, target_namespace or "the root namespace"))
+
+        self.snap_batch(snap_pairs)
+
+
+    def get_frames(self):
+        """
+        Method returns the frames to snap, None for the current frame or the
+        selected frames for a frame range
+        """
+        if self.frame_type == "range":
+            return animMod.get_target("frames", selected=True)
+        return None
+
+    def snap_batch(self, snap_pairs, frames=None):
+        """
+        Method snaps every target to its source. All source world matrices are
+        read first, then the targets are written parents and constraint
+        targets first, so every control lands right in one run. With frames,
+        e.g a frame range or list, the targets are keyed on every frame
+        """
+        frames = frames or self.get_frames()
+        sources = [source for source, target in snap_pairs]
+        targets = [target for source, target in snap_pairs]
+        if frames is None:
+            source_matrices = animMod.get_world_matrices(sources)
+            animMod.set_world_matrices(targets, source_matrices)
+            return
 
-    def snap(self, source, target):
-        source_xform = cmds.xform(source, query=True, ws=True, m=True)
-        cmds.xform(target, ws=True, m=source_xform)
+        cmds.undoInfo(openChunk=True)
+        try:
+            source_matrices = animMod.sample_world_matrices(sources, list(frames))
+            animMod.bake_world_matrices(targets, source_matrices, frames)
+        finally:
+            cmds.undoInfo(closeChunk=True)
 
     def snap_selected_to_rig(self):
         selection = cmds.ls(sl=1)
-        print selection
         source_rig = selection[-1]
         selection.remove(source_rig)
         target_controls = selection
-        print target_controls
-
-        source_namespace = source_rig.rpartition(":")[0]
-        target_namespace = target_controls[0].rpartition(":")[0]
 
-        for target_control in target_controls:
-            control_name = target_control.rpartition(":")[2]
-            source_control = source_namespace + ":" + control_name
+        source_namespace = animMod.get_namespace(source_rig)
+        target_namespace = animMod.get_namespace(target_controls[0])
 
-            self.snap(source_control, target_control)
+        snap_pairs = animMod.get_control_mapping().get_pairs(source_namespace, target_namespace,
+                                                             target_controls=target_controls)
+        self.snap_batch(snap_pairs)
 
     def make_locators(self):
-        print "make locators"
-        
-
-
-    def test2(self):
-        print "test"
-
-        source_rig = cmds.ls(sl=1)[0]
-        #target_rig = cmds.ls(sl=1)[1]
-
-        source_namespace = source_rig.rpartition(":")[0]
-        #target_namespace = target_rig.rpartition(":")[0]
-
-        source_relatives = cmds.listRelatives(source_rig, type="transform", ad=True)
-        source_relatives.reverse()
-        source_relatives = [source_rig] + source_relatives
-        print source_relatives
-        print len(source_relatives)
-
-        parent_list = []
-        parent_list = set(parent_list)
-        naughty_list = []
-        naughty_list = set(naughty_list)
-
-        for node in source_relatives:
-
-            node_index = source_relatives.index(node)
-            print node_index, ":", node, "---------------------"
-            """if node_index == 5:
-                break"""
-
-
-            #Does it have children?
-            child_connection = cmds.listConnections(node, type="transform", s=False, d=True)
-            child_group = cmds.listRelatives(node, type="transform", ad=True)
-            child_constraint = cmds.listConnections(node, type="constraint", s=False, d=True)
-            children = []
-            for list in [child_connection, child_group, child_constraint]:
-                if list:
-                    children = children + list
-            print "CHILDREN:", children
-
-            # Are there children in the parent list?
-            child_in_parent_list = []
-            for child in children:
-                if child in parent_list:
-                    child_in_parent_list.append(child)
-            if len(child_in_parent_list) > 0:
-                print node, "has children:", child_in_parent_list, "in parent list"
-                print "Remove children from parent_list"
-
-                for child in child_in_parent_list:
-                    if child in parent_list:
-                        parent_list.remove(child)
-                        naughty_list.add(child)
-
-            # Add node to parent list
-            parent_list.add(node)
-
-            # For child in naughty list, find it's lowest parent in the parent list
-            parent_list = (parent_list)
-
-            for child in naughty_list:
-                parent_connection = cmds.listConnections(node, type="transform", s=True, d=False)
-                parent_group = cmds.listRelatives(node, type="transform", p=True)
-                parent_constraint = cmds.listConnections(node, type="constraint", s=True, d=False)
-
-
-
-
-        print parent_list
-        print naughty_list
-
-
-    def test(self):
-
-        source_rig = cmds.ls(sl=1)[0]
-        #target_rig = cmds.ls(sl=1)[1]
-
-        source_namespace = source_rig.rpartition(":")[0]
-        #target_namespace = target_rig.rpartition(":")[0]
-
-        source_relatives = cmds.listRelatives(source_rig, type="transform", ad=True)
-        source_relatives.reverse()
-        source_relatives = [source_rig] + source_relatives
-        source_controls = []
-        for node in source_relatives:
-            if node.endswith("_CTRL"):
-                source_controls.append(node)
-        print source_controls
-
-        ordered_controls = source_controls
-        controls_constrained = []
-
-        for control in source_controls:
-            parent = cmds.listRelatives(control, type="transform", p=True)
-
-            #Does parent have constraints on it?
-            constraint = cmds.listConnections(parent, type="constraint", s=True, d=False)
-            if constraint:
-                controls_constrained.append(control)
-                ordered_controls.remove(control)
-
-                print "-------------------------"
-                print control
-                print parent
-                print constraint
-
-        """for control in ordered_controls:
-            print control"""
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+        """
+        Method makes a world space locator for every selected node and bakes it
+        to the node over the frames
+        """
+        selection = cmds.ls(sl=1)
+        frames = self.get_frames() or [animMod.get_current_frame()]
+
+        cmds.undoInfo(openChunk=True)
+        try:
+            locators = [cmds.spaceLocator(name="{0}_LOC".format(node.rpartition(":")[2]))[0] for node in selection]
+            self.snap_batch(list(zip(selection, locators)), frames=frames)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+        cmds.select(locators)
+
+    def bake_constraints(self):
+        """
+        Method bakes the selected constrained nodes onto keys and deletes their
+        constraints, on the selected frames for a frame range or the current
+        frame otherwise
+        """
+        selection = cmds.ls(sl=1)
+        frames = self.get_frames() or [animMod.get_current_frame()]
 
-        #
+        cmds.undoInfo(openChunk=True)
+        try:
+            animMod.bake(nodes=selection, frames=frames)
+        finally:
+            cmds.undoInfo(closeChunk=True)